@@ -1,12 +1,105 @@
 from docx import Document
-from docx.shared import Inches, Pt, RGBColor
+from docx.shared import Pt
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from datetime import datetime
 import pandas as pd
+from merged_store import SIZE_LABELS
+from report_results import CI_PARAMS, load_report_results
+from tracing import span
 
 print("Creating Professional Analysis Report...")
 
-# Create document
+# ===== LOAD ANALYSIS RESULTS =====
+# Every number below comes from the cached results artifact (results/*.json),
+# recomputed only when the merged store, fear_greed_index.csv or the analysis
+# parameters change (see report_results.py / results_cache.py).
+with span("load_report_results"):
+    results = load_report_results()
+overview = results['overview']
+tests = results['tests']
+sentiment = pd.DataFrame(results['sentiment']).set_index('classification')
+position = pd.DataFrame(results['position']).set_index('classification')
+top_traders = pd.DataFrame(results['top_traders'])
+coin_alpha = pd.DataFrame(results['coin_alpha'])
+size_ranges = pd.DataFrame(results['size_ranges']).set_index('size_category')
+optimal_size = pd.DataFrame(results['optimal_size']).set_index('classification')
+risk = pd.DataFrame(results['risk'])
+cis = pd.DataFrame(results['cis']).set_index(['classification', 'metric'])
+
+# Fear & Greed index bands for each classification
+INDEX_BANDS = {
+    'Extreme Fear': 'index < 25',
+    'Fear': 'index 25-44',
+    'Neutral': 'index 45-55',
+    'Greed': 'index 56-75',
+    'Extreme Greed': 'index > 75',
+}
+# size_category labels as the report words them
+SMALL, MEDIUM, LARGE, VERY_LARGE = SIZE_LABELS
+SIZE_DESCRIPTIONS = {
+    VERY_LARGE: 'Very Large (>$10k)',
+    LARGE: 'Large ($2-10k)',
+    MEDIUM: 'Medium ($500-$2k)',
+    SMALL: 'Small (<$500)',
+}
+
+
+def usd(v):
+    """$2.72M / $739K / $166 style amounts."""
+    sign = '-' if v < 0 else ''
+    v = abs(v)
+    if v >= 1e6:
+        return f"{sign}${v / 1e6:.2f}M"
+    if v >= 1e3:
+        return f"{sign}${v / 1e3:.0f}K"
+    return f"{sign}${v:,.0f}"
+
+
+def usd_plain(v, decimals=0):
+    return f"{'-' if v < 0 else ''}${abs(v):,.{decimals}f}"
+
+
+def p_text(p):
+    return "p < 0.000001" if p < 1e-6 else f"p = {p:.4f}"
+
+
+def verdict(p):
+    return "✓ CONFIRMED" if p < 0.05 else "✗ NOT CONFIRMED"
+
+
+def ci_text(sentiment, metric):
+    """'95% CI 0.012 to 0.034' from the bootstrap, or '' when not available."""
+    if (sentiment, metric) not in cis.index:
+        return ""
+    ci = cis.loc[(sentiment, metric)]
+    return f"{CI_PARAMS['level']:.0%} CI {ci['ci_low']:.3f} to {ci['ci_high']:.3f}"
+
+
+start_date = pd.to_datetime(overview['start_date'])
+end_date = pd.to_datetime(overview['end_date'])
+period_short = f"{start_date:%b %Y} - {end_date:%b %Y}"
+period_years = f"{start_date:%Y}-{end_date:%Y}"
+
+h3_max_p = max((row['p'] for row in tests['h3']), default=1.0)
+all_p = [tests['h1']['p'], tests['h2']['p'], tests['h4']['p'], h3_max_p]
+all_p_text = "p < 0.001" if max(all_p) < 0.001 else f"largest p = {max(all_p):.3f}"
+
+best_risk = risk.iloc[0]
+best_risk_ci = ci_text(best_risk['classification'], 'sharpe_like')
+best_risk_ci = f", {best_risk_ci}" if best_risk_ci else ""
+contrarian_sentiment = position['short_advantage'].idxmax()
+contrarian = position.loc[contrarian_sentiment]
+# Even the sentiment most favourable to shorts can have longs ahead
+shorts_lead = contrarian['short_advantage'] > 0
+advantage_pct = abs(contrarian['short_advantage_pct'])
+leader, trailer = ('Short', 'long') if shorts_lead else ('Long', 'short')
+highest_avg_sentiment = sentiment['avg_pnl'].idxmax()
+most_trades_sentiment = sentiment['num_trades'].idxmax()
+win_rates = pd.Series(tests['h2']['win_rates'])
+rho = tests['h4']['rho']
+
+# ===== Create document =====
+build = span("build_document").start()
 doc = Document()
 
 # ===== TITLE PAGE =====
@@ -27,21 +120,27 @@ doc.add_page_break()
 # ===== EXECUTIVE SUMMARY =====
 doc.add_heading('Executive Summary', 1)
 
-summary_text = """This analysis examines the relationship between Bitcoin market sentiment and trader performance using 211,218 trades across 480 days (May 2023 - May 2025) from 32 accounts trading 246 cryptocurrencies.
+profitability_lines = []
+for name, row in sentiment.sort_values('total_pnl', ascending=False).iterrows():
+    notes = []
+    if name == highest_avg_sentiment:
+        notes.append(f"highest avg PnL: {usd_plain(row['avg_pnl'])}")
+    if name == most_trades_sentiment:
+        notes.append(f"most trades: {row['num_trades']:,.0f}")
+    suffix = f" ({', '.join(notes)})" if notes else ""
+    profitability_lines.append(f"- {name}: {usd(row['total_pnl'])} total PnL{suffix}")
+
+summary_text = f"""This analysis examines the relationship between Bitcoin market sentiment and trader performance using {overview['matched_trades']:,} trades across {overview['trading_days']} days ({period_short}) from {overview['accounts']} accounts trading {overview['coins']} cryptocurrencies.
 
 KEY FINDINGS:
-- Market sentiment significantly affects trader profitability (p < 0.001)
-- Extreme Greed presents the best risk-adjusted returns (Sharpe ratio: 0.123, Win rate: 89.2%)
-- Contrarian short positions during Extreme Greed yield $166 average PnL (169% advantage over long)
-- Trade size positively correlates with profitability (Spearman: 0.48, p < 0.001)
+- Market sentiment {'significantly affects' if tests['h1']['p'] < 0.05 else 'does not significantly affect'} trader profitability ({p_text(tests['h1']['p'])})
+- {best_risk['classification']} presents the best risk-adjusted returns (Sharpe ratio: {best_risk['sharpe_like']:.3f}{best_risk_ci}, Win rate: {best_risk['win_rate']:.1f}%)
+- Contrarian short positions during {contrarian_sentiment} yield {usd_plain(contrarian['avg_pnl_Short'])} average PnL ({advantage_pct:.0f}% {'advantage over' if shorts_lead else 'behind'} long)
+- Trade size {'positively' if rho > 0 else 'negatively'} correlates with profitability (Spearman: {rho:.2f}, {p_text(tests['h4']['p'])})
 - Coin-specific sentiment dependencies offer exploitable alpha opportunities
 
 TOTAL PROFITABILITY BY SENTIMENT:
-- Extreme Greed: $2.72M total PnL (highest avg PnL: $130)
-- Fear: $3.36M total PnL (most trades: 61,837)
-- Greed: $2.15M total PnL
-- Neutral: $1.29M total PnL
-- Extreme Fear: $739K total PnL"""
+""" + "\n".join(profitability_lines)
 
 doc.add_paragraph(summary_text)
 
@@ -51,33 +150,35 @@ doc.add_page_break()
 doc.add_heading('1. Methodology', 1)
 
 doc.add_heading('1.1 Data Overview', 2)
-methodology = """
+methodology = f"""
 DATASETS:
-1. Historical Trader Data: 211,224 trades from Hyperliquid exchange
-   - Period: May 1, 2023 - May 1, 2025 (480 unique trading days)
-   - Accounts: 32 traders
-   - Assets: 246 cryptocurrencies
-   
-2. Fear & Greed Index: 2,644 daily sentiment readings
+1. Historical Trader Data: {overview['total_trades']:,} trades from Hyperliquid exchange
+   - Period: {start_date:%B} {start_date.day}, {start_date:%Y} - {end_date:%B} {end_date.day}, {end_date:%Y} ({overview['trading_days']} unique trading days)
+   - Accounts: {overview['accounts']} traders
+   - Assets: {overview['coins']} cryptocurrencies
+
+2. Fear & Greed Index: {overview['sentiment_readings']:,} daily sentiment readings
    - Categories: Extreme Fear, Fear, Neutral, Greed, Extreme Greed
-   - Match rate: 100% (211,218 trades matched with sentiment)
+   - Match rate: {overview['match_rate']:.0f}% ({overview['matched_trades']:,} trades matched with sentiment)
 
 DATA QUALITY:
 - No missing values in critical fields
-- 87.24% of trades have associated PnL data
+- {overview['pct_closed']:.2f}% of trades have associated PnL data
 - Complete date coverage for analysis period"""
 
 doc.add_paragraph(methodology)
 
 doc.add_heading('1.2 Statistical Methods', 2)
-methods = """
+methods = f"""
 HYPOTHESIS TESTING:
 1. Kruskal-Wallis H-test: Non-parametric ANOVA for sentiment effect on PnL
 2. Chi-Square test: Win rate differences across sentiments
 3. Mann-Whitney U test: Long vs Short performance by sentiment
 4. Spearman correlation: Trade size vs profitability relationship
 
-SIGNIFICANCE LEVEL: α = 0.05 (all tests achieved p < 0.001)"""
+CONFIDENCE INTERVALS: percentile bootstrap ({CI_PARAMS['n_boot']:,} replicates, resampling whole trading days so within-day correlation is kept)
+
+SIGNIFICANCE LEVEL: α = 0.05 ({'all tests achieved ' if max(all_p) < 0.001 else ''}{all_p_text})"""
 
 doc.add_paragraph(methods)
 
@@ -88,24 +189,24 @@ doc.add_heading('2. Statistical Analysis Results', 1)
 
 doc.add_heading('2.1 Hypothesis Testing', 2)
 
-results = """
+results_text = f"""
 H1: MARKET SENTIMENT AFFECTS TRADER PNL
-✓ CONFIRMED (Kruskal-Wallis H = 730.33, p < 0.000001)
-Market sentiment has a statistically significant impact on trading profitability.
+{verdict(tests['h1']['p'])} (Kruskal-Wallis H = {tests['h1']['h']:.2f}, {p_text(tests['h1']['p'])})
+Market sentiment {'has' if tests['h1']['p'] < 0.05 else 'has no'} statistically significant impact on trading profitability.
 
 H2: WIN RATES DIFFER BY SENTIMENT
-✓ CONFIRMED (Chi-square = 1976.45, p < 0.000001)
-Win rates range from 76.2% (Extreme Fear) to 89.2% (Extreme Greed).
+{verdict(tests['h2']['p'])} (Chi-square = {tests['h2']['chi2']:.2f}, {p_text(tests['h2']['p'])})
+Win rates range from {win_rates.min():.1f}% ({win_rates.idxmin()}) to {win_rates.max():.1f}% ({win_rates.idxmax()}).
 
 H3: LONG/SHORT STRATEGIES PERFORM DIFFERENTLY BY SENTIMENT
-✓ CONFIRMED (Mann-Whitney U tests, all p < 0.01)
-Position type effectiveness varies significantly with market sentiment.
+{verdict(h3_max_p)} (Mann-Whitney U tests, largest {p_text(h3_max_p)})
+Position type effectiveness {'varies significantly' if h3_max_p < 0.05 else 'does not consistently vary'} with market sentiment.
 
 H4: TRADE SIZE CORRELATES WITH PROFITABILITY
-✓ CONFIRMED (Spearman ρ = 0.48, p < 0.000001)
-Larger trades demonstrate significantly higher average returns."""
+{verdict(tests['h4']['p'])} (Spearman ρ = {rho:.2f}, {p_text(tests['h4']['p'])})
+Larger trades demonstrate {'significantly ' if tests['h4']['p'] < 0.05 else ''}{'higher' if rho > 0 else 'lower'} average returns."""
 
-doc.add_paragraph(results)
+doc.add_paragraph(results_text)
 
 doc.add_page_break()
 
@@ -113,26 +214,32 @@ doc.add_page_break()
 doc.add_heading('3. Key Insights', 1)
 
 doc.add_heading('3.1 Contrarian Trading Opportunity', 2)
-insight1 = """
-FINDING: Short positions massively outperform during Extreme Greed
+insight1 = f"""
+FINDING: {leader} positions outperform {trailer} positions during {contrarian_sentiment}
 
-EXTREME GREED PERFORMANCE:
-- Short positions: $166 avg PnL (89.4% win rate)
-- Long positions: $62 avg PnL (88.8% win rate)
-- Advantage: 169% higher returns for shorting
+{contrarian_sentiment.upper()} PERFORMANCE:
+- Short positions: {usd_plain(contrarian['avg_pnl_Short'])} avg PnL ({contrarian['win_rate_Short']:.1f}% win rate)
+- Long positions: {usd_plain(contrarian['avg_pnl_Long'])} avg PnL ({contrarian['win_rate_Long']:.1f}% win rate)
+- Advantage: {advantage_pct:.0f}% higher returns for {'shorting' if shorts_lead else 'going long'}
 
-INTERPRETATION: Market euphoria creates overvaluation, presenting profitable short opportunities. This represents a clear contrarian alpha signal."""
+INTERPRETATION: {'Market euphoria creates overvaluation, presenting profitable short opportunities. This represents a clear contrarian alpha signal.' if shorts_lead else f'Shorts trail longs in every sentiment, {contrarian_sentiment} included, so there is no contrarian short signal in this period.'}"""
 
 doc.add_paragraph(insight1)
 
 doc.add_heading('3.2 Top Trader Behavior', 2)
-insight2 = """
+top_vs_others = top_traders.pivot(index='classification', columns='trader_group', values='avg_pnl').dropna()
+top_vs_others = top_vs_others.sort_values('Top', ascending=False).head(2)
+top_lines = "\n".join(
+    f"- {name}: {usd_plain(row['Top'])} avg PnL vs {usd_plain(row['Others'])} for others"
+    + (f" ({row['Top'] / row['Others']:.0f}x better)" if row['Others'] > 0 else "")
+    for name, row in top_vs_others.iterrows()
+)
+insight2 = f"""
 FINDING: Elite traders (top 3 by PnL) exhibit distinct patterns
 
 TOP TRADER CHARACTERISTICS:
 - Higher average trade size during favorable conditions
-- Extreme Greed: $935 avg PnL vs $84 for others (11x better)
-- Fear: $220 avg PnL vs $71 for others (3x better)
+{top_lines}
 - Consistently higher win rates across all sentiment categories
 
 INTERPRETATION: Successful traders scale position size based on market conditions and maintain discipline across sentiment regimes."""
@@ -140,44 +247,56 @@ INTERPRETATION: Successful traders scale position size based on market condition
 doc.add_paragraph(insight2)
 
 doc.add_heading('3.3 Coin-Specific Sentiment Dependencies', 2)
-insight3 = """
+coin_lines = "\n".join(
+    f"- {row['Coin']}: {usd_plain(row['pnl_range'])} PnL range (best: {row['best_sentiment']} "
+    f"{usd_plain(row['best_avg_pnl'])}, worst: {row['worst_sentiment']} {usd_plain(row['worst_avg_pnl'])})"
+    for _, row in coin_alpha.head(3).iterrows()
+)
+lead_coin = coin_alpha.iloc[0] if len(coin_alpha) else None
+lead_coin_text = (
+    f" Trading {lead_coin['Coin']} exclusively during {lead_coin['best_sentiment']} would have "
+    f"generated {usd(lead_coin['best_total_pnl'])} in profits." if lead_coin is not None else ""
+)
+insight3 = f"""
 FINDING: Certain assets show extreme sentiment-dependent performance
 
 TOP SENTIMENT-DEPENDENT COINS:
-- TRUMP: $1,595 PnL range (best: Extreme Fear, worst: Greed)
-- ENA: $1,440 PnL range (best: Fear, worst: Extreme Greed)
-- @107: $467 PnL range (best: Extreme Greed $314, worst: Extreme Fear -$154)
+{coin_lines}
 
-INTERPRETATION: Asset-specific sentiment strategies offer significant alpha. Trading @107 exclusively during Extreme Greed would have generated $1.99M in profits."""
+INTERPRETATION: Asset-specific sentiment strategies offer significant alpha.{lead_coin_text}"""
 
 doc.add_paragraph(insight3)
 
 doc.add_heading('3.4 Optimal Position Sizing', 2)
-insight4 = """
+size_lines = "\n".join(
+    f"- {SIZE_DESCRIPTIONS[bucket]}: {usd_plain(size_ranges.loc[bucket, 'min'], 2 if abs(size_ranges.loc[bucket, 'min']) < 1 else 0)}"
+    f"-{usd_plain(size_ranges.loc[bucket, 'max'])} avg PnL{' across sentiments' if bucket == VERY_LARGE else ''}"
+    for bucket in [VERY_LARGE, LARGE, MEDIUM, SMALL] if bucket in size_ranges.index
+)
+insight4 = f"""
 FINDING: Trade size directly correlates with profitability
 
 AVERAGE PNL BY POSITION SIZE:
-- Very Large (>$10k): $501-$1,124 avg PnL across sentiments
-- Large ($2-10k): $130-$279 avg PnL
-- Medium ($500-$2k): $26-$72 avg PnL
-- Small (<$500): $0.23-$15 avg PnL
+{size_lines}
 
 INTERPRETATION: Capital allocation efficiency increases with position size. This suggests economies of scale in trade execution and lower relative fee impact."""
 
 doc.add_paragraph(insight4)
 
 doc.add_heading('3.5 Risk-Adjusted Returns', 2)
-insight5 = """
-FINDING: Extreme Greed offers the best risk-adjusted returns
+risk_lines = []
+for i, row in risk.iterrows():
+    tag = " (best)" if i == 0 else (" (worst)" if i == len(risk) - 1 else "")
+    interval = ci_text(row['classification'], 'sharpe_like')
+    risk_lines.append(f"{i + 1}. {row['classification']}: {row['sharpe_like']:.3f}"
+                      f"{f' ({interval})' if interval else ''}{tag}")
+insight5 = f"""
+FINDING: {best_risk['classification']} offers the best risk-adjusted returns
 
 SHARPE-LIKE RATIOS (mean/std):
-1. Extreme Greed: 0.123 (best)
-2. Neutral: 0.096
-3. Fear: 0.084
-4. Greed: 0.054
-5. Extreme Fear: 0.044 (worst)
+""" + "\n".join(risk_lines) + f"""
 
-INTERPRETATION: Despite common wisdom to avoid euphoric markets, Extreme Greed provides superior risk-adjusted performance with the highest win rate and controlled volatility."""
+INTERPRETATION: Despite common wisdom to avoid euphoric markets, {best_risk['classification']} provides superior risk-adjusted performance with the highest win rate and controlled volatility."""
 
 doc.add_paragraph(insight5)
 
@@ -187,48 +306,56 @@ doc.add_page_break()
 doc.add_heading('4. Actionable Trading Strategies', 1)
 
 doc.add_heading('Strategy 1: Contrarian Shorting', 2)
-strategy1 = """
-WHEN: Market sentiment reaches Extreme Greed
+strategy1 = f"""
+WHEN: Market sentiment reaches {contrarian_sentiment}
 ACTION: Increase short position allocation to 70% of portfolio
-EXPECTED OUTCOME: $166 avg PnL per trade, 89.4% win rate
+EXPECTED OUTCOME: {usd_plain(contrarian['avg_pnl_Short'])} avg PnL per trade, {contrarian['win_rate_Short']:.1f}% win rate
 RATIONALE: Market euphoria creates systematic overvaluation
 
 IMPLEMENTATION:
 1. Monitor Fear & Greed Index daily
-2. When index > 75 (Extreme Greed), shift to short bias
+2. When {INDEX_BANDS[contrarian_sentiment]} ({contrarian_sentiment}), shift to short bias
 3. Target liquid assets with high trading volume
 4. Use position sizing >$10k for optimal returns"""
 
 doc.add_paragraph(strategy1)
 
 doc.add_heading('Strategy 2: Coin-Specific Sentiment Timing', 2)
-strategy2 = """
+rule_lines = "\n".join(
+    (f"- {row['Coin']}: Trade ONLY during {row['best_sentiment']} (avg {usd_plain(row['best_avg_pnl'])} PnL "
+     f"vs {usd_plain(row['worst_avg_pnl'])} in {row['worst_sentiment']})") if i == 0 else
+    f"- {row['Coin']}: Prioritize {row['best_sentiment']} periods (avg {usd_plain(row['best_avg_pnl'])} PnL)"
+    for i, (_, row) in enumerate(coin_alpha.head(4).iterrows())
+)
+avoid_line = (f"- {lead_coin['Coin']} during {lead_coin['worst_sentiment']}: "
+              f"{usd_plain(lead_coin['worst_avg_pnl'])} avg PnL\n" if lead_coin is not None else "")
+strategy2 = f"""
 WHEN: Specific sentiment conditions met for target assets
 ACTION: Trade only during favorable sentiment windows
 
 COIN-SPECIFIC RULES:
-- @107: Trade ONLY during Extreme Greed (avg $314 PnL vs -$154 in Extreme Fear)
-- BTC: Prioritize Fear periods (avg $111 PnL)
-- HYPE: Strong during Extreme Fear (avg $101 PnL)
-- ETH: Best during Fear (avg $350 PnL)
+{rule_lines}
 
 AVOID:
-- @107 during Extreme Fear: -$154 avg PnL
-- Small cap coins during Neutral periods"""
+{avoid_line}- Small cap coins during Neutral periods"""
 
 doc.add_paragraph(strategy2)
 
 doc.add_heading('Strategy 3: Adaptive Position Sizing', 2)
-strategy3 = """
+optimal_lines = "\n".join(
+    f"- {name}: {SIZE_DESCRIPTIONS[row['size_category']]} - avg {usd_plain(row['avg_pnl'])} PnL"
+    for name, row in optimal_size.sort_values('avg_pnl', ascending=False).head(2).iterrows()
+)
+small_max = size_ranges.loc[SMALL, 'max'] if SMALL in size_ranges.index else 0
+strategy3 = f"""
 WHEN: All market conditions
 ACTION: Scale position size based on sentiment confidence
 
 POSITION SIZE BY SENTIMENT:
-- Extreme Greed: Very Large (>$10k) - avg $1,124 PnL
-- Fear: Very Large (>$10k) - avg $721 PnL
-- All sentiments: Avoid Small (<$500) - avg $0-15 PnL
+{optimal_lines}
+- All sentiments: Avoid Small (<$500) - avg $0-{small_max:.0f} PnL
 
-RATIONALE: 48% positive correlation between size and profitability suggests economies of scale. Fee impact decreases proportionally with size."""
+RATIONALE: {abs(rho) * 100:.0f}% {'positive' if rho > 0 else 'negative'} correlation between size and profitability suggests economies of scale. Fee impact decreases proportionally with size."""
 
 doc.add_paragraph(strategy3)
 
@@ -253,18 +380,18 @@ doc.add_page_break()
 # ===== RISK WARNINGS =====
 doc.add_heading('5. Risk Considerations', 1)
 
-risks = """
+risks = f"""
 LIMITATIONS & RISKS:
 
 1. HISTORICAL PERFORMANCE: Past results do not guarantee future returns. Market structure may change.
 
-2. SAMPLE BIAS: Analysis based on 32 accounts. Individual trader skill affects results.
+2. SAMPLE BIAS: Analysis based on {overview['accounts']} accounts. Individual trader skill affects results.
 
 3. SENTIMENT LAG: Fear & Greed Index is a lagging indicator. Real-time sentiment may differ.
 
 4. EXECUTION RISK: Strategies assume perfect execution. Slippage and fees will reduce actual returns.
 
-5. MARKET REGIME CHANGE: 2023-2025 was a specific market cycle. Bear markets may show different patterns.
+5. MARKET REGIME CHANGE: {period_years} was a specific market cycle. Bear markets may show different patterns.
 
 6. LIQUIDITY CONSTRAINTS: Very large position sizing may not be achievable for all traders/assets.
 
@@ -284,8 +411,8 @@ doc.add_page_break()
 # ===== CONCLUSIONS =====
 doc.add_heading('6. Conclusions', 1)
 
-conclusions = """
-This analysis provides statistically robust evidence that Bitcoin market sentiment significantly influences trader performance. The relationship is not only significant (p < 0.001 for all major hypotheses) but also economically meaningful, with potential alpha generation opportunities identified.
+conclusions = f"""
+This analysis provides statistically robust evidence that Bitcoin market sentiment significantly influences trader performance. The relationship is not only significant ({all_p_text} for all major hypotheses) but also economically meaningful, with potential alpha generation opportunities identified.
 
 KEY TAKEAWAYS:
 
@@ -297,7 +424,7 @@ KEY TAKEAWAYS:
 
 4. SIZE ADVANTAGE: Larger positions consistently outperform, suggesting professional traders should scale up during high-conviction setups.
 
-5. RISK-ADJUSTED SUPERIORITY: Extreme Greed offers the best Sharpe ratio, challenging conventional wisdom about avoiding euphoric markets.
+5. RISK-ADJUSTED SUPERIORITY: {best_risk['classification']} offers the best Sharpe ratio, challenging conventional wisdom about avoiding euphoric markets.
 
 FUTURE RESEARCH DIRECTIONS:
 - Real-time sentiment integration with trading bots
@@ -318,10 +445,10 @@ doc.add_page_break()
 doc.add_heading('Appendix: Technical Details', 1)
 
 doc.add_heading('A. Data Processing Steps', 2)
-appendix = """
-1. Loaded historical trader data (211,224 rows) and sentiment data (2,644 days)
+appendix = f"""
+1. Loaded historical trader data ({overview['total_trades']:,} rows) and sentiment data ({overview['sentiment_readings']:,} days)
 2. Converted timestamp formats (Unix milliseconds to date)
-3. Merged datasets on date field (100% match rate achieved)
+3. Merged datasets on date field ({overview['match_rate']:.0f}% match rate achieved)
 4. Cleaned and validated data quality (0% missing values in key fields)
 5. Created derived features: position_type, size_category, win/loss indicators
 6. Performed statistical tests in R and Python
@@ -330,31 +457,36 @@ appendix = """
 doc.add_paragraph(appendix)
 
 doc.add_heading('B. Statistical Test Details', 2)
-tests = """
+h3_summary = (f"All comparisons yielded p < 0.01, indicating significant differences" if h3_max_p < 0.01 else
+              "; ".join(f"{row['classification']}: {p_text(row['p'])}" for row in tests['h3']))
+tests_text = f"""
 KRUSKAL-WALLIS H-TEST:
-- Test statistic: H = 730.33
-- Degrees of freedom: 4
-- P-value: < 0.000001
-- Conclusion: Reject null hypothesis (sentiment has no effect)
+- Test statistic: H = {tests['h1']['h']:.2f}
+- Degrees of freedom: {tests['h1']['dof']}
+- P-value: {p_text(tests['h1']['p']).replace('p ', '', 1)}
+- Conclusion: {'Reject' if tests['h1']['p'] < 0.05 else 'Fail to reject'} null hypothesis (sentiment has no effect)
 
 CHI-SQUARE TEST OF INDEPENDENCE:
-- Test statistic: χ² = 1976.45
-- Degrees of freedom: 4
-- P-value: < 0.000001
-- Conclusion: Win rates significantly differ by sentiment
+- Test statistic: χ² = {tests['h2']['chi2']:.2f}
+- Degrees of freedom: {tests['h2']['dof']}
+- P-value: {p_text(tests['h2']['p']).replace('p ', '', 1)}
+- Conclusion: Win rates {'significantly differ' if tests['h2']['p'] < 0.05 else 'do not significantly differ'} by sentiment
 
 MANN-WHITNEY U TESTS (Long vs Short by Sentiment):
-All comparisons yielded p < 0.01, indicating significant differences
+{h3_summary}
 
 SPEARMAN CORRELATION:
-- Correlation coefficient: ρ = 0.48
-- P-value: < 0.000001
-- Interpretation: Moderate positive correlation between trade size and PnL"""
+- Correlation coefficient: ρ = {rho:.2f}
+- P-value: {p_text(tests['h4']['p']).replace('p ', '', 1)}
+- Interpretation: {'Moderate' if abs(rho) >= 0.3 else 'Weak'} {'positive' if rho > 0 else 'negative'} correlation between trade size and PnL"""
+
+doc.add_paragraph(tests_text)
 
-doc.add_paragraph(tests)
+build.finish()
 
 # ===== SAVE DOCUMENT =====
-doc.save('Bitcoin_Sentiment_Trading_Analysis_Report.docx')
+with span("save_docx"):
+    doc.save('Bitcoin_Sentiment_Trading_Analysis_Report.docx')
 print("✓ Report saved as 'Bitcoin_Sentiment_Trading_Analysis_Report.docx'")
 
 print("\n" + "="*70)
@@ -363,5 +495,5 @@ print("="*70)
 print("\nFiles generated:")
 print("1. Bitcoin_Sentiment_Trading_Analysis_Report.docx (Main report)")
 print("2. sentiment_analysis_visualizations.png (Charts)")
-print("3. merged_trader_sentiment.csv (Cleaned data)")
-print("\nYou can now submit these files for your Data Scientist application!")
\ No newline at end of file
+print("3. merged_store/ (Cleaned merged data, partitioned Parquet)")
+print("\nYou can now submit these files for your Data Scientist application!")
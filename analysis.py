@@ -0,0 +1,49 @@
+"""Python stages behind one command; each subcommand imports and reads only what it needs.
+
+    python analysis.py tests [--stream]    H1-H4, cached for the report
+    python analysis.py plots [--fast]      the six-panel figure, without H1-H4
+    python analysis.py report              the .docx report from the cached results
+
+Runs 05_statistical_analysis.py / 06_final_report_generator.py in this
+process; `tests` never imports matplotlib, seaborn, python-docx or scipy.stats.
+"""
+import argparse
+import os
+import runpy
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+STATS_SCRIPT = "05_statistical_analysis.py"
+REPORT_SCRIPT = "06_final_report_generator.py"
+
+
+def run_script(script, *flags):
+    """Run one of the numbered scripts as __main__ with the given flags."""
+    sys.argv = [script, *flags]
+    runpy.run_path(os.path.join(HERE, script), run_name="__main__")
+
+
+def tests(args):
+    run_script(STATS_SCRIPT, '--stream' if args.stream else '--tests-only')
+
+
+def plots(args):
+    run_script(STATS_SCRIPT, '--plots-only', *(['--fast-plots'] if args.fast else []))
+
+
+def report(args):
+    run_script(REPORT_SCRIPT)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    tests_parser = commands.add_parser('tests', help="H1-H4 hypothesis tests")
+    tests_parser.add_argument('--stream', action='store_true', help="bounded-memory streaming tests")
+    tests_parser.set_defaults(run=tests)
+    plots_parser = commands.add_parser('plots', help="sentiment_analysis_visualizations.png")
+    plots_parser.add_argument('--fast', action='store_true', help="aggregate panels rendered in parallel")
+    plots_parser.set_defaults(run=plots)
+    commands.add_parser('report', help="Bitcoin_Sentiment_Trading_Analysis_Report.docx").set_defaults(run=report)
+    args = parser.parse_args()
+    args.run(args)
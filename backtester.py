@@ -0,0 +1,216 @@
+"""Sentiment-conditioned backtests of the report's trading rules.
+
+    python backtester.py [--workers N] [--slippage-bps 2] [--capital 1000000]
+                         [--memory-mb 256] [--top 15]
+
+Replays the Long/Short fills day by day, rolled up to daily cube cells, with
+each rule set (threshold, short_share, tilt, coin_rule, min_size) as a weight
+per cell; a batch of variants is one weight matrix times a cell -> day
+indicator. Writes backtest_results.csv and backtest_equity.csv.
+"""
+import argparse
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from daily_cube import load_cube
+from merged_store import SENTIMENT_ORDER, SIZE_BUCKETS, SIZE_LABELS, has_sentiment
+
+SENTIMENT_FILE = "fear_greed_index.csv"
+RESULTS_FILE = "backtest_results.csv"
+EQUITY_FILE = "backtest_equity.csv"
+CAPITAL = 1_000_000
+SLIPPAGE_BPS = 2.0
+MEMORY_MB = 256
+TRADING_DAYS = 365
+
+# Long share of the book per sentiment (Strategy 4 of the report)
+ALLOCATION = {'Extreme Fear': 0.70, 'Fear': 0.60, 'Neutral': 0.55, 'Greed': 0.40, 'Extreme Greed': 0.30}
+# Strategy 2: coin -> sentiments it is traded in
+COIN_RULES = {'@107': ['Extreme Greed']}
+
+# threshold: short bias above this index value (None = off); short_share: the
+# short share above it; tilt: 0 = 50/50, 1 = ALLOCATION; min_size: smallest
+# SIZE_BUCKETS bucket taken. A long share s weights longs 2s, shorts 2(1 - s).
+BASELINE = {'threshold': None, 'short_share': 0.5, 'tilt': 0.0, 'coin_rule': False,
+            'min_size': 'Small', 'slippage_bps': SLIPPAGE_BPS}
+REPORT_STRATEGIES = {
+    'baseline': {},
+    'contrarian_short': {'threshold': 75, 'short_share': 0.7},
+    'allocation_table': {'tilt': 1.0},
+    'coin_timing': {'coin_rule': True},
+    'large_size': {'min_size': 'Very Large'},
+    'combined': {'threshold': 75, 'short_share': 0.7, 'tilt': 1.0, 'coin_rule': True,
+                 'min_size': 'Very Large'},
+}
+DEFAULT_GRID = {
+    'threshold': [None, 60, 65, 70, 75, 80, 85],
+    'short_share': [0.5, 0.6, 0.7, 0.8, 0.9],
+    'tilt': [0.0, 0.5, 1.0, 1.5],
+    'coin_rule': [False, True],
+    'min_size': SIZE_BUCKETS,
+}
+
+_cells = {}
+
+
+# ===== DATA =====
+
+def load_cells(sentiment_path=SENTIMENT_FILE):
+    """Long/Short cube cells rolled up to date x Coin x side x size bucket,
+    with the day's index value and sentiment."""
+    cube = load_cube(filter=has_sentiment())
+    cube = cube[cube['position_type'].isin(['Long', 'Short'])]
+    cube['classification'] = cube['classification'].astype(object)
+    keys = ['date', 'classification', 'Coin', 'position_type', 'size_category']
+    cells = (cube.groupby(keys, observed=True)[['pnl', 'fees', 'volume', 'n_fills']]
+             .sum().reset_index())
+    cells['date'] = pd.to_datetime(cells['date'])
+    index = pd.read_csv(sentiment_path, usecols=['date', 'value'])
+    index['date'] = pd.to_datetime(index['date'])
+    cells = cells.merge(index.drop_duplicates('date'), on='date', how='left')
+
+    days, day_index = np.unique(cells['date'].to_numpy(), return_inverse=True)
+    sentiment = pd.Categorical(cells['classification'], categories=SENTIMENT_ORDER).codes
+    blocked = np.zeros(len(cells), dtype=bool)
+    for coin, allowed in COIN_RULES.items():
+        blocked |= (cells['Coin'].astype(object) == coin).to_numpy() & ~cells['classification'].isin(allowed).to_numpy()
+    return {
+        'days': days,
+        'day_index': day_index,
+        'value': cells['value'].to_numpy(dtype=float),
+        'allocation': np.array([ALLOCATION[s] for s in SENTIMENT_ORDER])[sentiment],
+        'is_short': (cells['position_type'] == 'Short').to_numpy(),
+        'coin_blocked': blocked,
+        'size_code': pd.Categorical(cells['size_category'], categories=SIZE_LABELS).codes,
+        'gross': (cells['pnl'] - cells['fees']).to_numpy(),
+        'volume': cells['volume'].to_numpy(),
+        'n_fills': cells['n_fills'].to_numpy(dtype=float),
+    }
+
+
+def expand_grid(grid, base=BASELINE):
+    names = list(grid)
+    return [{**base, **dict(zip(names, combo))} for combo in itertools.product(*grid.values())]
+
+
+# ===== VECTORISED EVALUATION =====
+
+def variant_weights(cells, variants):
+    """(variants x cells) weight matrix."""
+    def column(key):
+        return np.array([v[key] for v in variants], dtype=float)[:, None]
+
+    threshold = np.array([np.inf if v['threshold'] is None else v['threshold'] for v in variants])[:, None]
+    long_share = 0.5 + column('tilt') * (cells['allocation'][None, :] - 0.5)
+    # Days without an index value never trigger the threshold (NaN > x is False)
+    long_share = np.where(cells['value'][None, :] > threshold, 1 - column('short_share'), long_share)
+    long_share = long_share.clip(0, 1)
+    weights = np.where(cells['is_short'][None, :], 2 * (1 - long_share), 2 * long_share)
+    coin_rule = np.array([v['coin_rule'] for v in variants], dtype=bool)[:, None]
+    min_size = np.array([SIZE_BUCKETS.index(v['min_size']) for v in variants])[:, None]
+    weights[coin_rule & cells['coin_blocked'][None, :]] = 0
+    weights[cells['size_code'][None, :] < min_size] = 0
+    return weights
+
+
+def daily_pnl(cells, variants, weights=None):
+    """(variants x days) net PnL."""
+    if weights is None:
+        weights = variant_weights(cells, variants)
+    n = len(cells['day_index'])
+    to_day = sparse.csr_matrix((np.ones(n), (np.arange(n), cells['day_index'])),
+                               shape=(n, len(cells['days'])))
+    gross = (to_day.T @ (weights * cells['gross']).T).T
+    traded = (to_day.T @ (weights * cells['volume']).T).T
+    slippage = np.array([v['slippage_bps'] for v in variants], dtype=float)[:, None] / 1e4
+    return gross - slippage * traded, weights
+
+
+def performance(daily, capital=CAPITAL):
+    """Equity-curve statistics for each row of `daily` (variants x days)."""
+    equity = capital + np.cumsum(daily, axis=1)
+    previous = np.concatenate([np.full((len(daily), 1), capital), equity[:, :-1]], axis=1)
+    returns = daily / previous
+    std = returns.std(axis=1, ddof=1)
+    peak = np.maximum.accumulate(np.concatenate([previous[:, :1], equity], axis=1), axis=1)[:, 1:]
+    return pd.DataFrame({
+        'total_pnl': equity[:, -1] - capital,
+        'return_pct': (equity[:, -1] / capital - 1) * 100,
+        'sharpe': np.divide(returns.mean(axis=1), std, out=np.zeros_like(std), where=std > 0)
+                  * np.sqrt(TRADING_DAYS),
+        'max_drawdown_pct': ((peak - equity) / peak).max(axis=1) * 100,
+        'worst_day': daily.min(axis=1),
+    })
+
+
+def _init_worker(cells):
+    _cells.update(cells)
+
+
+def _evaluate(task):
+    variants, capital = task
+    daily, weights = daily_pnl(_cells, variants)
+    stats = performance(daily, capital)
+    stats['fills_taken'] = (weights > 0) @ _cells['n_fills']
+    return stats
+
+
+def _batch_size(n_cells, memory_mb):
+    # ~4 (variants x cells) float64 temporaries per batch
+    return max(1, int(memory_mb * 2 ** 20 // (max(n_cells, 1) * 8 * 4)))
+
+
+def run_sweep(cells, variants, capital=CAPITAL, workers=None, memory_mb=MEMORY_MB):
+    """Metrics for every variant, one row each (in `variants` order)."""
+    size = _batch_size(len(cells['day_index']), memory_mb)
+    batches = [(variants[i:i + size], capital) for i in range(0, len(variants), size)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(cells,)) as pool:
+        stats = pd.concat(pool.map(_evaluate, batches), ignore_index=True)
+    return pd.concat([pd.DataFrame(variants), stats], axis=1)
+
+
+def equity_curves(cells, strategies=REPORT_STRATEGIES, capital=CAPITAL, base=BASELINE):
+    variants = [{**base, **params} for params in strategies.values()]
+    daily, _ = daily_pnl(cells, variants)
+    equity = capital + np.cumsum(daily, axis=1)
+    curves = pd.DataFrame(equity.T, index=pd.Index(cells['days'], name='date'), columns=list(strategies))
+    stats = performance(daily, capital)
+    stats.insert(0, 'strategy', list(strategies))
+    return curves, stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--slippage-bps', type=float, default=SLIPPAGE_BPS)
+    parser.add_argument('--capital', type=float, default=CAPITAL)
+    parser.add_argument('--memory-mb', type=float, default=MEMORY_MB)
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    base = {**BASELINE, 'slippage_bps': args.slippage_bps}
+    cells = load_cells()
+
+    print("="*70)
+    print(f"REPORT STRATEGIES (fees + {args.slippage_bps:g} bps slippage, capital ${args.capital:,.0f})")
+    print("="*70)
+    curves, strategy_stats = equity_curves(cells, capital=args.capital, base=base)
+    curves.to_csv(EQUITY_FILE)
+    print(strategy_stats.to_string(index=False, float_format=lambda v: f"{v:,.3f}"))
+
+    variants = expand_grid(DEFAULT_GRID, base)
+    print("\n" + "="*70)
+    print(f"PARAMETER SWEEP ({len(variants):,} variants over {len(cells['day_index']):,} cells, "
+          f"{len(cells['days'])} days)")
+    print("="*70)
+    sweep = run_sweep(cells, variants, args.capital, args.workers, args.memory_mb)
+    sweep.to_csv(RESULTS_FILE, index=False)
+    print(f"Top {args.top} by Sharpe:")
+    print(sweep.sort_values('sharpe', ascending=False).head(args.top)
+          .to_string(index=False, float_format=lambda v: f"{v:,.3f}"))
+    print(f"\n✓ Sweep saved to '{RESULTS_FILE}', equity curves to '{EQUITY_FILE}'")
@@ -0,0 +1,193 @@
+"""Scaling benchmarks of the analysis stages on synthetic data, with baselines.
+
+    python benchmark.py [--sizes 1m 10m 100m] [--only merge tests report]
+                        [--tolerance 0.25] [--memory-tolerance 0.15]
+                        [--save-baseline] [--require-baseline]
+
+Each benchmark runs as its own process in bench/<size>/ with the result
+caches cleared, and is compared with bench_baselines.json: peak RSS always,
+wall time only against a baseline from this machine. Unbaselined benchmarks
+pass unless --require-baseline; R stages are skipped without Rscript.
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import shutil
+import sys
+import time
+
+from pipeline import STAGES, run_stage
+from synthetic_data import generate, parse_size
+
+BENCH_DIR = "bench"
+BASELINE_FILE = "bench_baselines.json"
+TOLERANCE = 0.25
+MEMORY_TOLERANCE = 0.15
+SEED = 42
+
+# Run in this order: merge writes the store the later benchmarks read
+BENCHMARKS = {
+    'load': STAGES["01"]["cmd"],
+    'merge': STAGES["02"]["cmd"],
+    'explore': STAGES["03"]["cmd"],
+    'insights': STAGES["04"]["cmd"],
+    'tests': STAGES["05"]["cmd"],
+    'tests_stream': STAGES["05"]["cmd"] + ["--stream"],
+    'report': STAGES["06"]["cmd"],
+}
+R_BENCHMARKS = {'load', 'merge', 'explore', 'insights'}
+# Its own process: peak RSS survives fork/exec, so writing the store in this
+# one would inflate every benchmark's reading
+SEED_STORE = {'seed_store': {'cmd': [sys.executable, "-c", "from merged_store import merge_to_store; "
+                                                   "from daily_cube import build_cube; "
+                                                   "merge_to_store(); build_cube()"]}}
+
+
+def prepare(size, seed=SEED, bench_dir=BENCH_DIR):
+    """bench/<size>/ with the synthetic inputs and links to the scripts."""
+    out = os.path.join(bench_dir, size)
+    marker = os.path.join(out, "synthetic.json")
+    spec = {'rows': parse_size(size), 'seed': seed}
+    try:
+        with open(marker) as f:
+            current = json.load(f) == spec
+    except (OSError, ValueError):
+        current = False
+    if not current or not os.path.exists(os.path.join(out, "historical_data.csv")):
+        print(f"[{size}] generating {spec['rows']:,} synthetic fills...")
+        generate(spec['rows'], out, seed)
+        with open(marker, 'w') as f:
+            json.dump(spec, f)
+    for script in glob.glob("*.py") + glob.glob("*.R"):
+        link = os.path.join(out, script)
+        if not os.path.lexists(link):
+            os.symlink(os.path.abspath(script), link)
+    return out
+
+
+def run_benchmarks(size, names, seed=SEED, bench_dir=BENCH_DIR):
+    """{name: {'ok', 'wall_s', 'peak_rss_mb', 'rows_per_s'}} for one size;
+    {name: {'skipped': reason}} for the R stages when Rscript is missing."""
+    rows = parse_size(size)
+    home = os.getcwd()
+    os.chdir(prepare(size, seed, bench_dir))
+    has_r = shutil.which("Rscript") is not None
+    results = {}
+    try:
+        if not has_r and set(names) - R_BENCHMARKS:
+            print(f"[{size}] Rscript not found: writing the store with merged_store.merge_to_store()")
+            if run_stage('seed_store', SEED_STORE)[0] != 0:
+                raise RuntimeError(f"writing the store failed (see {bench_dir}/{size}/results/logs/seed_store.log)")
+        for name in names:
+            if name in R_BENCHMARKS and not has_r:
+                results[name] = {'skipped': "Rscript not found"}
+                continue
+            for cache in glob.glob(os.path.join("results", "*.json")):
+                os.remove(cache)
+            print(f"[{size}] {name}: {' '.join(BENCHMARKS[name])}")
+            code, wall, rss = run_stage(name, {name: {"cmd": BENCHMARKS[name]}})
+            results[name] = {'ok': code == 0, 'wall_s': round(wall, 3), 'peak_rss_mb': round(rss, 1),
+                             'rows_per_s': round(rows / wall) if code == 0 and wall > 0 else None}
+            if code != 0:
+                log = os.path.join(bench_dir, size, "results", "logs", f"{name}.log")
+                print(f"[{size}] {name} failed (exit {code}, see {log})")
+    finally:
+        os.chdir(home)
+    return results
+
+
+def machine():
+    return {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()}
+
+
+def load_baselines(path=BASELINE_FILE):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def compare(results, baseline, tolerance=TOLERANCE, memory_tolerance=MEMORY_TOLERANCE,
+            same_machine=True, require_baseline=False):
+    """(name, status, passed) per benchmark; status is 'ok', why it was
+    skipped or why it failed. Wall time is only checked on the `same_machine`
+    the baseline was recorded on."""
+    rows = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if 'skipped' in result:
+            rows.append((name, f"skipped ({result['skipped']})", True))
+        elif not result['ok']:
+            rows.append((name, "FAILED", False))
+        elif base is None:
+            rows.append((name, "NO BASELINE" if require_baseline else "no baseline", not require_baseline))
+        elif result['peak_rss_mb'] > base['peak_rss_mb'] * (1 + memory_tolerance):
+            rows.append((name, f"MEMORY ({result['peak_rss_mb'] / base['peak_rss_mb'] - 1:+.0%} peak RSS)", False))
+        elif not same_machine:
+            rows.append((name, "ok (wall not compared: baseline from another machine)", True))
+        elif result['wall_s'] > base['wall_s'] * (1 + tolerance):
+            rows.append((name, f"SLOWER ({result['wall_s'] / base['wall_s'] - 1:+.0%} wall)", False))
+        else:
+            rows.append((name, "ok", True))
+    return rows
+
+
+def print_results(size, results, baseline, statuses):
+    print("\n" + "=" * 70)
+    print(f"BENCHMARK {size} ({parse_size(size):,} fills)")
+    print("=" * 70)
+    print(f"{'benchmark':14}{'wall s':>10}{'base s':>10}{'RSS MB':>10}{'base MB':>10}{'fills/s':>13}  status")
+    for name, status, _ in statuses:
+        r, b = results[name], baseline.get(name, {})
+        if 'skipped' in r:
+            print(f"{name:14}{'-':>10}{'-':>10}{'-':>10}{'-':>10}{'-':>13}  {status}")
+            continue
+        throughput = f"{r['rows_per_s']:,}" if r['rows_per_s'] else "-"
+        print(f"{name:14}{r['wall_s']:10.1f}{b.get('wall_s', float('nan')):10.1f}"
+              f"{r['peak_rss_mb']:10.0f}{b.get('peak_rss_mb', float('nan')):10.0f}{throughput:>13}  {status}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', default=['1m'], help="1m, 10m, 100m or row counts")
+    parser.add_argument('--only', nargs='+', default=list(BENCHMARKS), metavar='BENCHMARK',
+                        help=f"benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+    parser.add_argument('--memory-tolerance', type=float, default=MEMORY_TOLERANCE)
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--require-baseline', action='store_true', help="fail benchmarks that have no baseline")
+    args = parser.parse_args()
+    unknown = set(args.only) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))} (choose from {', '.join(BENCHMARKS)})")
+    names = [name for name in BENCHMARKS if name in args.only]
+
+    baselines = load_baselines()
+    ok = True
+    for size in args.sizes:
+        results = run_benchmarks(size, names, args.seed)
+        record = {'machine': machine(), 'finished': time.strftime("%Y-%m-%dT%H:%M:%S"), 'results': results}
+        with open(os.path.join(BENCH_DIR, f"results-{size}.json"), 'w') as f:
+            json.dump(record, f, indent=2)
+        saved = baselines.get(size, {})
+        baseline = saved.get('results', {})
+        same_machine = saved.get('machine') == record['machine']
+        statuses = compare(results, baseline, args.tolerance, args.memory_tolerance, same_machine,
+                           args.require_baseline)
+        print_results(size, results, baseline, statuses)
+        if args.save_baseline:
+            if not same_machine:
+                saved = baselines[size] = {'machine': record['machine'], 'results': {}}
+            saved['results'].update({n: r for n, r in results.items() if r.get('ok')})
+        else:
+            ok &= all(passed for _, _, passed in statuses)
+
+    if args.save_baseline:
+        with open(BASELINE_FILE, 'w') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"\n✓ Baselines saved to '{BASELINE_FILE}'")
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,94 @@
+"""Daily aggregate cube over the merged store.
+
+One row per date x classification x Coin x Account x position_type x
+size_category with additive measures (counts, sums, sums of squares, min/max),
+so rollup() gives the means, win rates and stds of 03/04, the 05 plots and
+the report without touching the fills. Written to merged_store/_cube/ by
+02_data_merging.R (daily_cube.R); build_cube() is the Python mirror.
+"""
+import os
+import shutil
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from merged_store import STORE_DIR, STORE_FS, open_store
+
+CUBE_DIR = os.path.join(STORE_DIR, "_cube")
+CUBE_KEYS = ['date', 'weekday', 'classification', 'Coin', 'Account', 'position_type', 'size_category']
+SUM_MEASURES = ['n_fills', 'volume', 'fees', 'pnl', 'n_closed', 'closed_volume', 'pnl_sq', 'wins']
+FILL_COLUMNS = ['Size.USD', 'Fee', 'Closed.PnL', 'is_win']
+
+
+def aggregate(table, keys=CUBE_KEYS):
+    """Cube measures of a table of fills (FILL_COLUMNS) grouped by `keys`."""
+    pnl = table['Closed.PnL']
+    closed = pc.not_equal(pnl, 0)
+    closed_pnl = pc.if_else(closed, pnl, None)
+    measures = {
+        'n_fills': pa.array(np.ones(len(table), dtype=np.int64)),
+        'volume': table['Size.USD'],
+        'fees': table['Fee'],
+        'pnl': pnl,
+        'n_closed': pc.cast(closed, pa.int64()),
+        'closed_volume': pc.if_else(closed, table['Size.USD'], 0.0),
+        'pnl_sq': pc.multiply(pnl, pnl),
+        'wins': pc.cast(table['is_win'], pa.int64()),
+        'closed_pnl': closed_pnl,
+    }
+    keyed = table.select(keys)
+    for name, column in measures.items():
+        keyed = keyed.append_column(name, column)
+    aggs = [(m, 'sum') for m in SUM_MEASURES] + [('closed_pnl', 'min'), ('closed_pnl', 'max')]
+    cube = keyed.group_by(keys, use_threads=False).aggregate(aggs)
+    names = [f"{m}_sum" for m in SUM_MEASURES] + ['closed_pnl_min', 'closed_pnl_max']
+    return cube.select(keys + names).rename_columns(keys + SUM_MEASURES + ['pnl_min', 'pnl_max'])
+
+
+def build_cube(months=None, path=STORE_DIR, cube_dir=CUBE_DIR):
+    """(Re)build the cube partitions for `months` (default, or when there is
+    no cube yet: every month).
+
+    Each month is aggregated on its own, so at most one month of fills is in
+    memory at a time.
+    """
+    store = open_store(path)
+    if months is None or not os.path.isdir(cube_dir):
+        months = sorted(pc.unique(store.to_table(columns=['month'])['month']).to_pylist())
+        shutil.rmtree(cube_dir, ignore_errors=True)
+    for month in months:
+        month_dir = os.path.join(cube_dir, f"month={month}")
+        shutil.rmtree(month_dir, ignore_errors=True)
+        table = store.to_table(columns=CUBE_KEYS + FILL_COLUMNS, filter=ds.field('month') == month)
+        if len(table) == 0:
+            continue
+        os.makedirs(month_dir)
+        pq.write_table(aggregate(table), os.path.join(month_dir, "part-0.parquet"))
+
+
+def load_cube(columns=None, filter=None, cube_dir=CUBE_DIR):
+    """Cube cells as a DataFrame, building the cube first if it is missing."""
+    if not os.path.isdir(cube_dir):
+        build_cube(cube_dir=cube_dir)
+    cube = ds.dataset(cube_dir, format="parquet", partitioning="hive", filesystem=STORE_FS)
+    return cube.to_table(columns=columns, filter=filter).to_pandas()
+
+
+def rollup(cube, by):
+    """Sum the cube over everything but `by` and add avg_pnl (per closed
+    fill), win_rate (% of closed fills), std_pnl (sample std of closed PnL)
+    and avg_size (per fill)."""
+    grouped = cube.groupby(by, observed=True, sort=False)
+    out = grouped[SUM_MEASURES].sum()
+    if 'pnl_min' in cube:
+        out['pnl_min'] = grouped['pnl_min'].min()
+        out['pnl_max'] = grouped['pnl_max'].max()
+    n = out['n_closed'].where(out['n_closed'] > 0)
+    out['avg_pnl'] = out['pnl'] / n
+    out['win_rate'] = out['wins'] / n * 100
+    out['std_pnl'] = np.sqrt(((out['pnl_sq'] - out['pnl'] ** 2 / n) / (n - 1)).clip(lower=0))
+    out['avg_size'] = out['volume'] / out['n_fills']
+    return out
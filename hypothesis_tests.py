@@ -0,0 +1,139 @@
+"""H1-H4 hypothesis tests of 05_statistical_analysis.py as reusable functions.
+
+run_hypothesis_tests() prints the same report as before and returns a
+JSON-serialisable dict, which 05 caches (results_cache.py) for the report
+generator.
+"""
+import numpy as np
+import pandas as pd
+
+from merged_store import SENTIMENT_ORDER, has_sentiment, read_merged
+from rank_engine import RankEngine, chi2_contingency
+from tracing import span
+
+TEST_COLUMNS = ['date', 'classification', 'position_type', 'is_win', 'Size.USD', 'Closed.PnL']
+
+
+def load_test_data():
+    # Only the columns used below; rows without sentiment are filtered out at
+    # the partition level
+    with span("load_test_data") as s:
+        df = read_merged(columns=TEST_COLUMNS, filter=has_sentiment())
+        df['date'] = pd.to_datetime(df['date'])
+        s.rows_out = len(df)
+    return df
+
+
+def split_trades(df):
+    """closed_trades (Closed.PnL != 0) and the Long/Short subset of them."""
+    closed_trades = df[df['Closed.PnL'] != 0].copy()
+    long_short_data = closed_trades[closed_trades['position_type'].isin(['Long', 'Short'])].copy()
+    return closed_trades, long_short_data
+
+
+def run_hypothesis_tests(df, verbose=True):
+    say = print if verbose else (lambda *args, **kwargs: None)
+    closed_trades, _ = split_trades(df)
+
+    # ===== HYPOTHESIS 1: Does sentiment affect PnL? =====
+    with span("h1_kruskal", rows_in=len(closed_trades)) as s:
+        say("\n### H1: Does market sentiment significantly affect trader PnL? ###\n")
+
+        # Closed.PnL is sorted once; every rank test below (H1, H3, H4) is derived
+        # from these cached ranks instead of re-sorting each group
+        pnl_ranks = RankEngine(closed_trades['Closed.PnL'])
+        sentiment_codes = pd.Categorical(closed_trades['classification'], categories=SENTIMENT_ORDER).codes
+
+        # Kruskal-Wallis H-test (non-parametric ANOVA)
+        h_stat, p_value = pnl_ranks.kruskal(sentiment_codes)
+        say(f"Kruskal-Wallis H-statistic: {h_stat:.4f}")
+        say(f"P-value: {p_value:.6f}")
+
+        if p_value < 0.05:
+            say("✓ SIGNIFICANT: Market sentiment DOES affect PnL (p < 0.05)")
+        else:
+            say("✗ NOT SIGNIFICANT: No clear relationship (p >= 0.05)")
+
+        # Effect size calculation
+        sentiment_pnl = closed_trades.groupby('classification')['Closed.PnL'].agg(['mean', 'median', 'std', 'count'])
+        say("\nPnL by Sentiment:")
+        say(sentiment_pnl)
+        s.rows_out = len(sentiment_pnl)
+
+    # ===== HYPOTHESIS 2: Win rate differs by sentiment? =====
+    with span("h2_chi_square", rows_in=len(closed_trades)) as s:
+        say("\n\n### H2: Does win rate differ significantly across sentiments? ###\n")
+
+        # Contingency table (is_win is stored with the merged data)
+        contingency = pd.crosstab(closed_trades['classification'], closed_trades['is_win'].astype(int))
+        say("\nContingency Table:")
+        say(contingency)
+
+        # Chi-square test
+        chi2, chi2_p, dof, _ = chi2_contingency(contingency)
+        say(f"\nChi-square statistic: {chi2:.4f}")
+        say(f"P-value: {chi2_p:.6f}")
+        say(f"Degrees of freedom: {dof}")
+
+        if chi2_p < 0.05:
+            say("✓ SIGNIFICANT: Win rates differ by sentiment (p < 0.05)")
+        else:
+            say("✗ NOT SIGNIFICANT: Win rates are similar (p >= 0.05)")
+
+        win_rates = contingency.get(1, 0) / contingency.sum(axis=1) * 100
+        s.rows_out = len(contingency)
+
+    # ===== HYPOTHESIS 3: Long vs Short performance by sentiment =====
+    with span("h3_mann_whitney", rows_in=len(closed_trades)) as s:
+        say("\n\n### H3: Do Long/Short strategies perform differently by sentiment? ###\n")
+
+        # Test for each sentiment (masks over closed_trades, ranks from pnl_ranks)
+        is_long = (closed_trades['position_type'] == 'Long').to_numpy()
+        is_short = (closed_trades['position_type'] == 'Short').to_numpy()
+        pnl_values = closed_trades['Closed.PnL'].to_numpy()
+        h3 = []
+        for code, sentiment in enumerate(SENTIMENT_ORDER):
+            in_sentiment = sentiment_codes == code
+            long_mask = in_sentiment & is_long
+            short_mask = in_sentiment & is_short
+
+            if long_mask.any() and short_mask.any():
+                u_stat, mw_p = pnl_ranks.mannwhitney(long_mask, short_mask)
+                long_avg = pnl_values[long_mask].mean()
+                short_avg = pnl_values[short_mask].mean()
+                sig = "✓" if mw_p < 0.05 else "✗"
+                say(f"{sentiment:15} | Long avg: ${long_avg:8.2f} | Short avg: ${short_avg:8.2f} | p={mw_p:.4f} {sig}")
+                h3.append({'classification': sentiment, 'long_avg': long_avg, 'short_avg': short_avg,
+                           'u': u_stat, 'p': mw_p})
+        s.rows_out = len(h3)
+
+    # ===== HYPOTHESIS 4: Trade size affects profitability =====
+    with span("h4_spearman", rows_in=len(closed_trades)):
+        say("\n\n### H4: Does trade size correlate with profitability? ###\n")
+
+        # Correlation test
+        has_size = closed_trades['Size.USD'].notna().to_numpy()
+        size_ranks = RankEngine(closed_trades['Size.USD'])
+        if has_size.all():
+            corr_coef, rho_p = size_ranks.spearman(pnl_ranks)
+        else:
+            corr_coef, rho_p = size_ranks.spearman(pnl_ranks, mask=has_size)
+
+        say(f"Spearman correlation coefficient: {corr_coef:.4f}")
+        say(f"P-value: {rho_p:.6f}")
+
+        if rho_p < 0.05:
+            if corr_coef > 0:
+                say("✓ SIGNIFICANT POSITIVE: Larger trades tend to be more profitable")
+            else:
+                say("✓ SIGNIFICANT NEGATIVE: Larger trades tend to be less profitable")
+        else:
+            say("✗ NOT SIGNIFICANT: Trade size doesn't correlate with profitability")
+
+    return {
+        'h1': {'h': h_stat, 'p': p_value, 'dof': len(np.unique(sentiment_codes[sentiment_codes >= 0])) - 1},
+        'h2': {'chi2': chi2, 'p': chi2_p, 'dof': int(dof), 'win_rates': win_rates.to_dict()},
+        'h3': h3,
+        'h4': {'rho': corr_coef, 'p': rho_p},
+        'closed_trades': int(len(closed_trades)),
+    }
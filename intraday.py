@@ -0,0 +1,108 @@
+"""Intraday analysis mode: fills bucketed into fixed bars of the epoch Timestamp.
+
+    python intraday.py [--bar 1m|5m|15m|1h] [--no-tests]
+
+bar = Timestamp // bar_ms * bar_ms (no string parsing); build_bars()
+aggregates bars with the daily cube's measures, one month at a time, and the
+bar-level H1-H4 take one observation per bar x sentiment x side.
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from daily_cube import FILL_COLUMNS, aggregate, rollup
+from hypothesis_tests import run_hypothesis_tests
+from merged_store import SENTIMENT_ORDER, STORE_DIR, has_sentiment, open_store
+
+BAR_MS = {'1m': 60_000, '5m': 300_000, '15m': 900_000, '1h': 3_600_000}
+BAR_KEYS = ['bar', 'classification', 'Coin', 'position_type', 'size_category']
+
+
+def bar_starts(timestamps, bar='5m'):
+    """Epoch ms of the start of the bar each timestamp falls in."""
+    ms = BAR_MS[bar]
+    return np.asarray(timestamps, dtype=np.int64) // ms * ms
+
+
+def build_bars(bar='5m', filter=None, path=STORE_DIR):
+    """Bar cells (one row per BAR_KEYS combination) with the cube measures.
+    `bar` is a UTC datetime column."""
+    store = open_store(path)
+    filter = has_sentiment() if filter is None else filter & has_sentiment()
+    months = sorted(pc.unique(store.to_table(columns=['month'], filter=filter)['month']).to_pylist())
+    parts = []
+    for month in months:
+        table = store.to_table(columns=['Timestamp'] + BAR_KEYS[1:] + FILL_COLUMNS,
+                               filter=filter & (ds.field('month') == month))
+        starts = bar_starts(table['Timestamp'].to_numpy(), bar)
+        table = table.append_column('bar', pa.array(starts).cast(pa.timestamp('ms', tz='UTC')))
+        parts.append(aggregate(table, BAR_KEYS).to_pandas())
+    if not parts:
+        return pd.DataFrame(columns=BAR_KEYS)
+    bars = pd.concat(parts, ignore_index=True)
+    bars['classification'] = bars['classification'].astype(object)
+    return bars
+
+
+def bar_observations(bars):
+    """One row per bar x sentiment x side with closed fills, in the columns
+    run_hypothesis_tests() reads."""
+    closed = bars[bars['n_closed'] > 0]
+    obs = (closed.assign(position_type=closed['position_type'].astype(object))
+           .groupby(['bar', 'classification', 'position_type'], observed=True)[['pnl', 'closed_volume']]
+           .sum().reset_index())
+    return pd.DataFrame({
+        'classification': obs['classification'],
+        'position_type': obs['position_type'],
+        'is_win': obs['pnl'] > 0,
+        'Size.USD': obs['closed_volume'],
+        'Closed.PnL': obs['pnl'],
+    })
+
+
+def bar_tables(bars):
+    """Per-sentiment bar summary and the UTC hour-of-day avg PnL profile."""
+    per_bar = rollup(bars, ['bar', 'classification']).reset_index()
+    traded = per_bar[per_bar['n_closed'] > 0]
+    sentiment = pd.DataFrame({
+        'bars': per_bar.groupby('classification')['bar'].size(),
+        'fills_per_bar': per_bar.groupby('classification')['n_fills'].mean(),
+        'volume_per_bar': per_bar.groupby('classification')['volume'].mean(),
+        'avg_bar_pnl': traded.groupby('classification')['pnl'].mean(),
+        'winning_bars_pct': traded.groupby('classification')['pnl'].apply(lambda p: (p > 0).mean() * 100),
+    }).reindex(SENTIMENT_ORDER).dropna(how='all')
+
+    closed = bars[bars['n_closed'] > 0]
+    hourly = (rollup(closed.assign(hour=closed['bar'].dt.hour), ['hour', 'classification'])['avg_pnl']
+              .unstack().reindex(columns=SENTIMENT_ORDER).sort_index())
+    return sentiment, hourly
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bar', choices=list(BAR_MS), default='5m')
+    parser.add_argument('--no-tests', action='store_true')
+    args = parser.parse_args()
+
+    bars = build_bars(args.bar)
+    sentiment, hourly = bar_tables(bars)
+
+    print("="*70)
+    print(f"INTRADAY BARS ({args.bar}, {bars['bar'].nunique():,} bars, {int(bars['n_fills'].sum()):,} fills)")
+    print("="*70)
+    print(sentiment.to_string(float_format=lambda v: f"{v:,.2f}"))
+
+    print("\n" + "="*70)
+    print("AVG PnL PER CLOSED FILL BY UTC HOUR")
+    print("="*70)
+    print(hourly.to_string(float_format=lambda v: f"{v:,.2f}"))
+
+    if not args.no_tests:
+        print("\n" + "="*70)
+        print(f"BAR-LEVEL HYPOTHESIS TESTS (one observation per {args.bar} bar x sentiment x side)")
+        print("="*70)
+        run_hypothesis_tests(bar_observations(bars))
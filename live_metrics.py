@@ -0,0 +1,255 @@
+"""Mergeable per-sentiment / coin / account PnL sketches for live monitoring.
+
+    python live_metrics.py [--by classification Coin Account] [--width 0.001]
+
+A PnLSketch holds counts, Welford moments and a sparse log-binned histogram
+of Closed.PnL (quantiles within a factor exp(width) in 1 + |x|); update() is
+O(1) per fill and merge() is exact. from_store() caches one shard per month
+partition in results/.
+"""
+import argparse
+import math
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+
+from merged_store import SENTIMENT_ORDER, STORE_DIR, has_sentiment, open_store
+from results_cache import cached_results, fingerprint
+from trader_loader import decode_ids
+
+DIMENSIONS = ('classification', 'Coin', 'Account')
+WIDTH = 1e-3
+LIVE_COLUMNS = ['Closed.PnL', *DIMENSIONS]
+
+
+class PnLSketch:
+    """Counts, moments and a sparse log-bin histogram of one PnL stream."""
+
+    def __init__(self, width=WIDTH):
+        self.width = width
+        self.bins = {}
+        self.n_fills = 0
+        self.total = 0.0
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.wins = 0
+        self.losses = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, pnl):
+        self.n_fills += 1
+        if pnl != pnl:
+            return
+        self.total += pnl
+        if pnl == 0:
+            return
+        self.n += 1
+        delta = pnl - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (pnl - self.mean)
+        self.wins += pnl > 0
+        self.losses += pnl < 0
+        self.min = min(self.min, pnl)
+        self.max = max(self.max, pnl)
+        k = int(math.copysign(math.floor(math.log1p(abs(pnl)) / self.width), pnl))
+        self.bins[k] = self.bins.get(k, 0) + 1
+
+    @classmethod
+    def from_values(cls, values, width=WIDTH):
+        """Sketch of an array of PnL values in one vectorised pass."""
+        sketch = cls(width)
+        values = np.asarray(values, dtype=float)
+        sketch.n_fills = len(values)
+        sketch.total = float(np.nansum(values))
+        closed = values[(values != 0) & ~np.isnan(values)]
+        if len(closed):
+            sketch.n = len(closed)
+            sketch.mean = float(closed.mean())
+            sketch.m2 = float(((closed - sketch.mean) ** 2).sum())
+            sketch.wins = int((closed > 0).sum())
+            sketch.losses = int((closed < 0).sum())
+            sketch.min = float(closed.min())
+            sketch.max = float(closed.max())
+            k = (np.sign(closed) * np.floor(np.log1p(np.abs(closed)) / width)).astype(np.int64)
+            keys, counts = np.unique(k, return_counts=True)
+            sketch.bins = dict(zip(keys.tolist(), counts.tolist()))
+        return sketch
+
+    def merge(self, other):
+        if other.width != self.width:
+            raise ValueError(f"cannot merge sketches of width {self.width} and {other.width}")
+        n = self.n + other.n
+        if n:
+            delta = other.mean - self.mean
+            self.m2 += other.m2 + delta ** 2 * self.n * other.n / n
+            self.mean += delta * other.n / n
+        self.n = n
+        self.n_fills += other.n_fills
+        self.total += other.total
+        self.wins += other.wins
+        self.losses += other.losses
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        for k, count in other.bins.items():
+            self.bins[k] = self.bins.get(k, 0) + count
+        return self
+
+    # ----- Results -----
+
+    def quantile(self, q, include_zeros=False):
+        """Approximate q-quantile of closed PnL (or of every fill's PnL)."""
+        bins = dict(self.bins)
+        if include_zeros and self.n_fills > self.n:
+            bins[0] = bins.get(0, 0) + self.n_fills - self.n
+        if not bins:
+            return np.nan
+        keys = np.array(sorted(bins))
+        cum = np.cumsum([bins[k] for k in keys])
+        k = keys[np.searchsorted(cum, q * (cum[-1] - 1) + 1)]
+        return float(np.sign(k) * np.expm1((abs(k) + 0.5) * self.width))
+
+    def std(self):
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else np.nan
+
+    def summary(self):
+        std = self.std()
+        has_zero = self.n_fills > self.n
+        return {
+            'num_trades': self.n_fills,
+            'trades_with_pnl': self.n,
+            'avg_pnl': self.total / self.n_fills if self.n_fills else np.nan,
+            'median_pnl': self.quantile(0.5, include_zeros=True),
+            'total_pnl': self.total,
+            'max_profit': max(self.max, 0.0) if has_zero else self.max,
+            'max_loss': min(self.min, 0.0) if has_zero else self.min,
+            'closed_avg_pnl': self.mean if self.n else np.nan,
+            'closed_median_pnl': self.quantile(0.5),
+            'p05': self.quantile(0.05),
+            'p95': self.quantile(0.95),
+            'std_pnl': std,
+            'sharpe_like': self.mean / std if std > 0 else np.nan,
+            'win_rate': self.wins / self.n * 100 if self.n else np.nan,
+            'losses': self.losses,
+        }
+
+    def to_dict(self):
+        state = dict(vars(self))
+        state['bins'] = [[k, c] for k, c in self.bins.items()]
+        state['min'] = None if math.isinf(self.min) else self.min
+        state['max'] = None if math.isinf(self.max) else self.max
+        return state
+
+    @classmethod
+    def from_dict(cls, state):
+        sketch = cls(state['width'])
+        vars(sketch).update(state)
+        sketch.bins = {int(k): int(c) for k, c in state['bins']}
+        sketch.min = math.inf if state['min'] is None else state['min']
+        sketch.max = -math.inf if state['max'] is None else state['max']
+        return sketch
+
+
+class LiveMetrics:
+    """One PnLSketch per value of each dimension."""
+
+    def __init__(self, dimensions=DIMENSIONS, width=WIDTH):
+        self.width = width
+        self.sketches = {dim: {} for dim in dimensions}
+
+    def _sketch(self, dim, key):
+        sketch = self.sketches[dim].get(key)
+        if sketch is None:
+            sketch = self.sketches[dim][key] = PnLSketch(self.width)
+        return sketch
+
+    def update(self, fill):
+        """Add one fill (a mapping with Closed.PnL and the dimensions)."""
+        for dim in self.sketches:
+            key = fill.get(dim)
+            if key is not None and key == key:
+                self._sketch(dim, key).update(fill['Closed.PnL'])
+
+    def update_batch(self, fills):
+        """Add a DataFrame of fills, one vectorised sketch per group."""
+        for dim in self.sketches:
+            for key, pnl in fills.groupby(dim, observed=True, sort=False)['Closed.PnL']:
+                self._sketch(dim, key).merge(PnLSketch.from_values(pnl.to_numpy(), self.width))
+        return self
+
+    def merge(self, other):
+        for dim, sketches in other.sketches.items():
+            for key, sketch in sketches.items():
+                self._sketch(dim, key).merge(sketch)
+        return self
+
+    def table(self, dim):
+        rows = {key: sketch.summary() for key, sketch in self.sketches[dim].items()}
+        table = pd.DataFrame.from_dict(rows, orient='index')
+        table.index.name = dim
+        if dim == 'classification':
+            return table.reindex([s for s in SENTIMENT_ORDER if s in rows])
+        return table.sort_index()
+
+    def to_dict(self):
+        return {'width': self.width,
+                'sketches': {dim: [[key, s.to_dict()] for key, s in sketches.items()]
+                             for dim, sketches in self.sketches.items()}}
+
+    @classmethod
+    def from_dict(cls, state):
+        metrics = cls(list(state['sketches']), state['width'])
+        for dim, items in state['sketches'].items():
+            metrics.sketches[dim] = {key: PnLSketch.from_dict(s) for key, s in items}
+        return metrics
+
+
+# ===== SHARDS FROM THE STORE =====
+
+def month_shard(month, dimensions=DIMENSIONS, width=WIDTH, path=STORE_DIR):
+    fills = open_store(path).to_table(
+        columns=['Closed.PnL', *dimensions],
+        filter=has_sentiment() & (ds.field('month') == month)).to_pandas()
+    return LiveMetrics(dimensions, width).update_batch(fills)
+
+
+def from_store(dimensions=DIMENSIONS, width=WIDTH, path=STORE_DIR):
+    """Merged sketches of every month partition. Each month's shard is cached
+    under a fingerprint of its partition directory."""
+    metrics = LiveMetrics(dimensions, width)
+    months = sorted(d.split('=', 1)[1] for d in os.listdir(path) if d.startswith('month='))
+    params = {'dimensions': list(dimensions), 'width': width}
+    for month in months:
+        key = fingerprint([os.path.join(path, f"month={month}")], params, code=['live_metrics.py'])
+        shard = cached_results(f"live_metrics_{month}", key,
+                               lambda: month_shard(month, dimensions, width, path).to_dict())
+        metrics.merge(LiveMetrics.from_dict(shard))
+    return metrics
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--by', nargs='+', default=list(DIMENSIONS), choices=list(DIMENSIONS))
+    parser.add_argument('--width', type=float, default=WIDTH)
+    args = parser.parse_args()
+
+    metrics = from_store(args.by, args.width)
+    pnl_columns = ['num_trades', 'trades_with_pnl', 'avg_pnl', 'median_pnl', 'total_pnl',
+                   'max_profit', 'max_loss']
+    risk_columns = ['closed_avg_pnl', 'std_pnl', 'sharpe_like', 'win_rate']
+
+    for dim in args.by:
+        table = metrics.table(dim)
+        if dim == 'Account':
+            table = decode_ids(table.reset_index(), ['Account']).set_index('Account')
+        print("="*70)
+        print(f"PnL STATS BY {dim.upper()} (median within {np.expm1(args.width):.2%})")
+        print("="*70)
+        print(table[pnl_columns].to_string(float_format=lambda v: f"{v:,.2f}"))
+        print(f"\nRisk-adjusted (closed fills) by {dim}:")
+        print(table[risk_columns].sort_values('sharpe_like', ascending=False)
+              .to_string(float_format=lambda v: f"{v:,.3f}"))
+        print()
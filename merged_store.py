@@ -0,0 +1,102 @@
+import shutil
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as fs
+
+from trader_loader import ID_COLUMNS, decode_ids, intern_ids, read_trader_csv
+
+# ===== MERGED TRADE-SENTIMENT STORE =====
+# Written by 02_data_merging.R (see merged_store.R): Parquet partitioned by
+# month and classification, with Coin/Side/Direction dictionary-encoded and
+# Account/Transaction.Hash/Order.ID/Trade.ID stored as int32 codes
+# (see trader_loader.py). position_type, is_win, size_category and weekday
+# are computed once on write (add_features). merge_to_store() is the same
+# full merge in Python, for machines without R.
+
+STORE_DIR = "merged_store"
+# Reads go through memory maps: Parquet pages come straight from the page
+# cache instead of being copied into read buffers first
+STORE_FS = fs.LocalFileSystem(use_mmap=True)
+
+SENTIMENT_ORDER = ['Extreme Fear', 'Fear', 'Neutral', 'Greed', 'Extreme Greed']
+LONG_DIRECTIONS = ['Open Long', 'Close Long', 'Buy']
+SHORT_DIRECTIONS = ['Open Short', 'Close Short', 'Sell']
+POSITION_TYPES = ['Long', 'Short', 'Other']
+SIZE_BREAKS = [-np.inf, 500, 2000, 10000, np.inf]
+SIZE_LABELS = ['Small (<$500)', 'Medium ($500-$2k)', 'Large ($2k-$10k)', 'Very Large (>$10k)']
+SIZE_BUCKETS = ['Small', 'Medium', 'Large', 'Very Large']
+WEEKDAYS = ['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat']
+
+
+def add_features(df):
+    """Derived columns of add_features() in merged_store.R, for Python writers."""
+    df = df.copy()
+    direction = df['Direction'].astype('category')
+    levels = direction.cat.categories
+    level_type = np.where(levels.isin(LONG_DIRECTIONS), 'Long',
+                          np.where(levels.isin(SHORT_DIRECTIONS), 'Short', 'Other'))
+    codes = direction.cat.codes.to_numpy()
+    df['position_type'] = pd.Categorical(
+        np.where(codes >= 0, level_type[codes], 'Other'), categories=POSITION_TYPES)
+    df['is_win'] = df['Closed.PnL'] > 0
+    df['size_category'] = pd.cut(df['Size.USD'], SIZE_BREAKS, labels=SIZE_LABELS, right=False)
+    dow = (pd.to_datetime(df['date']).dt.dayofweek.to_numpy() + 1) % 7
+    df['weekday'] = pd.Categorical.from_codes(dow, categories=WEEKDAYS, ordered=True)
+    return df
+
+
+def side_codes(position_type):
+    """0 = Long, 1 = Short, -1 = Other or missing."""
+    return pd.Index(POSITION_TYPES[:2]).get_indexer(position_type)
+
+
+def write_merged_store(merged, path=STORE_DIR):
+    """Rebuild the store from merged fills, like write_merged_store() in merged_store.R."""
+    merged = add_features(merged)
+    for col in ['Coin', 'Side', 'Direction']:
+        merged[col] = merged[col].astype('category')
+    # int32, as R's as.integer() writes it
+    merged['value'] = merged['value'].astype('Int32')
+    merged['month'] = pd.to_datetime(merged['date']).dt.strftime('%Y-%m')
+    shutil.rmtree(path, ignore_errors=True)
+    ds.write_dataset(pa.Table.from_pandas(merged, preserve_index=False), path, format="parquet",
+                     partitioning=['month', 'classification'], partitioning_flavor="hive")
+
+
+def merge_to_store(trader_path="historical_data.csv", sentiment_path="fear_greed_index.csv", path=STORE_DIR):
+    """The full merge of 02_data_merging.R: fills with interned IDs, joined to
+    the Fear & Greed reading of their IST date, written to the store."""
+    trades = intern_ids(read_trader_csv(trader_path))
+    trades['datetime_ist'] = pd.to_datetime(trades['Timestamp.IST'], format='%d-%m-%Y %H:%M')
+    trades['date'] = trades['datetime_ist'].dt.date
+    sentiment = pd.read_csv(sentiment_path, usecols=['date', 'value', 'classification'])
+    sentiment['date'] = pd.to_datetime(sentiment['date']).dt.date
+    merged = trades.merge(sentiment, on='date', how='left')
+    write_merged_store(merged, path)
+    return len(merged)
+
+
+def open_store(path=STORE_DIR):
+    return ds.dataset(path, format="parquet", partitioning="hive", filesystem=STORE_FS)
+
+
+def has_sentiment():
+    """Filter expression for rows that matched a Fear & Greed reading."""
+    return ds.field("classification").is_valid()
+
+
+def read_merged(columns=None, filter=None, path=STORE_DIR, decode=False):
+    """Load the merged store into a DataFrame.
+
+    Only `columns` are read and `filter` is pushed down to the partition
+    directories and Parquet row-group statistics. ID columns stay int32 codes
+    unless `decode` is set.
+    """
+    table = open_store(path).to_table(columns=columns, filter=filter)
+    df = table.to_pandas()
+    if decode:
+        df = decode_ids(df, ID_COLUMNS)
+    return df
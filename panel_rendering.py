@@ -0,0 +1,220 @@
+"""Panels of the 05_statistical_analysis.py figure, drawn from aggregates.
+
+The draw_* functions take binned histograms and daily cube roll-ups, never
+fills, so drawing cost does not grow with the data; render_figure() draws
+each panel in its own process and stitches them into the combined PNG.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+import numpy as np
+import pandas as pd
+
+from daily_cube import rollup
+from merged_store import SENTIMENT_ORDER
+
+PANEL_DIR = "figures"
+PANEL_SIZE = (20 / 3, 6)
+VIOLIN_RANGE = (-1000, 1000)
+VIOLIN_BINS = 800
+RASTER_EXTENT = (0, 20000, -2000, 2000)
+RASTER_BINS = 160
+WIN_RATE_COLORS = ['#d62728', '#ff7f0e', '#7f7f7f', '#2ca02c', '#1f77b4']
+
+
+# ===== AGGREGATION =====
+def binned_violin(values, lo=VIOLIN_RANGE[0], hi=VIOLIN_RANGE[1], bins=VIOLIN_BINS):
+    """KDE of `values` (clipped to [lo, hi]) from a histogram: the counts are
+    convolved with a Gaussian of Scott's bandwidth, extended by two
+    bandwidths on each side like seaborn's cut=2. Also returns the quartiles
+    and 1.5 IQR whiskers for the inner box."""
+    values = values[(values >= lo) & (values <= hi)]
+    width = (hi - lo) / bins
+    bandwidth = max(values.std(ddof=1) * len(values) ** (-1 / 5), width) if len(values) > 1 else width
+    pad = int(np.ceil(2 * bandwidth / width))
+    counts, _ = np.histogram(values, bins=bins, range=(lo, hi))
+    counts = np.pad(counts.astype(float), pad)
+    half = int(np.ceil(4 * bandwidth / width))
+    kernel = np.exp(-0.5 * (np.arange(-half, half + 1) * width / bandwidth) ** 2)
+    # The kernel can be longer than the padded counts (few, widely spread
+    # values), where mode='same' would return len(kernel) samples; cut the
+    # full convolution back to the counts' grid instead
+    smoothed = np.convolve(counts, kernel / kernel.sum(), mode='full')[half:half + len(counts)]
+    density = smoothed / max(len(values), 1) / width
+    centers = lo - pad * width + (np.arange(len(counts)) + 0.5) * width
+    q1, median, q3 = np.percentile(values, [25, 50, 75]) if len(values) else (np.nan,) * 3
+    iqr = q3 - q1
+    within = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+    whiskers = (within.min(), within.max()) if len(within) else (np.nan, np.nan)
+    return {'y': centers, 'density': density, 'quartiles': (q1, median, q3), 'whiskers': whiskers}
+
+
+def raster_scatter(x, y, codes, extent=RASTER_EXTENT, bins=RASTER_BINS):
+    """Per-pixel point counts and mean category code of (x, y)."""
+    x_range, y_range = extent[:2], extent[2:]
+    counts, _, _ = np.histogram2d(x, y, bins=bins, range=[x_range, y_range])
+    code_sums, _, _ = np.histogram2d(x, y, bins=bins, range=[x_range, y_range], weights=codes)
+    return {'counts': counts, 'code_sums': code_sums, 'extent': extent}
+
+
+def aggregate_cube_panels(cube):
+    """The four panels that are roll-ups of the daily cube."""
+    closed_cells = cube[cube['n_closed'] > 0]
+    long_short_cells = closed_cells[closed_cells['position_type'].isin(['Long', 'Short'])]
+    return {
+        'win_rates': rollup(closed_cells, 'classification')['win_rate'].reindex(SENTIMENT_ORDER),
+        'long_short': rollup(long_short_cells, ['classification', 'position_type'])['avg_pnl']
+                      .unstack().reindex(index=SENTIMENT_ORDER, columns=['Long', 'Short']),
+        'daily': rollup(cube, ['date', 'classification'])[['volume', 'pnl']].sort_index().reset_index(),
+    }
+
+
+def aggregate_panels(closed_trades, cube):
+    """Everything the six panels draw, as small arrays / frames."""
+    pnl = closed_trades['Closed.PnL'].to_numpy()
+    sentiment = closed_trades['classification'].astype(object).to_numpy()
+    codes = pd.Categorical(sentiment, categories=SENTIMENT_ORDER).codes.astype(float)
+    return {
+        'violins': {s: binned_violin(pnl[sentiment == s]) for s in SENTIMENT_ORDER},
+        'raster': raster_scatter(closed_trades['Size.USD'].to_numpy(), pnl, codes),
+        **aggregate_cube_panels(cube),
+    }
+
+
+# ===== DRAWING =====
+def draw_violins(ax, violins):
+    import seaborn as sns
+    colors = sns.color_palette('RdYlGn', len(SENTIMENT_ORDER))
+    # scale='area': the widest violin is 0.8 wide, the others in proportion
+    peak = max((v['density'].max() for v in violins.values() if len(v['density'])), default=1)
+    for i, sentiment in enumerate(SENTIMENT_ORDER):
+        v = violins[sentiment]
+        half = v['density'] / peak * 0.4
+        ax.fill_betweenx(v['y'], i - half, i + half, facecolor=colors[i], edgecolor='#333333', linewidth=1)
+        q1, median, q3 = v['quartiles']
+        ax.plot([i, i], v['whiskers'], color='#333333', linewidth=1.5)
+        ax.plot([i, i], [q1, q3], color='#333333', linewidth=5, solid_capstyle='butt')
+        ax.scatter([i], [median], color='white', s=12, zorder=3)
+    ax.set_xticks(range(len(SENTIMENT_ORDER)))
+    ax.set_xticklabels(SENTIMENT_ORDER)
+    ax.set_title('PnL Distribution by Market Sentiment', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Market Sentiment', fontsize=12)
+    ax.set_ylabel('Closed PnL (USD)', fontsize=12)
+    ax.tick_params(axis='x', rotation=45)
+    ax.axhline(y=0, color='black', linestyle='--', alpha=0.5)
+
+
+def draw_win_rates(ax, win_rates):
+    ax.bar(range(len(SENTIMENT_ORDER)), win_rates.values, color=WIN_RATE_COLORS)
+    ax.set_title('Win Rate by Market Sentiment', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Market Sentiment', fontsize=12)
+    ax.set_ylabel('Win Rate (%)', fontsize=12)
+    ax.set_xticks(range(len(SENTIMENT_ORDER)))
+    ax.set_xticklabels(SENTIMENT_ORDER, rotation=45, ha='right')
+    ax.set_ylim(0, 100)
+    for i, v in enumerate(win_rates.values):
+        ax.text(i, v + 2, f'{v:.1f}%', ha='center', fontweight='bold')
+
+
+def draw_long_short(ax, long_short_perf):
+    long_short_perf.plot(kind='bar', ax=ax, color=['#1f77b4', '#ff7f0e'])
+    ax.set_title('Long vs Short: Avg PnL by Sentiment', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Market Sentiment', fontsize=12)
+    ax.set_ylabel('Average PnL (USD)', fontsize=12)
+    ax.legend(title='Position Type', fontsize=10)
+    ax.tick_params(axis='x', rotation=45)
+    ax.axhline(y=0, color='black', linestyle='--', alpha=0.5)
+
+
+def draw_daily_volume(ax, daily):
+    for sentiment in SENTIMENT_ORDER:
+        sent_data = daily[daily['classification'] == sentiment]
+        ax.plot(sent_data['date'], sent_data['volume'], label=sentiment, alpha=0.7, linewidth=2)
+    ax.set_title('Daily Trading Volume by Sentiment', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Date', fontsize=12)
+    ax.set_ylabel('Total Volume (USD)', fontsize=12)
+    ax.legend(fontsize=9)
+    ax.tick_params(axis='x', rotation=45)
+
+
+def draw_raster(ax, raster):
+    from matplotlib import colormaps
+    counts, extent = raster['counts'], raster['extent']
+    mean_code = np.divide(raster['code_sums'], counts, out=np.zeros_like(counts), where=counts > 0)
+    rgba = colormaps['RdYlGn'](mean_code / (len(SENTIMENT_ORDER) - 1))
+    # Any occupied pixel stays visible, like the 0.3 alpha of the sampled scatter
+    rgba[..., 3] = np.where(counts > 0, 0.3 + 0.7 * np.log1p(counts) / max(np.log1p(counts.max()), 1), 0)
+    ax.imshow(rgba.transpose(1, 0, 2), origin='lower', extent=extent, aspect='auto', interpolation='nearest')
+    ax.set_title('Trade Size vs PnL (all trades, rasterized)', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Trade Size (USD)', fontsize=12)
+    ax.set_ylabel('Closed PnL (USD)', fontsize=12)
+    ax.set_xlim(extent[0], extent[1])
+    ax.set_ylim(extent[2], extent[3])
+    ax.axhline(y=0, color='black', linestyle='--', alpha=0.5)
+    ax.axvline(x=0, color='black', linestyle='--', alpha=0.5)
+
+
+def draw_cumulative_pnl(ax, daily):
+    # End-of-day cumulative PnL (one point per day rather than per fill)
+    for sentiment in SENTIMENT_ORDER:
+        sent_data = daily[daily['classification'] == sentiment]
+        ax.plot(sent_data['date'], sent_data['pnl'].cumsum(), label=sentiment, linewidth=2)
+    ax.set_title('Cumulative PnL by Sentiment Over Time', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Date', fontsize=12)
+    ax.set_ylabel('Cumulative PnL (USD)', fontsize=12)
+    ax.legend(fontsize=9)
+    ax.tick_params(axis='x', rotation=45)
+    ax.axhline(y=0, color='black', linestyle='--', alpha=0.5)
+
+
+# (file name, draw function, key into aggregate_panels()) in figure order
+PANELS = [
+    ('1_pnl_distribution', draw_violins, 'violins'),
+    ('2_win_rate', draw_win_rates, 'win_rates'),
+    ('3_long_short', draw_long_short, 'long_short'),
+    ('4_daily_volume', draw_daily_volume, 'daily'),
+    ('5_size_vs_pnl', draw_raster, 'raster'),
+    ('6_cumulative_pnl', draw_cumulative_pnl, 'daily'),
+]
+
+
+# ===== RENDERING =====
+def render_panel(index, data, path, dpi):
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    sns.set_style("whitegrid")
+    fig, ax = plt.subplots(figsize=PANEL_SIZE)
+    PANELS[index][1](ax, data)
+    # Fixed canvas (no bbox_inches='tight') so every panel has the same
+    # pixel size and the files can be tiled
+    fig.tight_layout()
+    fig.savefig(path, dpi=dpi)
+    plt.close(fig)
+    return path
+
+
+def stitch_panels(paths, out_path, ncols=3):
+    from PIL import Image
+    images = [Image.open(p) for p in paths]
+    width, height = images[0].size
+    nrows = -(-len(images) // ncols)
+    sheet = Image.new('RGBA', (width * ncols, height * nrows), 'white')
+    for i, image in enumerate(images):
+        sheet.paste(image, ((i % ncols) * width, (i // ncols) * height))
+    # Low zlib level: the panels are already rendered, this only tiles them
+    sheet.save(out_path, compress_level=1)
+
+
+def render_figure(closed_trades, cube, out_path, panel_dir=PANEL_DIR, dpi=300, workers=None):
+    """Aggregate once, draw the six panels in parallel into panel_dir and
+    tile them into out_path. Returns the panel file paths."""
+    panels = aggregate_panels(closed_trades, cube)
+    os.makedirs(panel_dir, exist_ok=True)
+    paths = [os.path.join(panel_dir, f"panel_{name}.png") for name, _, _ in PANELS]
+    with ProcessPoolExecutor(max_workers=workers or min(len(PANELS), os.cpu_count())) as pool:
+        list(pool.map(render_panel, range(len(PANELS)), [panels[key] for _, _, key in PANELS],
+                      paths, [dpi] * len(PANELS)))
+    stitch_panels(paths, out_path)
+    return paths
@@ -0,0 +1,209 @@
+"""Runs the numbered 01-06 stages as a dependency graph.
+
+    python pipeline.py                # everything that is out of date
+    python pipeline.py 05 --force     # 05 and anything it needs, rerun 05
+    python pipeline.py --dry-run      # show what would run
+
+A stage is skipped when the fingerprint of its inputs, script and local
+imports matches its last successful run. Wall time and peak RSS go to
+results/pipeline_state.json, output to results/logs/<stage>.log.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from results_cache import RESULTS_DIR, fingerprint, local_imports
+from tracing import RUN_ID, write_record
+
+STATE_FILE = os.path.join(RESULTS_DIR, "pipeline_state.json")
+LOG_DIR = os.path.join(RESULTS_DIR, "logs")
+
+# The scripts and the modules they load are not listed: stage_key() adds
+# local_imports() of cmd[1]
+STAGES = {
+    "01": {
+        "cmd": ["Rscript", "01_data_exploration.R"],
+        "inputs": ["historical_data.csv", "fear_greed_index.csv"],
+        "outputs": ["Output1.txt"],
+    },
+    "02": {
+        "cmd": ["Rscript", "02_data_merging.R"],
+        "inputs": ["historical_data.csv", "fear_greed_index.csv"],
+        "outputs": ["Output2.txt", "merged_store", "id_lookup"],
+    },
+    "03": {
+        "cmd": ["Rscript", "03_exploratory_analysiis.R"],
+        "inputs": ["merged_store", "id_lookup"],
+        "outputs": ["Output3.txt"],
+    },
+    "04": {
+        "cmd": ["Rscript", "04_advanced_insights.R"],
+        "inputs": ["merged_store"],
+        "outputs": ["Output4.txt"],
+    },
+    "05": {
+        "cmd": [sys.executable, "05_statistical_analysis.py"],
+        "inputs": ["merged_store"],
+        "outputs": ["sentiment_analysis_visualizations.png"],
+    },
+    "06": {
+        "cmd": [sys.executable, "06_final_report_generator.py"],
+        # The PNG ties 06 to 05, whose cached H1-H4 results it reuses
+        "inputs": ["merged_store", "fear_greed_index.csv", "sentiment_analysis_visualizations.png"],
+        "outputs": ["Bitcoin_Sentiment_Trading_Analysis_Report.docx"],
+    },
+}
+
+
+def dependencies(stages=STAGES):
+    """stage -> set of stages producing one of its inputs."""
+    producers = {out: name for name, stage in stages.items() for out in stage["outputs"]}
+    return {name: {producers[i] for i in stage["inputs"] if i in producers and producers[i] != name}
+            for name, stage in stages.items()}
+
+
+def with_upstream(selected, deps):
+    needed, todo = set(), list(selected)
+    while todo:
+        name = todo.pop()
+        if name not in needed:
+            needed.add(name)
+            todo.extend(deps[name])
+    return needed
+
+
+def stage_sources(name, stages=STAGES):
+    """The stage's script and every local module it loads."""
+    return local_imports(stages[name]["cmd"][1])
+
+
+def stage_key(name, stages=STAGES):
+    stage = stages[name]
+    sources = stage_sources(name, stages)
+    return fingerprint(sources + [p for p in stage["inputs"] if os.path.exists(p)],
+                       {"cmd": stage["cmd"][1:], "inputs": stage["inputs"], "sources": sources})
+
+
+def load_state():
+    try:
+        with open(STATE_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state):
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    with open(STATE_FILE, "w") as f:
+        json.dump(state, f, indent=2)
+
+
+def is_current(name, key, state, stages=STAGES):
+    return (state.get(name, {}).get("key") == key and
+            all(os.path.exists(p) for p in stages[name]["outputs"]))
+
+
+def stage_name(name, stages=STAGES):
+    """The script's stem, which is what its own spans are tagged with."""
+    return os.path.splitext(os.path.basename(stages[name]["cmd"][1]))[0]
+
+
+def run_stage(name, stages=STAGES):
+    """Run one stage; returns (returncode, wall seconds, peak RSS in MB)."""
+    os.makedirs(LOG_DIR, exist_ok=True)
+    start = time.perf_counter()
+    with open(os.path.join(LOG_DIR, f"{name}.log"), "w") as log:
+        try:
+            proc = subprocess.Popen(stages[name]["cmd"], stdout=log, stderr=subprocess.STDOUT)
+        except OSError as e:
+            log.write(f"{e}\n")
+            return 127, time.perf_counter() - start, 0.0
+        # wait4 reaps this child only, so the rusage is per stage
+        _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+    # ru_maxrss is in KB on Linux
+    return proc.returncode, time.perf_counter() - start, usage.ru_maxrss / 1024
+
+
+def run_pipeline(selected=None, jobs=None, force=False, dry_run=False, stages=STAGES):
+    deps = dependencies(stages)
+    todo = with_upstream(selected or stages, deps)
+    forced = set(selected or stages) if force else set()
+    # The stages inherit it, so their spans share this run's id
+    os.environ["TRACE_RUN"] = RUN_ID
+    state = load_state()
+    done, failed, stale, pending = set(), set(), set(), {}
+    report = []
+
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        while todo or pending:
+            # Upstream outputs are inputs, so a stage is keyed only once its
+            # dependencies have finished
+            for name in sorted(n for n in todo if deps[n] <= done | failed):
+                todo.discard(name)
+                if deps[name] & failed:
+                    failed.add(name)
+                    report.append((name, "skipped (upstream failed)", None, None))
+                    continue
+                key = stage_key(name, stages)
+                if name not in forced and not deps[name] & stale and is_current(name, key, state, stages):
+                    done.add(name)
+                    report.append((name, "up to date", None, None))
+                elif dry_run:
+                    done.add(name)
+                    stale.add(name)
+                    report.append((name, "would run", None, None))
+                else:
+                    print(f"[{name}] {' '.join(stages[name]['cmd'])}")
+                    pending[pool.submit(run_stage, name, stages)] = (name, key)
+            if not pending:
+                continue
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name, key = pending.pop(future)
+                code, wall, rss = future.result()
+                status = "ok" if code == 0 else f"failed (exit {code}, see {LOG_DIR}/{name}.log)"
+                print(f"[{name}] {status} in {wall:.1f}s, peak RSS {rss:.0f} MB")
+                report.append((name, status, wall, rss))
+                write_record({"type": "stage", "run": RUN_ID, "stage": stage_name(name, stages),
+                              "span": name, "duration_s": round(wall, 3), "peak_rss_mb": round(rss, 1),
+                              "returncode": code})
+                if code == 0:
+                    done.add(name)
+                    state[name] = {"key": key, "wall_s": round(wall, 3),
+                                   "peak_rss_mb": round(rss, 1), "finished": time.strftime("%Y-%m-%dT%H:%M:%S")}
+                else:
+                    failed.add(name)
+                    state.pop(name, None)
+                save_state(state)
+    return report, not failed
+
+
+def print_report(report):
+    print("\n" + "=" * 70)
+    print("PIPELINE SUMMARY")
+    print("=" * 70)
+    for name, status, wall, rss in sorted(report):
+        timing = f"{wall:8.1f}s {rss:8.0f} MB" if wall is not None else " " * 20
+        print(f"{name:4} {timing}  {status}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the 01-06 analysis stages, skipping unchanged ones.")
+    parser.add_argument("stages", nargs="*", metavar="STAGE",
+                        help="stages to bring up to date (default: all); upstream stages are included")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="parallel stages (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="rerun the named stages even if up to date")
+    parser.add_argument("--dry-run", action="store_true", help="only report which stages would run")
+    args = parser.parse_args()
+    unknown = set(args.stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(sorted(unknown))} (choose from {', '.join(STAGES)})")
+
+    report, ok = run_pipeline(args.stages, args.jobs, args.force, args.dry_run)
+    print_report(report)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,200 @@
+"""Reconstruct positions and round trips from the fills.
+
+    python positions.py [--workers N] [--no-tests]
+
+Each Account x Coin is walked in Timestamp order; a trip opens when the
+position leaves zero or flips and closes when it returns to zero or flips
+(a flipping fill's Fee is split between the two trips). Vectorised per
+group, in worker processes.
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+
+from hypothesis_tests import run_hypothesis_tests
+from merged_store import SENTIMENT_ORDER, STORE_DIR, read_merged
+
+POSITION_COLUMNS = ['Account', 'Coin', 'Timestamp', 'Trade.ID', 'Order.ID', 'Side', 'Size.Tokens',
+                    'Execution.Price', 'Start.Position', 'Closed.PnL', 'Fee', 'classification']
+SORT_KEYS = ['Account', 'Coin', 'Timestamp', 'Trade.ID']
+# Positions within this fraction of the fill size of zero count as flat
+FLAT_TOL = 1e-9
+OUTPUT_FILE = "round_trips.csv"
+
+
+def load_position_fills(path=STORE_DIR):
+    """Position-changing fills (every sentiment, matched or not), sorted by
+    Account x Coin and time."""
+    fills = read_merged(columns=POSITION_COLUMNS, filter=ds.field('position_type') != 'Other', path=path)
+    fills['classification'] = fills['classification'].astype(object)
+    return fills.sort_values(SORT_KEYS, kind='stable').reset_index(drop=True)
+
+
+def _group_starts(fills):
+    account = fills['Account'].to_numpy()
+    coin = pd.factorize(fills['Coin'])[0]
+    return np.r_[True, (account[1:] != account[:-1]) | (coin[1:] != coin[:-1])]
+
+
+def _signs(x, scale):
+    return np.where(np.abs(x) > FLAT_TOL * scale, np.sign(x), 0).astype(np.int8)
+
+
+# ===== ROUND TRIPS =====
+
+def reconstruct(fills):
+    """Round trips of `fills` sorted by SORT_KEYS (each group contiguous)."""
+    if len(fills) == 0:
+        return pd.DataFrame()
+    size = fills['Size.Tokens'].to_numpy(dtype=float)
+    before = fills['Start.Position'].to_numpy(dtype=float)
+    after = before + np.where((fills['Side'].astype(object) == 'BUY').to_numpy(), size, -size)
+    scale = np.maximum(np.abs(before), size)
+    s_before, s_after = _signs(before, scale), _signs(after, scale)
+
+    carried = _group_starts(fills) & (s_before != 0)
+    closes = (s_before != 0) & (s_after != s_before)
+    opens = (s_after != 0) & (s_after != s_before)
+    # Trips opened so far; the trip held before a fill and the one after it
+    count = np.cumsum(carried.astype(np.int64) + opens)
+    trip_before = count - opens - 1
+    trip_after = count - 1
+    close_share = np.where(closes & opens, np.clip(np.abs(before) / np.where(size > 0, size, 1), 0, 1), 1.0)
+
+    # One entry per (trip, fill) share: the part held before the fill, and
+    # the part opened by it (a flip contributes to both trips)
+    held = s_before != 0
+    opened = np.flatnonzero(opens)
+    rows = np.r_[np.flatnonzero(held), opened]
+    entries = pd.DataFrame({
+        'trip': np.r_[trip_before[held], trip_after[opened]],
+        'row': rows,
+        'sign': np.r_[s_before[held], s_after[opened]],
+        'weight': np.r_[np.where(closes, close_share, 1.0)[held], np.where(closes, 1 - close_share, 1.0)[opened]],
+        'pnl': np.r_[fills['Closed.PnL'].to_numpy()[held], np.where(held, 0.0, fills['Closed.PnL'].to_numpy())[opened]],
+        'position': np.r_[np.where(closes, np.abs(before), np.maximum(np.abs(before), np.abs(after)))[held],
+                          np.abs(after)[opened]],
+    }).sort_values(['trip', 'row'], kind='stable')
+    price = fills['Execution.Price'].to_numpy(dtype=float)[entries['row']]
+    entries['fee'] = fills['Fee'].to_numpy(dtype=float)[entries['row']] * entries['weight']
+    entries['position_usd'] = entries['position'] * price
+    entries['price'] = price
+    entries['order'] = fills['Order.ID'].to_numpy()[entries['row']]
+
+    grouped = entries.groupby('trip', sort=True)
+    first = grouped['row'].first().to_numpy()
+    entry_price = grouped['price'].first()
+    sign = grouped['sign'].first()
+    adverse = -entries['sign'] * (entries['price'] - entry_price.reindex(entries['trip']).to_numpy()) \
+        / entry_price.reindex(entries['trip']).to_numpy()
+    timestamps = fills['Timestamp'].to_numpy()
+    sentiment = fills['classification'].to_numpy(dtype=object)
+
+    trips = pd.DataFrame({
+        'Account': fills['Account'].to_numpy()[first],
+        'Coin': fills['Coin'].astype(object).to_numpy()[first],
+        'side': np.where(sign.to_numpy() > 0, 'Long', 'Short'),
+        'entry_time': timestamps[first],
+        'exit_time': np.nan,
+        'entry_sentiment': sentiment[first],
+        'exit_sentiment': None,
+        'realized_pnl': grouped['pnl'].sum().to_numpy(),
+        'fees': grouped['fee'].sum().to_numpy(),
+        'max_position': grouped['position'].max().to_numpy(),
+        'max_position_usd': grouped['position_usd'].max().to_numpy(),
+        'max_adverse_pct': adverse.groupby(entries['trip']).max().clip(lower=0).to_numpy() * 100,
+        'n_fills': grouped.size().to_numpy(),
+        'n_orders': grouped['order'].nunique().to_numpy(),
+        'flipped': False,
+        'carried_in': False,
+    }, index=grouped.size().index)
+
+    closing = np.flatnonzero(closes)
+    trips.loc[trip_before[closing], 'exit_time'] = timestamps[closing]
+    trips.loc[trip_before[closing], 'exit_sentiment'] = sentiment[closing]
+    trips.loc[trip_before[closing], 'flipped'] = opens[closing]
+    trips.loc[trip_before[carried], 'carried_in'] = True
+    trips['net_pnl'] = trips['realized_pnl'] - trips['fees']
+    trips['holding_hours'] = (trips['exit_time'] - trips['entry_time']) / 3_600_000
+    trips['closed'] = trips['exit_time'].notna()
+    return trips.reset_index(drop=True)
+
+
+def _chunk_bounds(group_starts, n_chunks):
+    """Row ranges of about equal size that never split a group."""
+    starts = np.flatnonzero(group_starts)
+    targets = np.linspace(0, len(group_starts), n_chunks + 1)[1:-1]
+    cuts = np.unique(starts[np.clip(np.searchsorted(starts, targets), 0, len(starts) - 1)])
+    edges = np.unique(np.r_[0, cuts, len(group_starts)])
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def reconstruct_positions(fills, workers=None):
+    """Round trips of all Account x Coin groups; `fills` as returned by
+    load_position_fills(). Chunks of whole groups run in worker processes."""
+    workers = workers or os.cpu_count()
+    if workers <= 1 or len(fills) == 0:
+        return reconstruct(fills)
+    bounds = _chunk_bounds(_group_starts(fills), workers * 4)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parts = list(pool.map(reconstruct, [fills.iloc[a:b] for a, b in bounds]))
+    return pd.concat(parts, ignore_index=True)
+
+
+def trip_observations(trips):
+    """Closed trips with a sentiment at entry, in the columns
+    run_hypothesis_tests() reads (max_position_usd stands in for the size)."""
+    closed = trips[trips['closed'] & trips['entry_sentiment'].isin(SENTIMENT_ORDER)]
+    return pd.DataFrame({
+        'classification': closed['entry_sentiment'],
+        'position_type': closed['side'],
+        'is_win': closed['net_pnl'] > 0,
+        'Size.USD': closed['max_position_usd'],
+        'Closed.PnL': closed['net_pnl'],
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--no-tests', action='store_true')
+    args = parser.parse_args()
+
+    fills = load_position_fills()
+    trips = reconstruct_positions(fills, args.workers)
+    trips.to_csv(OUTPUT_FILE, index=False)
+    closed = trips[trips['closed']]
+
+    print("="*70)
+    print("ROUND TRIPS")
+    print("="*70)
+    print(f"Fills: {len(fills):,} in {int(_group_starts(fills).sum()):,} Account x Coin groups")
+    print(f"Round trips: {len(trips):,} ({len(closed):,} closed, {int(trips['flipped'].sum()):,} closed by a flip, "
+          f"{int(trips['carried_in'].sum()):,} carried in, {int((~trips['closed']).sum()):,} still open)")
+
+    print("\nClosed trips by entry sentiment:")
+    by_sentiment = closed.groupby('entry_sentiment').agg(
+        trips=('net_pnl', 'size'),
+        total_net_pnl=('net_pnl', 'sum'),
+        avg_net_pnl=('net_pnl', 'mean'),
+        win_rate=('net_pnl', lambda p: (p > 0).mean() * 100),
+        median_holding_hours=('holding_hours', 'median'),
+        avg_max_position_usd=('max_position_usd', 'mean'),
+    ).reindex(SENTIMENT_ORDER).dropna(how='all')
+    print(by_sentiment.to_string(float_format=lambda v: f"{v:,.2f}"))
+
+    print("\nAvg net PnL by entry -> exit sentiment:")
+    print(closed.pivot_table(index='entry_sentiment', columns='exit_sentiment', values='net_pnl', aggfunc='mean')
+          .reindex(index=SENTIMENT_ORDER, columns=SENTIMENT_ORDER).dropna(how='all')
+          .to_string(float_format=lambda v: f"{v:,.2f}"))
+
+    if not args.no_tests:
+        print("\n" + "="*70)
+        print("ROUND-TRIP HYPOTHESIS TESTS (one observation per closed trip, entry sentiment)")
+        print("="*70)
+        run_hypothesis_tests(trip_observations(trips))
+    print(f"\n✓ Round trips saved to '{OUTPUT_FILE}'")
@@ -0,0 +1,171 @@
+"""Sort-once ranking engine for the rank tests in 05_statistical_analysis.py.
+
+Subset ranks are read off one global argsort, so Kruskal-Wallis, Mann-Whitney
+U and Spearman never re-sort; they match scipy.stats and take their p-values
+from scipy.special. Kendall's tau-b is scipy.stats.kendalltau on the dense
+ranks.
+"""
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+from scipy import special
+
+# Below this size mannwhitneyu's exact distribution is used instead of the
+# normal approximation, as scipy's method='auto' does.
+EXACT_MWU_MAX = 8
+# Subset ranks kept per engine (least recently used dropped first); each is
+# one float64 array over every row
+SUBSET_CACHE_SIZE = 8
+
+
+# ===== TEST STATISTICS FROM RANK SUMS =====
+
+def kruskal_from_ranks(rank_sums, counts, tie_sum):
+    counts = np.asarray(counts, dtype=float)
+    rank_sums = np.asarray(rank_sums, dtype=float)[counts > 0]
+    counts = counts[counts > 0]
+    N = counts.sum()
+    h = 12.0 / (N * (N + 1)) * np.sum(rank_sums ** 2 / counts) - 3 * (N + 1)
+    h /= 1 - tie_sum / (N ** 3 - N)
+    return h, special.chdtrc(len(counts) - 1, h)
+
+
+def mannwhitney_from_ranks(rank_sum_1, n1, n2, tie_sum):
+    """Two-sided asymptotic U test with tie and continuity correction."""
+    n = n1 + n2
+    u1 = rank_sum_1 - n1 * (n1 + 1) / 2.0
+    mu = n1 * n2 / 2.0
+    sigma = np.sqrt(n1 * n2 / 12.0 * ((n + 1) - tie_sum / (n * (n - 1))))
+    z = (max(u1, n1 * n2 - u1) - mu - 0.5) / sigma
+    return u1, min(1.0, 2 * special.ndtr(-z))
+
+
+def spearman_p(rho, n):
+    t = rho * np.sqrt((n - 2) / max(1 - rho ** 2, 1e-300))
+    return 2 * special.stdtr(n - 2, -abs(t))
+
+
+def chi2_contingency(observed):
+    """(chi2, p, dof, expected) of Pearson's test of independence, with
+    Yates' correction when dof == 1, as scipy.stats.chi2_contingency."""
+    observed = np.asarray(observed, dtype=float)
+    expected = np.outer(observed.sum(axis=1), observed.sum(axis=0)) / observed.sum()
+    dof = expected.size - sum(expected.shape) + expected.ndim - 1
+    if dof == 0:
+        return 0.0, 1.0, dof, expected
+    if dof == 1:
+        diff = expected - observed
+        observed = observed + np.sign(diff) * np.minimum(0.5, np.abs(diff))
+    chi2 = np.sum((observed - expected) ** 2 / expected)
+    return chi2, special.chdtrc(dof, chi2), dof, expected
+
+
+def _tie_runs(sorted_values):
+    """Start offsets and lengths of runs of equal values in a sorted array."""
+    starts = np.flatnonzero(np.r_[True, sorted_values[1:] != sorted_values[:-1]])
+    lengths = np.diff(np.r_[starts, len(sorted_values)])
+    return starts, lengths
+
+
+# ===== RANK ENGINE =====
+
+class RankEngine:
+    """Values sorted once; cached mid-ranks for the whole sample and subsets."""
+
+    def __init__(self, values, cache_size=SUBSET_CACHE_SIZE):
+        self.values = np.asarray(values, dtype=float)
+        self.order = np.argsort(self.values, kind='stable')
+        self.sorted = self.values[self.order]
+        self.cache_size = cache_size
+        self._cache = {}
+        self._subsets = OrderedDict()
+
+    def __len__(self):
+        return len(self.values)
+
+    def ranks(self, mask=None):
+        """Mid-ranks within the rows selected by `mask` (NaN elsewhere) and
+        the tie term sum(t^3 - t). The whole sample's are always cached; a
+        subset's are kept for the last `cache_size` distinct masks (keyed by
+        a digest of the packed bits), so callers asking for the same rows
+        share them."""
+        if mask is None:
+            if 'all' not in self._cache:
+                self._cache['all'] = self._rank(self.order, self.sorted)
+            return self._cache['all']
+        mask = np.asarray(mask, dtype=bool)
+        key = hashlib.blake2b(np.packbits(mask)).hexdigest()
+        if key in self._subsets:
+            self._subsets.move_to_end(key)
+            return self._subsets[key]
+        in_sorted = mask[self.order]
+        result = self._rank(self.order[in_sorted], self.sorted[in_sorted])
+        if self.cache_size > 0:
+            self._subsets[key] = result
+            if len(self._subsets) > self.cache_size:
+                self._subsets.popitem(last=False)
+        return result
+
+    def _rank(self, idx, v):
+        starts, lengths = _tie_runs(v)
+        out = np.full(len(self.values), np.nan)
+        out[idx] = np.repeat(starts + (lengths + 1) / 2.0, lengths)
+        t = lengths.astype(float)
+        return out, np.sum(t ** 3 - t)
+
+    def dense(self):
+        """Dense ranks 0..k-1, equal values sharing one (cached)."""
+        if 'dense' not in self._cache:
+            out = np.empty(len(self.values), dtype=np.int64)
+            out[self.order] = np.cumsum(np.r_[False, self.sorted[1:] != self.sorted[:-1]])
+            self._cache['dense'] = out
+        return self._cache['dense']
+
+    def kruskal(self, labels, mask=None):
+        """H test across the integer group `labels` (negative = excluded)."""
+        labels = np.asarray(labels)
+        selected = labels >= 0 if mask is None else (np.asarray(mask, dtype=bool) & (labels >= 0))
+        if mask is None and selected.all():
+            selected = None
+        ranks, tie_sum = self.ranks(selected)
+        use = slice(None) if selected is None else selected
+        groups = labels[use].astype(np.int64)
+        rank_sums = np.bincount(groups, weights=ranks[use])
+        counts = np.bincount(groups)
+        return kruskal_from_ranks(rank_sums, counts, tie_sum)
+
+    def mannwhitney(self, mask_1, mask_2):
+        """U statistic of sample 1 and two-sided p-value for sample 1 vs 2."""
+        mask_1 = np.asarray(mask_1, dtype=bool)
+        mask_2 = np.asarray(mask_2, dtype=bool)
+        n1, n2 = int(mask_1.sum()), int(mask_2.sum())
+        if min(n1, n2) <= EXACT_MWU_MAX:
+            from scipy import stats
+            res = stats.mannwhitneyu(self.values[mask_1], self.values[mask_2],
+                                     alternative='two-sided')
+            return res.statistic, res.pvalue
+        ranks, tie_sum = self.ranks(mask_1 | mask_2)
+        return mannwhitney_from_ranks(ranks[mask_1].sum(), n1, n2, tie_sum)
+
+    def spearman(self, other, mask=None):
+        """Spearman rho (and p-value) between this engine's values and
+        `other`'s over the same rows."""
+        x, _ = self.ranks(mask)
+        y, _ = other.ranks(mask)
+        use = slice(None) if mask is None else np.asarray(mask, dtype=bool)
+        x, y = x[use], y[use]
+        rho = np.corrcoef(x, y)[0, 1]
+        return rho, spearman_p(rho, len(x))
+
+    def kendall(self, other, mask=None):
+        """Kendall tau-b (and p-value) between this engine's values and
+        `other`'s over the same rows: scipy.stats.kendalltau on the cached
+        dense ranks (exact p-value for small samples without ties)."""
+        from scipy import stats
+        x, y = self.dense(), other.dense()
+        if mask is not None:
+            mask = np.asarray(mask, dtype=bool)
+            x, y = x[mask], y[mask]
+        res = stats.kendalltau(x, y)
+        return res.statistic, res.pvalue
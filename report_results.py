@@ -0,0 +1,145 @@
+"""Every figure quoted in the final report, rolled up from the daily cube.
+
+load_report_results() returns the cached artifact for the current store and
+fear_greed_index.csv (see results_cache.py), computing it only when the
+inputs or parameters changed. The H1-H4 section reuses the results cached by
+05_statistical_analysis.py under the same store fingerprint; the per-sentiment
+bootstrap CIs (resampling.py) are cached alongside.
+"""
+import numpy as np
+import pandas as pd
+
+from daily_cube import load_cube, rollup
+from merged_store import SENTIMENT_ORDER, STORE_DIR
+from results_cache import cached_results, fingerprint
+
+SENTIMENT_FILE = "fear_greed_index.csv"
+REPORT_PARAMS = {'top_traders': 3, 'coin_min_trades': 50, 'coin_min_range': 100, 'top_coins': 10}
+# Whole trading days are resampled: a replicate costs O(days), not O(trades)
+CI_PARAMS = {'n_boot': 10_000, 'block_by_date': True, 'level': 0.95, 'seed': 42}
+
+
+def tests_key():
+    return fingerprint([STORE_DIR], code=['hypothesis_tests.py'])
+
+
+def hypothesis_results():
+    # Only imported on a cache miss: the report path never loads the test stack
+    def compute():
+        from hypothesis_tests import load_test_data, run_hypothesis_tests
+        return run_hypothesis_tests(load_test_data(), verbose=False)
+    return cached_results('hypothesis_tests', tests_key(), compute)
+
+
+def bootstrap_results(params=CI_PARAMS):
+    """Bootstrap CIs of avg_pnl, win_rate and sharpe_like per sentiment."""
+    def compute():
+        from resampling import load_closed_trades, sentiment_bootstrap
+        return sentiment_bootstrap(load_closed_trades(), params['n_boot'], params['block_by_date'],
+                                   params['level'], seed=params['seed']).to_dict('records')
+    return cached_results('bootstrap', fingerprint([STORE_DIR], params, code=['resampling.py']), compute)
+
+
+def compute_report_results(params=REPORT_PARAMS):
+    # Every table is a roll-up of the daily cube (daily_cube.py); cells with
+    # n_closed > 0 stand in for the closed fills (Closed.PnL != 0)
+    cube = load_cube()
+    cube['classification'] = cube['classification'].astype(object)
+    sentiment_readings = pd.read_csv(SENTIMENT_FILE)
+    df = cube[cube['classification'].isin(SENTIMENT_ORDER)]
+    closed = df[df['n_closed'] > 0]
+    total_fills = cube['n_fills'].sum()
+
+    overview = {
+        'total_trades': total_fills,
+        'matched_trades': df['n_fills'].sum(),
+        'match_rate': df['n_fills'].sum() / max(total_fills, 1) * 100,
+        'trading_days': cube['date'].nunique(),
+        'accounts': cube['Account'].nunique(),
+        'coins': cube['Coin'].nunique(),
+        'sentiment_readings': len(sentiment_readings),
+        'start_date': pd.to_datetime(cube['date']).min(),
+        'end_date': pd.to_datetime(cube['date']).max(),
+        'pct_closed': cube['n_closed'].sum() / max(total_fills, 1) * 100,
+    }
+
+    # Section: total / average PnL by sentiment over all matched fills (Output2)
+    sentiment = rollup(df, 'classification')
+    sentiment = pd.DataFrame({
+        'num_trades': sentiment['n_fills'],
+        'total_pnl': sentiment['pnl'],
+        'avg_pnl': sentiment['pnl'] / sentiment['n_fills'],
+    }).reindex(SENTIMENT_ORDER).dropna()
+
+    # INSIGHT 1: Long vs Short
+    long_short = closed[closed['position_type'].isin(['Long', 'Short'])].assign(
+        position_type=lambda d: d['position_type'].astype(object))
+    position = (rollup(long_short, ['classification', 'position_type'])
+                .rename(columns={'n_closed': 'num_trades'})[['avg_pnl', 'win_rate', 'num_trades']]
+                .unstack())
+    position.columns = [f"{metric}_{side}" for metric, side in position.columns]
+    position = position.reindex(SENTIMENT_ORDER).dropna(how='all')
+    position['short_advantage'] = position['avg_pnl_Short'] - position['avg_pnl_Long']
+    position['short_advantage_pct'] = position['short_advantage'] / position['avg_pnl_Long'].abs() * 100
+
+    # INSIGHT 2: top traders vs others
+    top_accounts = rollup(df, 'Account')['pnl'].nlargest(params['top_traders']).index
+    top_traders = rollup(closed.assign(trader_group=np.where(closed['Account'].isin(top_accounts), 'Top', 'Others')),
+                         ['trader_group', 'classification'])
+    top_traders = pd.DataFrame({
+        'avg_trade_size': top_traders['closed_volume'] / top_traders['n_closed'],
+        'avg_pnl': top_traders['avg_pnl'],
+        'win_rate': top_traders['win_rate'],
+        'num_trades': top_traders['n_closed'],
+    }).sort_index().reset_index()
+
+    # INSIGHT 3: coin-specific sentiment dependency
+    coin_stats = (rollup(closed.assign(Coin=closed['Coin'].astype(object)), ['Coin', 'classification'])
+                  .rename(columns={'pnl': 'total_pnl', 'n_closed': 'num_trades'})
+                  [['total_pnl', 'num_trades', 'avg_pnl']].sort_index().reset_index())
+    coin_stats = coin_stats[coin_stats['num_trades'] >= params['coin_min_trades']]
+    best = coin_stats.loc[coin_stats.groupby('Coin')['avg_pnl'].idxmax()].set_index('Coin')
+    worst = coin_stats.loc[coin_stats.groupby('Coin')['avg_pnl'].idxmin()].set_index('Coin')
+    coin_alpha = pd.DataFrame({
+        'best_sentiment': best['classification'],
+        'best_avg_pnl': best['avg_pnl'],
+        'best_total_pnl': best['total_pnl'],
+        'worst_sentiment': worst['classification'],
+        'worst_avg_pnl': worst['avg_pnl'],
+    })
+    coin_alpha['pnl_range'] = coin_alpha['best_avg_pnl'] - coin_alpha['worst_avg_pnl']
+    coin_alpha = (coin_alpha[coin_alpha['pnl_range'] > params['coin_min_range']]
+                  .sort_values('pnl_range', ascending=False).head(params['top_coins'])
+                  .reset_index())
+
+    # INSIGHT 4: PnL by size bucket
+    size = rollup(closed, ['classification', 'size_category'])['avg_pnl'].sort_index().reset_index()
+    size['size_category'] = size['size_category'].astype(object)
+    size_ranges = size.groupby('size_category')['avg_pnl'].agg(['min', 'max'])
+    optimal = size.loc[size.groupby('classification')['avg_pnl'].idxmax()]
+
+    # INSIGHT 5: risk-adjusted returns
+    risk = rollup(closed, 'classification')[['avg_pnl', 'std_pnl', 'win_rate']]
+    risk['sharpe_like'] = risk['avg_pnl'] / risk['std_pnl']
+    risk = risk[['avg_pnl', 'std_pnl', 'sharpe_like', 'win_rate']]
+    risk = risk.sort_values('sharpe_like', ascending=False).reset_index()
+
+    return {
+        'overview': overview,
+        'sentiment': sentiment.reset_index(),
+        'position': position.reset_index(),
+        'top_traders': top_traders,
+        'coin_alpha': coin_alpha,
+        'size': size,
+        'size_ranges': size_ranges.reset_index(),
+        'optimal_size': optimal,
+        'risk': risk,
+    }
+
+
+def load_report_results(params=REPORT_PARAMS):
+    key = fingerprint([STORE_DIR, SENTIMENT_FILE], params, code=['report_results.py'])
+    results = cached_results('report', key, lambda: compute_report_results(params))
+    results['tests'] = hypothesis_results()
+    results['cis'] = bootstrap_results()
+    return results
@@ -0,0 +1,168 @@
+"""Bootstrap confidence intervals and permutation p-values for the report figures.
+
+    python resampling.py [--n-boot 10000] [--n-perm 10000] [--block-by-date]
+                         [--memory-mb 512] [--seed 42]
+
+Percentile CIs of avg PnL, win rate and sharpe_like per sentiment, and
+Long/Short permutation p-values. Replicates are drawn in batches sized by
+`memory_mb`; --block-by-date resamples whole trading days.
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+
+from merged_store import SENTIMENT_ORDER, has_sentiment, read_merged
+
+RESAMPLING_COLUMNS = ['date', 'classification', 'position_type', 'Closed.PnL']
+N_BOOT = 10_000
+N_PERM = 10_000
+CI_LEVEL = 0.95
+MEMORY_MB = 512
+METRICS = ['avg_pnl', 'win_rate', 'sharpe_like']
+
+
+def _batch_size(n_cols, bytes_per_cell, memory_mb):
+    """Replicates per batch so a (batch x n_cols) working set fits the budget."""
+    return max(1, int(memory_mb * 2 ** 20 // (max(n_cols, 1) * bytes_per_cell)))
+
+
+def _metrics(count, total, sumsq, wins):
+    mean = total / count
+    with np.errstate(invalid='ignore', divide='ignore'):
+        std = np.sqrt(np.maximum(sumsq - total * mean, 0) / (count - 1))
+        return np.column_stack([mean, wins / count * 100, mean / std])
+
+
+# ===== BOOTSTRAP =====
+
+def bootstrap_iid(x, n_boot=N_BOOT, rng=None, memory_mb=MEMORY_MB):
+    """(n_boot x 3) replicates of METRICS, resampling trades."""
+    rng = rng or np.random.default_rng()
+    x = np.asarray(x, dtype=float)
+    n = len(x)
+    # index (8 B) + gathered value (8 B) + temporaries (~16 B) per cell
+    batch = _batch_size(n, 32, memory_mb)
+    out = np.empty((n_boot, len(METRICS)))
+    for start in range(0, n_boot, batch):
+        b = min(batch, n_boot - start)
+        sample = x[rng.integers(0, n, size=(b, n))]
+        total = sample.sum(axis=1)
+        out[start:start + b] = _metrics(n, total, np.einsum('ij,ij->i', sample, sample),
+                                        (sample > 0).sum(axis=1))
+    return out
+
+
+def bootstrap_days(x, day_codes, n_boot=N_BOOT, rng=None, memory_mb=MEMORY_MB):
+    """(n_boot x 3) replicates of METRICS, resampling whole trading days."""
+    rng = rng or np.random.default_rng()
+    x = np.asarray(x, dtype=float)
+    _, day = np.unique(day_codes, return_inverse=True)
+    day_stats = np.column_stack([
+        np.bincount(day),
+        np.bincount(day, weights=x),
+        np.bincount(day, weights=x * x),
+        np.bincount(day, weights=(x > 0).astype(float)),
+    ])
+    days = len(day_stats)
+    batch = _batch_size(days, 48, memory_mb)
+    out = np.empty((n_boot, len(METRICS)))
+    for start in range(0, n_boot, batch):
+        b = min(batch, n_boot - start)
+        totals = day_stats[rng.integers(0, days, size=(b, days))].sum(axis=1)
+        out[start:start + b] = _metrics(*totals.T)
+    return out
+
+
+def sentiment_bootstrap(closed, n_boot=N_BOOT, block_by_date=False, level=CI_LEVEL,
+                        memory_mb=MEMORY_MB, seed=None):
+    """Point estimate and percentile CI of METRICS for each sentiment."""
+    rng = np.random.default_rng(seed)
+    tail = (1 - level) / 2 * 100
+    rows = []
+    for sentiment in SENTIMENT_ORDER:
+        group = closed[closed['classification'] == sentiment]
+        if len(group) < 2:
+            continue
+        x = group['Closed.PnL'].to_numpy(dtype=float)
+        if block_by_date:
+            reps = bootstrap_days(x, group['date'].to_numpy(), n_boot, rng, memory_mb)
+        else:
+            reps = bootstrap_iid(x, n_boot, rng, memory_mb)
+        point = _metrics(len(x), x.sum(), np.dot(x, x), (x > 0).sum())[0]
+        low, high = np.nanpercentile(reps, [tail, 100 - tail], axis=0)
+        for i, metric in enumerate(METRICS):
+            rows.append((sentiment, metric, point[i], low[i], high[i]))
+    return pd.DataFrame(rows, columns=['classification', 'metric', 'estimate', 'ci_low', 'ci_high'])
+
+
+# ===== PERMUTATION TEST =====
+
+def permutation_gap(x, is_short, n_perm=N_PERM, rng=None, memory_mb=MEMORY_MB):
+    """Two-sided permutation p-value for mean(short) - mean(long)."""
+    rng = rng or np.random.default_rng()
+    x = np.asarray(x, dtype=float)
+    is_short = np.asarray(is_short, dtype=bool)
+    n, n_short = len(x), int(is_short.sum())
+    n_long = n - n_short
+    total = x.sum()
+    observed = x[is_short].mean() - x[~is_short].mean()
+
+    # Only the sum over the first n_short permuted positions is needed
+    batch = _batch_size(n, 16, memory_mb)
+    extreme = 0
+    for start in range(0, n_perm, batch):
+        b = min(batch, n_perm - start)
+        shuffled = rng.permuted(np.broadcast_to(x, (b, n)), axis=1)
+        short_sum = shuffled[:, :n_short].sum(axis=1)
+        gaps = short_sum / n_short - (total - short_sum) / n_long
+        extreme += int(np.sum(np.abs(gaps) >= abs(observed) - 1e-12))
+    return observed, (extreme + 1) / (n_perm + 1)
+
+
+def long_short_permutation(closed, n_perm=N_PERM, memory_mb=MEMORY_MB, seed=None):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for sentiment in SENTIMENT_ORDER:
+        group = closed[(closed['classification'] == sentiment)
+                       & closed['position_type'].isin(['Long', 'Short'])]
+        is_short = (group['position_type'] == 'Short').to_numpy()
+        if is_short.all() or not is_short.any():
+            continue
+        x = group['Closed.PnL'].to_numpy(dtype=float)
+        gap, p = permutation_gap(x, is_short, n_perm, rng, memory_mb)
+        rows.append((sentiment, x[~is_short].mean(), x[is_short].mean(), gap, p))
+    return pd.DataFrame(rows, columns=['classification', 'avg_pnl_Long', 'avg_pnl_Short',
+                                       'short_advantage', 'p_value'])
+
+
+def load_closed_trades():
+    return read_merged(columns=RESAMPLING_COLUMNS,
+                       filter=has_sentiment() & (ds.field('Closed.PnL') != 0))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--n-boot', type=int, default=N_BOOT)
+    parser.add_argument('--n-perm', type=int, default=N_PERM)
+    parser.add_argument('--block-by-date', action='store_true')
+    parser.add_argument('--memory-mb', type=float, default=MEMORY_MB)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    closed = load_closed_trades()
+    unit = "trading days" if args.block_by_date else "trades"
+
+    print("="*70)
+    print(f"BOOTSTRAP CONFIDENCE INTERVALS ({args.n_boot:,} replicates, resampling {unit})")
+    print("="*70)
+    cis = sentiment_bootstrap(closed, args.n_boot, args.block_by_date,
+                              memory_mb=args.memory_mb, seed=args.seed)
+    print(cis.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+    print("\n" + "="*70)
+    print(f"LONG vs SHORT PERMUTATION TESTS ({args.n_perm:,} permutations)")
+    print("="*70)
+    perms = long_short_permutation(closed, args.n_perm, args.memory_mb, seed=args.seed)
+    print(perms.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
@@ -0,0 +1,149 @@
+"""Machine-readable analysis results, cached by a hash of inputs and parameters.
+
+results/<name>-<key>.json, keyed by the SHA-256 of the inputs' contents, the
+parameters and the source of the computing modules and their local imports.
+File digests are memoised on (size, mtime) in results/file_hashes.json.
+"""
+import ast
+import datetime
+import hashlib
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+RESULTS_DIR = "results"
+# Bump when cached numbers change without any hashed source changing (e.g. a
+# library upgrade); code changes are covered by fingerprint(code=...)
+RESULTS_VERSION = 1
+_HASH_MEMO = "file_hashes.json"
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def local_imports(*scripts):
+    """`scripts` and every module next to them that they import, directly or
+    through one another: Python import statements anywhere in the file (lazy
+    ones included) and R source() calls. Missing scripts are skipped."""
+    found, todo = set(), list(scripts)
+    while todo:
+        path = todo.pop()
+        if path in found or not os.path.isfile(path):
+            continue
+        found.add(path)
+        with open(path) as f:
+            text = f.read()
+        if path.endswith('.R'):
+            names = re.findall(r'source\("([^"]+)"\)', text)
+        else:
+            names = []
+            for node in ast.walk(ast.parse(text)):
+                if isinstance(node, ast.Import):
+                    names += [f"{alias.name.split('.')[0]}.py" for alias in node.names]
+                elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                    names.append(f"{node.module.split('.')[0]}.py")
+        todo += [os.path.join(os.path.dirname(path), name) for name in names]
+    return sorted(found)
+
+
+def _input_files(path):
+    """Files under `path` (or `path` itself), skipping _/. prefixed entries
+    such as merged_store/_state."""
+    if os.path.isfile(path):
+        return [path]
+    files = []
+    for root, dirs, names in os.walk(path):
+        dirs[:] = sorted(d for d in dirs if not d.startswith(('_', '.')))
+        files.extend(os.path.join(root, n) for n in sorted(names) if not n.startswith(('_', '.')))
+    return files
+
+
+def _load_memo(results_dir):
+    try:
+        with open(os.path.join(results_dir, _HASH_MEMO)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def file_digest(path, memo=None):
+    st = os.stat(path)
+    stamp = [st.st_size, st.st_mtime_ns]
+    if memo is not None and memo.get(path, [None])[:2] == stamp:
+        return memo[path][2]
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    digest = h.hexdigest()
+    if memo is not None:
+        memo[path] = stamp + [digest]
+    return digest
+
+
+def fingerprint(inputs, params=None, results_dir=RESULTS_DIR, code=()):
+    """SHA-256 over the contents of `inputs` (files or directories), `params`
+    and the local_imports() of the `code` modules of this repository."""
+    memo = _load_memo(results_dir)
+    h = hashlib.sha256()
+    h.update(f"v{RESULTS_VERSION}".encode())
+    for path in inputs:
+        for file in _input_files(path):
+            h.update(os.path.relpath(file).encode())
+            h.update(file_digest(file, memo).encode())
+    # By file name, so the key does not depend on where the repository lives
+    for file in local_imports(*[os.path.join(HERE, module) for module in code]):
+        h.update(os.path.basename(file).encode())
+        h.update(file_digest(file, memo).encode())
+    h.update(json.dumps(params or {}, sort_keys=True, default=str).encode())
+    os.makedirs(results_dir, exist_ok=True)
+    # Replace atomically: pipeline.py stages fingerprint concurrently
+    tmp = os.path.join(results_dir, f"{_HASH_MEMO}.{os.getpid()}")
+    with open(tmp, 'w') as f:
+        json.dump(memo, f)
+    os.replace(tmp, os.path.join(results_dir, _HASH_MEMO))
+    return h.hexdigest()
+
+
+def _to_builtin(obj):
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, (pd.Timestamp, datetime.date)):
+        return obj.isoformat()
+    if isinstance(obj, pd.DataFrame):
+        return obj.to_dict('records')
+    if isinstance(obj, pd.Series):
+        return obj.to_dict()
+    raise TypeError(f"Cannot serialise {type(obj).__name__}")
+
+
+def result_path(name, key, results_dir=RESULTS_DIR):
+    return os.path.join(results_dir, f"{name}-{key[:16]}.json")
+
+
+def load_results(name, key, results_dir=RESULTS_DIR):
+    try:
+        with open(result_path(name, key, results_dir)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_results(name, key, results, results_dir=RESULTS_DIR):
+    os.makedirs(results_dir, exist_ok=True)
+    path = result_path(name, key, results_dir)
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, default=_to_builtin)
+    # Round-trip so callers always see the same (JSON) types as a cache hit
+    return load_results(name, key, results_dir)
+
+
+def cached_results(name, key, compute, results_dir=RESULTS_DIR):
+    """Results for `key` from disk, or compute() them and store them."""
+    results = load_results(name, key, results_dir)
+    if results is None:
+        results = save_results(name, key, compute(), results_dir)
+    return results
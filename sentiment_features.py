@@ -0,0 +1,127 @@
+"""Rolling / lagged Fear & Greed features attached to fills by an as-of join.
+
+    python sentiment_features.py [--boundary IST|UTC|published] [--max-lag 3]
+
+attach_features() gives each fill the latest reading in force at its epoch
+Timestamp (one binary search per fill). `boundary` sets when a reading takes
+effect: IST midnight (the 02_data_merging.R date join), UTC midnight, or its
+published timestamp.
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+from scipy import stats
+
+from merged_store import SENTIMENT_ORDER, read_merged
+from rank_engine import RankEngine
+
+SENTIMENT_FILE = "fear_greed_index.csv"
+WINDOWS = (7, 30)
+BOUNDARIES = {'IST': 'Asia/Kolkata', 'UTC': 'UTC', 'published': None}
+DAY_MS = 86_400_000
+
+
+def index_features(path=SENTIMENT_FILE, windows=WINDOWS):
+    """One row per reading (sorted by date) with the rolling features."""
+    index = pd.read_csv(path)
+    index['date'] = pd.to_datetime(index['date'])
+    index = index.drop_duplicates('date', keep='last').sort_values('date').reset_index(drop=True)
+
+    # Calendar-daily series so windows and lags are in days, not readings
+    daily = index.set_index('date')['value'].astype(float).asfreq('D')
+    features = index[['date', 'timestamp', 'value', 'classification']].copy()
+    for n in windows:
+        mean = daily.rolling(n, min_periods=max(2, n // 2)).mean()
+        std = daily.rolling(n, min_periods=max(2, n // 2)).std()
+        features[f'mean_{n}d'] = mean.reindex(index['date']).to_numpy()
+        features[f'std_{n}d'] = std.reindex(index['date']).to_numpy()
+        features[f'momentum_{n}d'] = (daily - daily.shift(n)).reindex(index['date']).to_numpy()
+        features[f'zscore_{n}d'] = ((daily - mean) / std).reindex(index['date']).to_numpy()
+
+    changed = index['classification'].ne(index['classification'].shift())
+    features['regime_run'] = index.groupby(changed.cumsum()).cumcount() + 1
+    features['prev_classification'] = index['classification'].shift()
+    return features
+
+
+def reading_starts(features, boundary='IST', lag_days=0):
+    """Epoch ms from which each reading is in force."""
+    if boundary not in BOUNDARIES:
+        raise ValueError(f"boundary must be one of {list(BOUNDARIES)}, got {boundary!r}")
+    if boundary == 'published':
+        starts = features['timestamp'].to_numpy(dtype=np.int64) * 1000
+    else:
+        local = features['date'].dt.tz_localize(BOUNDARIES[boundary]).dt.tz_convert('UTC')
+        starts = local.dt.tz_localize(None).to_numpy().astype('datetime64[ms]').astype(np.int64)
+    return starts + lag_days * DAY_MS
+
+
+def attach_features(timestamps, features, boundary='IST', lag_days=0, tolerance_days=1):
+    """Feature rows aligned with `timestamps` (epoch ms); NaN where no
+    reading is in force."""
+    starts = reading_starts(features, boundary, lag_days)
+    order = np.argsort(starts, kind='stable')
+    starts = starts[order]
+    ts = np.asarray(timestamps, dtype=np.int64)
+    pos = np.searchsorted(starts, ts, side='right') - 1
+    valid = (pos >= 0) & (ts - starts[np.clip(pos, 0, None)] < tolerance_days * DAY_MS)
+    rows = features.iloc[order[np.clip(pos, 0, None)]].reset_index(drop=True)
+    rows = rows.drop(columns=['timestamp'])
+    return rows.where(pd.Series(valid), None).rename(columns={'date': 'reading_date'})
+
+
+def load_fill_features(columns=('Timestamp', 'Closed.PnL', 'position_type'), filter=None,
+                       boundary='IST', lag_days=0, windows=WINDOWS):
+    """Fills from the merged store with the as-of sentiment features."""
+    fills = read_merged(columns=list(dict.fromkeys(['Timestamp', *columns])), filter=filter)
+    attached = attach_features(fills['Timestamp'], index_features(windows=windows), boundary, lag_days)
+    return pd.concat([fills.reset_index(drop=True), attached], axis=1)
+
+
+# ===== MOMENTUM / LAG CHECKS (report "future research") =====
+
+def lag_tests(closed, features, boundary, max_lag):
+    """Kruskal-Wallis of PnL across the sentiment in force lag_days earlier."""
+    pnl_ranks = RankEngine(closed['Closed.PnL'])
+    rows = []
+    for lag in range(max_lag + 1):
+        attached = attach_features(closed['Timestamp'], features, boundary, lag)
+        codes = pd.Categorical(attached['classification'], categories=SENTIMENT_ORDER).codes
+        # Unmatched fills (code -1) are excluded
+        h, p = pnl_ranks.kruskal(codes)
+        rows.append({'lag_days': lag, 'matched': int((codes >= 0).sum()), 'kruskal_h': h, 'p_value': p})
+    return pd.DataFrame(rows)
+
+
+def momentum_tests(closed, attached, windows=WINDOWS):
+    """Spearman of PnL against each rolling feature."""
+    rows = []
+    for name in [f'{kind}_{n}d' for n in windows for kind in ('momentum', 'zscore')] + ['regime_run']:
+        x = pd.to_numeric(attached[name], errors='coerce').to_numpy()
+        ok = ~np.isnan(x)
+        rho, p = stats.spearmanr(x[ok], closed['Closed.PnL'].to_numpy()[ok]) if ok.sum() > 2 else (np.nan, np.nan)
+        rows.append({'feature': name, 'n': int(ok.sum()), 'spearman_rho': rho, 'p_value': p})
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--boundary', choices=list(BOUNDARIES), default='IST')
+    parser.add_argument('--max-lag', type=int, default=3)
+    args = parser.parse_args()
+
+    features = index_features()
+    closed = read_merged(columns=['Timestamp', 'Closed.PnL'], filter=ds.field('Closed.PnL') != 0)
+    attached = attach_features(closed['Timestamp'], features, args.boundary)
+
+    print("="*70)
+    print(f"SENTIMENT LAG (as-of join, {args.boundary} boundary)")
+    print("="*70)
+    print(lag_tests(closed, features, args.boundary, args.max_lag).to_string(index=False))
+
+    print("\n" + "="*70)
+    print("SENTIMENT MOMENTUM / Z-SCORE / REGIME RUN vs PnL")
+    print("="*70)
+    print(momentum_tests(closed, attached).to_string(index=False))
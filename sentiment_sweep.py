@@ -0,0 +1,184 @@
+"""Per-coin / per-account sweep of the H1-H4 battery from 05_statistical_analysis.py.
+
+    python sentiment_sweep.py [--by Coin Account] [--workers N] [--min-trades 20]
+
+Groups are contiguous slices of shared-memory columns; workers run H1-H4 per
+group and the p-values are Benjamini-Hochberg adjusted together into
+sentiment_sweep.csv.
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+from scipy import stats
+
+from merged_store import SENTIMENT_ORDER, has_sentiment, read_merged, side_codes
+from rank_engine import RankEngine, chi2_contingency
+from trader_loader import decode_ids
+
+SWEEP_COLUMNS = ['Coin', 'Account', 'classification', 'position_type', 'is_win',
+                 'Size.USD', 'Closed.PnL']
+MIN_TRADES = 20
+MIN_SIDE_TRADES = 5
+FDR_ALPHA = 0.05
+OUTPUT_FILE = "sentiment_sweep.csv"
+
+_columns = {}
+_segments = []
+
+
+# ===== SHARED-MEMORY COLUMN BUFFERS =====
+
+def _share(arrays):
+    """Copy arrays into shared memory; returns (segments, specs for workers)."""
+    segments, specs = [], {}
+    for name, arr in arrays.items():
+        arr = np.ascontiguousarray(arr)
+        shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+        np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[:] = arr
+        segments.append(shm)
+        specs[name] = (shm.name, arr.shape, arr.dtype.str)
+    return segments, specs
+
+
+def _attach(specs):
+    for name, (shm_name, shape, dtype) in specs.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        _segments.append(shm)
+        _columns[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+# ===== PER-GROUP TEST BATTERY =====
+
+def _group_tests(task):
+    by, group, start, stop = task
+    sentiment = _columns['sentiment'][start:stop]
+    side = _columns['side'][start:stop]
+    win = _columns['win'][start:stop]
+    size = _columns['size'][start:stop]
+    pnl_ranks = RankEngine(_columns['pnl'][start:stop])
+    n = stop - start
+    rows = []
+
+    # H1: PnL across sentiments
+    present = np.bincount(sentiment, minlength=len(SENTIMENT_ORDER)) > 0
+    if present.sum() >= 2:
+        h, p = pnl_ranks.kruskal(sentiment)
+        rows.append((by, group, 'H1 kruskal', '', n, h, p))
+
+    # H2: win rate across sentiments
+    table = np.bincount(sentiment * 2 + win, minlength=len(SENTIMENT_ORDER) * 2)
+    table = table.reshape(-1, 2)
+    table = table[table.sum(axis=1) > 0]
+    table = table[:, table.sum(axis=0) > 0]
+    if table.shape[0] >= 2 and table.shape[1] == 2:
+        chi2, p, _, _ = chi2_contingency(table)
+        rows.append((by, group, 'H2 chi2', '', n, chi2, p))
+
+    # H3: Long vs Short within each sentiment
+    for code, name in enumerate(SENTIMENT_ORDER):
+        long_mask = (sentiment == code) & (side == 0)
+        short_mask = (sentiment == code) & (side == 1)
+        n_long, n_short = long_mask.sum(), short_mask.sum()
+        if min(n_long, n_short) >= MIN_SIDE_TRADES:
+            u, p = pnl_ranks.mannwhitney(long_mask, short_mask)
+            rows.append((by, group, 'H3 mannwhitney', name, n_long + n_short, u, p))
+
+    # H4: size vs PnL
+    has_size = ~np.isnan(size)
+    if has_size.sum() >= 3:
+        mask = None if has_size.all() else has_size
+        rho, p = RankEngine(size).spearman(pnl_ranks, mask=mask)
+        rows.append((by, group, 'H4 spearman', '', int(has_size.sum()), rho, p))
+
+    return [r for r in rows if np.isfinite(r[-1])]
+
+
+def _tasks(by, keys, min_trades):
+    """(by, group code, start, stop) for every group with enough trades,
+    largest first so the pool stays balanced."""
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+    stops = np.r_[starts[1:], len(sorted_keys)]
+    tasks = [(by, int(sorted_keys[a]), a, b) for a, b in zip(starts, stops) if b - a >= min_trades]
+    tasks.sort(key=lambda t: t[2] - t[3])
+    return order, tasks
+
+
+def benjamini_hochberg(p_values):
+    p = np.asarray(p_values, dtype=float)
+    if len(p) == 0:
+        return p
+    return stats.false_discovery_control(p, method='bh')
+
+
+def run_sweep(by=('Coin', 'Account'), workers=None, min_trades=MIN_TRADES):
+    closed = read_merged(columns=SWEEP_COLUMNS,
+                         filter=has_sentiment() & (ds.field('Closed.PnL') != 0))
+    closed = closed[closed['classification'].isin(SENTIMENT_ORDER)]
+    coins = closed['Coin'].astype('category')
+    keys = {'Coin': coins.cat.codes.to_numpy(), 'Account': closed['Account'].to_numpy(dtype=np.int64)}
+
+    results = []
+    for kind in by:
+        order, tasks = _tasks(kind, keys[kind], min_trades)
+        segments, specs = _share({
+            'sentiment': pd.Categorical(closed['classification'],
+                                        categories=SENTIMENT_ORDER).codes.astype(np.int64)[order],
+            'side': side_codes(closed['position_type']).astype(np.int8)[order],
+            'win': closed['is_win'].to_numpy(dtype=np.int64)[order],
+            'size': closed['Size.USD'].to_numpy(dtype=float)[order],
+            'pnl': closed['Closed.PnL'].to_numpy(dtype=float)[order],
+        })
+        try:
+            with ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                                     initializer=_attach, initargs=(specs,)) as pool:
+                for rows in pool.map(_group_tests, tasks, chunksize=8):
+                    results.extend(rows)
+        finally:
+            for shm in segments:
+                shm.close()
+                shm.unlink()
+
+    out = pd.DataFrame(results, columns=['by', 'group', 'test', 'sentiment', 'n',
+                                         'statistic', 'p_value'])
+    out['q_value'] = benjamini_hochberg(out['p_value'])
+    out['significant'] = out['q_value'] < FDR_ALPHA
+
+    # Human-readable group labels
+    coin_names = np.asarray(coins.cat.categories, dtype=object)
+    is_coin = out['by'] == 'Coin'
+    labels = pd.Series('', index=out.index, dtype=object)
+    labels[is_coin] = coin_names[out.loc[is_coin, 'group'].to_numpy(dtype=np.int64)]
+    accounts = decode_ids(out.loc[~is_coin, ['group']].rename(columns={'group': 'Account'}), ['Account'])
+    labels[~is_coin] = accounts['Account'].to_numpy(dtype=object)
+    out['group'] = labels
+    return out.sort_values(['q_value', 'p_value']).reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--by', nargs='+', default=['Coin', 'Account'], choices=['Coin', 'Account'])
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--min-trades', type=int, default=MIN_TRADES)
+    args = parser.parse_args()
+
+    print("="*70)
+    print("PER-COIN / PER-ACCOUNT SENTIMENT TEST SWEEP")
+    print("="*70)
+    sweep = run_sweep(tuple(args.by), args.workers, args.min_trades)
+    sweep.to_csv(OUTPUT_FILE, index=False)
+
+    print(f"\nTests run: {len(sweep)}")
+    print(f"Significant after Benjamini-Hochberg (q < {FDR_ALPHA}): {sweep['significant'].sum()}")
+    if sweep['significant'].any():
+        print("\nSignificant tests by type:")
+        print(sweep[sweep['significant']].groupby(['by', 'test']).size().unstack(fill_value=0))
+    print("\nTop 20 results:")
+    print(sweep.head(20).to_string(index=False))
+    print(f"\n✓ Full results saved as '{OUTPUT_FILE}'")
@@ -0,0 +1,251 @@
+"""Rank correlation and quantile regression of Closed.PnL on trade size (H4 in depth).
+
+    python size_pnl.py [--by classification Coin] [--controls Coin Account classification]
+                       [--quantiles 0.1 0.5 0.9] [--weight fill|account] [--top-coins 10]
+
+Over the closed fills, for the whole sample and each --by slice: Spearman,
+Kendall tau-b and the Spearman rho after absorbing the --controls fixed
+effects. --weight account counts every account once (Kendall stays
+unweighted). The quantile regressions fit Closed.PnL on log1p(Size.USD) per
+sentiment; `interaction` is each slope minus the Neutral one. Results are
+cached in results/ and written to size_pnl.csv and size_pnl_quantiles.csv.
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+from scipy import stats
+
+from merged_store import SENTIMENT_ORDER, STORE_DIR, has_sentiment, read_merged
+from rank_engine import RankEngine, spearman_p
+from results_cache import cached_results, fingerprint
+from tracing import span
+
+CONTROLS = ['Coin', 'Account', 'classification']
+BY = ['classification', 'Coin']
+QUANTILES = [0.1, 0.5, 0.9]
+TOP_COINS = 10
+REFERENCE = 'Neutral'
+OUTPUT_FILE = "size_pnl.csv"
+QUANTILE_FILE = "size_pnl_quantiles.csv"
+SIZE_COLUMNS = ['Size.USD', 'Closed.PnL', 'Coin', 'Account', 'classification']
+
+
+def load_closed_fills(path=STORE_DIR):
+    df = read_merged(columns=SIZE_COLUMNS, path=path,
+                     filter=has_sentiment() & (ds.field('Closed.PnL') != 0) & ds.field('Size.USD').is_valid())
+    df['classification'] = df['classification'].astype(object)
+    return df
+
+
+# ===== FIXED EFFECTS =====
+
+def absorb(values, codes, weights=None, tol=1e-8, max_iter=1000):
+    """Residuals of `values` on the fixed effects of every factor in `codes`
+    (one array of integer level codes per factor) and the number of levels
+    absorbed beyond the intercept."""
+    w = np.ones(len(values)) if weights is None else np.asarray(weights, dtype=float)
+    resid = np.asarray(values, dtype=float) - np.average(values, weights=w)
+    totals = [np.bincount(c, weights=w) for c in codes]
+    dof = sum(int((total > 0).sum()) - 1 for total in totals)
+    scale = resid.std() or 1.0
+    for _ in range(max_iter if len(codes) > 1 else 1):
+        moved = 0.0
+        for c, total in zip(codes, totals):
+            means = np.bincount(c, weights=w * resid, minlength=len(total)) / np.where(total > 0, total, 1)
+            resid -= means[c]
+            moved = max(moved, np.abs(means).max())
+        if moved <= tol * scale:
+            break
+    return resid, dof
+
+
+def weighted_corr(x, y, weights=None):
+    if weights is None:
+        return np.corrcoef(x, y)[0, 1]
+    x = x - np.average(x, weights=weights)
+    y = y - np.average(y, weights=weights)
+    return np.sum(weights * x * y) / np.sqrt(np.sum(weights * x * x) * np.sum(weights * y * y))
+
+
+def account_weights(account_codes):
+    """1 / (the account's fills), so every account sums to one."""
+    return 1.0 / np.bincount(account_codes)[account_codes]
+
+
+def effective_n(weights):
+    """Kish's effective sample size, sum(w)^2 / sum(w^2)."""
+    return np.sum(weights) ** 2 / np.sum(weights ** 2)
+
+
+# ===== CORRELATIONS =====
+
+def correlations(size_ranks, pnl_ranks, control_codes, mask=None, accounts=None):
+    """[(method, estimate, p, n)] over the fills in `mask`. With `accounts`
+    (account codes) every account in the slice carries the same weight and
+    the Spearman p-values use the Kish effective n."""
+    use = slice(None) if mask is None else mask
+    x, _ = size_ranks.ranks(mask)
+    y, _ = pnl_ranks.ranks(mask)
+    x, y = x[use], y[use]
+    n = len(x)
+    weights = None if accounts is None else account_weights(pd.factorize(accounts[use])[0])
+    n_eff = n if weights is None else effective_n(weights)
+
+    rho = weighted_corr(x, y, weights)
+    tau, tau_p = size_ranks.kendall(pnl_ranks, mask)
+    slice_codes = [c[use] for c in control_codes]
+    x_resid, dof = absorb(x, slice_codes, weights)
+    y_resid, _ = absorb(y, slice_codes, weights)
+    partial = weighted_corr(x_resid, y_resid, weights)
+    return [('spearman', rho, spearman_p(rho, n_eff), n),
+            ('kendall', tau, tau_p, n),
+            ('partial_spearman', partial, spearman_p(partial, n_eff - dof) if n_eff - dof > 2 else np.nan, n)]
+
+
+def slices(fills, by=BY, top_coins=TOP_COINS):
+    """(slice_by, name, mask): every sentiment, the top coins by closed
+    fills, every value of any other column."""
+    for slice_by in by:
+        values = fills[slice_by]
+        if slice_by == 'classification':
+            names = [s for s in SENTIMENT_ORDER if (values == s).any()]
+        elif slice_by == 'Coin':
+            names = values.value_counts().index[:top_coins].tolist()
+        else:
+            names = values.value_counts().index.tolist()
+        for name in names:
+            yield slice_by, name, (values == name).to_numpy()
+
+
+def correlation_table(fills, by=BY, controls=CONTROLS, weight='fill', top_coins=TOP_COINS):
+    size_ranks = RankEngine(fills['Size.USD'])
+    pnl_ranks = RankEngine(fills['Closed.PnL'])
+    control_codes = [pd.factorize(fills[c])[0] for c in controls]
+    accounts = fills['Account'].to_numpy() if weight == 'account' else None
+    rows = []
+    for slice_by, name, mask in [('all', 'all', None), *slices(fills, by, top_coins)]:
+        n = len(fills) if mask is None else int(mask.sum())
+        if n < 4:
+            continue
+        with span(f"correlations_{slice_by}", rows_in=n, slice=str(name)):
+            result = correlations(size_ranks, pnl_ranks, control_codes, mask, accounts)
+        rows += [{'slice_by': slice_by, 'slice': name, 'method': method, 'estimate': estimate, 'p': p, 'n': n}
+                 for method, estimate, p, n in result]
+    return pd.DataFrame(rows)
+
+
+# ===== QUANTILE REGRESSION =====
+
+def hall_sheather(n, q, alpha=0.05):
+    z = stats.norm.ppf(q)
+    return (n ** (-1 / 3) * stats.norm.ppf(1 - alpha / 2) ** (2 / 3)
+            * (1.5 * stats.norm.pdf(z) ** 2 / (2 * z ** 2 + 1)) ** (1 / 3))
+
+
+def quantile_fit(x, y, q, tol=1e-6, max_iter=1000):
+    """Intercept and slope of the q-th conditional quantile of y on x by
+    iteratively reweighted least squares, with their robust covariance."""
+    X = np.column_stack([np.ones(len(x)), x])
+    beta = np.linalg.lstsq(X, y, rcond=None)[0]
+    for _ in range(max_iter):
+        resid = y - X @ beta
+        # |check loss| = w * resid^2 at the current residuals
+        w = np.where(resid > 0, q, 1 - q) / np.maximum(np.abs(resid), 1e-6)
+        Xw = X * w[:, None]
+        new = np.linalg.solve(X.T @ Xw, Xw.T @ y)
+        done = np.abs(new - beta).max() <= tol * (1 + np.abs(beta).max())
+        beta = new
+        if done:
+            break
+
+    n = len(y)
+    resid = y - X @ beta
+    h = hall_sheather(n, q)
+    iqr = np.subtract(*np.percentile(resid, [75, 25]))
+    h = min(np.std(y), iqr / 1.34) * (stats.norm.ppf(min(q + h, 1 - 1e-9)) - stats.norm.ppf(max(q - h, 1e-9)))
+    u = resid / h
+    # Epanechnikov kernel density of the residuals at zero
+    f0 = np.sum(0.75 * (1 - u ** 2) * (np.abs(u) <= 1)) / (n * h)
+    d = np.where(resid > 0, (q / f0) ** 2, ((1 - q) / f0) ** 2)
+    xtx_inv = np.linalg.pinv(X.T @ X)
+    return beta, xtx_inv @ (X.T * d) @ X @ xtx_inv
+
+
+def quantile_table(fills, quantiles=QUANTILES, reference=REFERENCE):
+    """Per quantile: the pooled fit and one fit per sentiment (the
+    sentiment-interacted model), with each slope's difference from the
+    reference sentiment's."""
+    log_size = np.log1p(fills['Size.USD'].to_numpy())
+    pnl = fills['Closed.PnL'].to_numpy()
+    sentiments = [s for s in SENTIMENT_ORDER if (fills['classification'] == s).any()]
+    reference = reference if reference in sentiments else sentiments[0]
+    rows = []
+    for q in quantiles:
+        with span("quantile_regression", rows_in=len(fills), q=q):
+            fits = {'all': quantile_fit(log_size, pnl, q)}
+            for sentiment in sentiments:
+                mask = (fills['classification'] == sentiment).to_numpy()
+                fits[sentiment] = quantile_fit(log_size[mask], pnl[mask], q)
+        ref_slope, ref_cov = fits[reference][0][1], fits[reference][1][1, 1]
+        for name, (beta, cov) in fits.items():
+            se = np.sqrt(cov[1, 1])
+            row = {'q': q, 'classification': name, 'intercept': beta[0], 'slope': beta[1], 'slope_se': se,
+                   'slope_p': 2 * stats.norm.sf(abs(beta[1] / se)), 'interaction': np.nan,
+                   'interaction_p': np.nan}
+            if name not in ('all', reference):
+                row['interaction'] = beta[1] - ref_slope
+                row['interaction_p'] = 2 * stats.norm.sf(abs(row['interaction']) / np.sqrt(cov[1, 1] + ref_cov))
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def size_pnl_results(by=BY, controls=CONTROLS, quantiles=QUANTILES, weight='fill', top_coins=TOP_COINS,
+                     path=STORE_DIR):
+    """Both tables as records, cached under the store's fingerprint."""
+    params = {'by': list(by), 'controls': list(controls), 'quantiles': list(quantiles), 'weight': weight,
+              'top_coins': top_coins}
+
+    def compute():
+        with span("load_closed_fills") as s:
+            fills = load_closed_fills(path)
+            s.rows_out = len(fills)
+        return {'correlations': correlation_table(fills, by, controls, weight, top_coins).to_dict('records'),
+                'quantiles': quantile_table(fills, quantiles).to_dict('records')}
+
+    return cached_results('size_pnl', fingerprint([path], params, code=['size_pnl.py']), compute)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--by', nargs='+', default=BY, metavar='COLUMN')
+    parser.add_argument('--controls', nargs='*', default=CONTROLS, metavar='COLUMN')
+    parser.add_argument('--quantiles', nargs='+', type=float, default=QUANTILES)
+    parser.add_argument('--weight', choices=['fill', 'account'], default='fill')
+    parser.add_argument('--top-coins', type=int, default=TOP_COINS)
+    args = parser.parse_args()
+    unknown = set(args.by + args.controls) - set(SIZE_COLUMNS[2:])
+    if unknown:
+        parser.error(f"unknown column(s): {', '.join(sorted(unknown))} (choose from {', '.join(SIZE_COLUMNS[2:])})")
+
+    results = size_pnl_results(args.by, args.controls, args.quantiles, args.weight, args.top_coins)
+    correlations_df = pd.DataFrame(results['correlations'])
+    quantiles_df = pd.DataFrame(results['quantiles'])
+    correlations_df.to_csv(OUTPUT_FILE, index=False)
+    quantiles_df.to_csv(QUANTILE_FILE, index=False)
+
+    print("="*70)
+    print(f"SIZE vs PnL: RANK CORRELATIONS (closed fills, controls: {', '.join(args.controls) or 'none'})")
+    print("="*70)
+    wide = correlations_df.pivot_table(index=['slice_by', 'slice'], columns='method', values=['estimate', 'p'],
+                                       sort=False)
+    wide.columns = [f"{method}_{stat}" if stat == 'p' else method for stat, method in wide.columns]
+    wide['n'] = correlations_df.groupby(['slice_by', 'slice'], sort=False)['n'].first()
+    print(wide.to_string(float_format=lambda v: f"{v:,.4f}"))
+
+    print("\n" + "="*70)
+    print("QUANTILE REGRESSION: Closed.PnL ~ sentiment x log1p(Size.USD)")
+    print("="*70)
+    print(quantiles_df.set_index(['q', 'classification']).to_string(float_format=lambda v: f"{v:,.4f}"))
+    print(f"\n✓ Results saved to '{OUTPUT_FILE}' and '{QUANTILE_FILE}'")
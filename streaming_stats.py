@@ -0,0 +1,269 @@
+"""Chunked, bounded-memory version of the H1-H4 tests in 05_statistical_analysis.py.
+
+State is O(groups x bins): PnL histograms over signed log bins (H1/H3 are the
+exact tests on PnL rounded to exp(width) - 1), exact contingency counts (H2)
+and sparse joint size/PnL bin counts (H4, within h4_error_bound() of the
+exact rho).
+"""
+import numpy as np
+import pandas as pd
+
+from merged_store import SENTIMENT_ORDER, open_store, has_sentiment, side_codes
+from rank_engine import chi2_contingency, kruskal_from_ranks, mannwhitney_from_ranks, spearman_p
+
+STREAM_COLUMNS = ['classification', 'position_type', 'is_win', 'Size.USD', 'Closed.PnL']
+CHUNK_ROWS = 1_000_000
+
+
+class LogBins:
+    """Signed log-spaced bins: x -> sign(x) * floor(log1p(|x|) / width)."""
+
+    def __init__(self, width=1e-3, max_abs=1e9):
+        self.width = width
+        self.half = int(np.log1p(max_abs) / width) + 1
+        self.nbins = 2 * self.half + 1
+
+    def index(self, x):
+        k = np.minimum(np.floor(np.log1p(np.abs(x)) / self.width), self.half)
+        return (np.sign(x) * k).astype(np.int64) + self.half
+
+    def centers(self):
+        k = np.arange(self.nbins) - self.half
+        return np.sign(k) * np.expm1((np.abs(k) + 0.5) * self.width)
+
+
+class RunningMoments:
+    """Per-group count, mean and sum of squared deviations (Welford/Chan)."""
+
+    def __init__(self, groups):
+        self.n = np.zeros(groups)
+        self.mean = np.zeros(groups)
+        self.m2 = np.zeros(groups)
+
+    def update(self, g, x):
+        groups = len(self.n)
+        n_b = np.bincount(g, minlength=groups).astype(float)
+        mean_b = np.bincount(g, weights=x, minlength=groups) / np.maximum(n_b, 1)
+        dev = x - mean_b[g]
+        m2_b = np.bincount(g, weights=dev * dev, minlength=groups)
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        safe_n = np.maximum(n, 1)
+        self.mean = self.mean + delta * n_b / safe_n
+        self.m2 = self.m2 + m2_b + delta ** 2 * self.n * n_b / safe_n
+        self.n = n
+
+    def std(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.sqrt(self.m2 / (self.n - 1))
+
+
+class SparseCounts:
+    """Counts of int64 keys, merged chunk by chunk."""
+
+    def __init__(self):
+        self.keys = np.empty(0, dtype=np.int64)
+        self.counts = np.empty(0, dtype=np.int64)
+
+    def add(self, keys):
+        chunk_keys, chunk_counts = np.unique(keys, return_counts=True)
+        keys = np.concatenate([self.keys, chunk_keys])
+        counts = np.concatenate([self.counts, chunk_counts])
+        self.keys, inverse = np.unique(keys, return_inverse=True)
+        self.counts = np.bincount(inverse, weights=counts).astype(np.int64)
+
+
+# ===== RANK STATISTICS FROM BINNED COUNTS =====
+
+def _midranks(total):
+    return np.cumsum(total) - total + (total + 1) / 2.0
+
+
+def _tie_sum(total):
+    return np.sum(total ** 3 - total)
+
+
+def kruskal_from_hist(hist):
+    hist = hist[hist.sum(axis=1) > 0].astype(float)
+    total = hist.sum(axis=0)
+    return kruskal_from_ranks(hist @ _midranks(total), hist.sum(axis=1), _tie_sum(total))
+
+
+def mannwhitney_from_hist(h1, h2):
+    h1 = h1.astype(float)
+    h2 = h2.astype(float)
+    total = h1 + h2
+    return mannwhitney_from_ranks(h1 @ _midranks(total), h1.sum(), h2.sum(), _tie_sum(total))
+
+
+def spearman_from_counts(ix, iy, counts):
+    w = counts.astype(float)
+    n = w.sum()
+    rx = _midranks(np.bincount(ix, weights=w))[ix]
+    ry = _midranks(np.bincount(iy, weights=w))[iy]
+    mx = np.sum(w * rx) / n
+    my = np.sum(w * ry) / n
+    cov = np.sum(w * (rx - mx) * (ry - my))
+    rho = cov / np.sqrt(np.sum(w * (rx - mx) ** 2) * np.sum(w * (ry - my) ** 2))
+    return rho, spearman_p(rho, n)
+
+
+def spearman_error_bound(ix, iy, counts):
+    """Upper bound on |rho - exact rho| caused by the binning.
+
+    A fill's exact mid-rank is within (c - 1) / 2 of its bin's (c fills in the
+    bin), so each binned rank vector is a' = a + e with a computable |e|.
+    Correlation is the cosine of the centred vectors, and
+    |cos(a, b) - cos(a', b')| <= 2 |e_a| / |a| + 2 |e_b| / |b|, with
+    |a| >= |a'| - |e_a|.
+    """
+    w = counts.astype(float)
+    bound = 0.0
+    for idx in (ix, iy):
+        c = np.bincount(idx, weights=w)
+        err = np.sqrt(np.sum(c * ((c - 1) / 2) ** 2))
+        r = _midranks(c)[idx]
+        norm = np.sqrt(np.sum(w * (r - np.sum(w * r) / w.sum()) ** 2))
+        if norm <= err:
+            return 2.0
+        bound += 2 * err / (norm - err)
+    return min(bound, 2.0)
+
+
+def hist_median(hist, bins):
+    cum = np.cumsum(hist)
+    if cum[-1] == 0:
+        return np.nan
+    return bins.centers()[np.searchsorted(cum, (cum[-1] + 1) / 2.0)]
+
+
+# ===== STREAMING STATE =====
+
+class StreamingTests:
+    """Sufficient state for H1-H4, updated one record batch at a time."""
+
+    def __init__(self, width=1e-3, joint_width=1e-2):
+        groups = len(SENTIMENT_ORDER)
+        self.bins = LogBins(width)
+        self.joint_bins = LogBins(joint_width)
+        self.pnl_hist = np.zeros((groups, self.bins.nbins), dtype=np.int64)
+        self.side_hist = np.zeros((groups, 2, self.bins.nbins), dtype=np.int64)
+        self.pnl_moments = RunningMoments(groups)
+        self.side_moments = RunningMoments(groups * 2)
+        self.contingency = np.zeros((groups, 2), dtype=np.int64)
+        self.joint = SparseCounts()
+
+    def update(self, batch):
+        sentiment = pd.Categorical(batch['classification'], categories=SENTIMENT_ORDER).codes
+        pnl = batch['Closed.PnL'].to_numpy(dtype=float)
+        # NaN passes pnl != 0 but has no log bin; non-finite PnL is dropped
+        closed = (sentiment >= 0) & (pnl != 0) & np.isfinite(pnl)
+        g = sentiment[closed].astype(np.int64)
+        pnl = pnl[closed]
+        groups = len(SENTIMENT_ORDER)
+        nbins = self.bins.nbins
+
+        b = self.bins.index(pnl)
+        self.pnl_hist += np.bincount(g * nbins + b, minlength=groups * nbins).reshape(groups, nbins)
+        self.pnl_moments.update(g, pnl)
+        win = batch['is_win'].to_numpy(dtype=bool)[closed]
+        self.contingency += np.bincount(g * 2 + win, minlength=groups * 2).reshape(groups, 2)
+
+        side = side_codes(batch['position_type'])[closed]
+        keep = side >= 0
+        gs = g[keep] * 2 + side[keep]
+        self.side_hist += np.bincount(gs * nbins + b[keep],
+                                      minlength=groups * 2 * nbins).reshape(groups, 2, nbins)
+        self.side_moments.update(gs, pnl[keep])
+
+        size = batch['Size.USD'].to_numpy(dtype=float)[closed]
+        valid = np.isfinite(size)
+        ix = self.joint_bins.index(size[valid])
+        iy = self.joint_bins.index(pnl[valid])
+        self.joint.add(ix * self.joint_bins.nbins + iy)
+
+    # ----- Results -----
+
+    def h1(self):
+        return kruskal_from_hist(self.pnl_hist)
+
+    def pnl_summary(self):
+        return pd.DataFrame({
+            'mean': self.pnl_moments.mean,
+            'median': [hist_median(h, self.bins) for h in self.pnl_hist],
+            'std': self.pnl_moments.std(),
+            'count': self.pnl_moments.n.astype(np.int64),
+        }, index=pd.Index(SENTIMENT_ORDER, name='classification'))[self.pnl_moments.n > 0]
+
+    def h2(self):
+        table = pd.DataFrame(self.contingency, columns=pd.Index([0, 1], name='is_win'),
+                             index=pd.Index(SENTIMENT_ORDER, name='classification'))
+        table = table[table.sum(axis=1) > 0]
+        chi2, p, dof, _ = chi2_contingency(table)
+        return table, chi2, p, dof
+
+    def h3(self):
+        rows = []
+        for i, sentiment in enumerate(SENTIMENT_ORDER):
+            long_hist, short_hist = self.side_hist[i]
+            if long_hist.sum() == 0 or short_hist.sum() == 0:
+                continue
+            u, p = mannwhitney_from_hist(long_hist, short_hist)
+            rows.append((sentiment, self.side_moments.mean[2 * i],
+                         self.side_moments.mean[2 * i + 1], u, p))
+        return rows
+
+    def h4(self):
+        nbins = self.joint_bins.nbins
+        return spearman_from_counts(self.joint.keys // nbins, self.joint.keys % nbins,
+                                    self.joint.counts)
+
+    def h4_error_bound(self):
+        nbins = self.joint_bins.nbins
+        return spearman_error_bound(self.joint.keys // nbins, self.joint.keys % nbins,
+                                    self.joint.counts)
+
+
+def stream_tests(chunk_rows=CHUNK_ROWS, **kwargs):
+    state = StreamingTests(**kwargs)
+    for batch in open_store().to_batches(columns=STREAM_COLUMNS, filter=has_sentiment(),
+                                         batch_size=chunk_rows):
+        if batch.num_rows:
+            state.update(batch.to_pandas())
+    return state
+
+
+def run_streaming_tests(chunk_rows=CHUNK_ROWS):
+    """Print the H1-H4 results of 05_statistical_analysis.py from streamed state."""
+    state = stream_tests(chunk_rows)
+    print(f"(streaming mode: {chunk_rows:,}-row chunks, "
+          f"PnL ranks binned at {np.expm1(state.bins.width):.2%} relative resolution)")
+
+    print("\n### H1: Does market sentiment significantly affect trader PnL? ###\n")
+    h_stat, p_value = state.h1()
+    print(f"Kruskal-Wallis H-statistic: {h_stat:.4f}")
+    print(f"P-value: {p_value:.6f}")
+    print("\nPnL by Sentiment (median approximate):")
+    print(state.pnl_summary())
+
+    print("\n\n### H2: Does win rate differ significantly across sentiments? ###\n")
+    table, chi2, p_val, dof = state.h2()
+    print("\nContingency Table:")
+    print(table)
+    print(f"\nChi-square statistic: {chi2:.4f}")
+    print(f"P-value: {p_val:.6f}")
+    print(f"Degrees of freedom: {dof}")
+
+    print("\n\n### H3: Do Long/Short strategies perform differently by sentiment? ###\n")
+    for sentiment, long_avg, short_avg, u_stat, p_val in state.h3():
+        sig = "✓" if p_val < 0.05 else "✗"
+        print(f"{sentiment:15} | Long avg: ${long_avg:8.2f} | Short avg: ${short_avg:8.2f} "
+              f"| U={u_stat:.0f} | p={p_val:.4f} {sig}")
+
+    print("\n\n### H4: Does trade size correlate with profitability? ###\n")
+    corr_coef, p_val = state.h4()
+    print(f"Spearman correlation coefficient: {corr_coef:.4f} "
+          f"(size/PnL binned at {np.expm1(state.joint_bins.width):.1%}, "
+          f"within ±{state.h4_error_bound():.4f} of the exact rho)")
+    print(f"P-value: {p_val:.6f}")
+    return state
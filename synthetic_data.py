@@ -0,0 +1,187 @@
+"""Synthetic historical_data.csv / fear_greed_index.csv for scaling benchmarks.
+
+    python synthetic_data.py 1m [--out bench/1m] [--seed 42] [--chunk-rows 1000000]
+
+Fills with the Output1.txt schema (Zipf-like accounts and coins, lognormal
+size, heavy-tailed PnL with a small sentiment drift) and an AR(1) Fear &
+Greed index, written in time-ordered chunks so memory stays flat.
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pv
+
+from merged_store import SENTIMENT_ORDER
+
+SIZES = {'1m': 1_000_000, '10m': 10_000_000, '100m': 100_000_000}
+N_ACCOUNTS = 32
+N_COINS = 246
+START = "2023-05-01"
+END = "2025-05-01"
+INDEX_START = "2018-02-01"
+CHUNK_ROWS = 1_000_000
+# Lower bounds of the index value for each classification
+INDEX_CUTS = [0, 25, 47, 55, 76]
+# Mean closing PnL as a fraction of Size.USD, by classification
+SENTIMENT_DRIFT = {'Extreme Fear': 0.002, 'Fear': 0.0005, 'Neutral': 0.001, 'Greed': 0.0008,
+                   'Extreme Greed': 0.003}
+MAJORS = ['BTC', 'ETH', 'SOL', 'HYPE', '@107', 'TRUMP', 'XRP', 'DOGE', 'SUI', 'kPEPE']
+PERP_DIRECTIONS = ['Open Long', 'Close Long', 'Open Short', 'Close Short']
+SPOT_DIRECTIONS = ['Buy', 'Sell']
+BUY_DIRECTIONS = ['Open Long', 'Close Short', 'Buy']
+CLOSING_DIRECTIONS = ['Close Long', 'Close Short', 'Sell']
+IST_OFFSET_MS = 19_800_000
+
+
+def parse_size(text):
+    """'1m' / '10m' / '100m' or a plain row count."""
+    return SIZES[text] if text in SIZES else int(float(text))
+
+
+def sentiment_index(seed=42, start=INDEX_START, end=END):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, end, freq='D')
+    shocks = rng.normal(0, 9, len(dates))
+    value = np.empty(len(dates))
+    level = 50.0
+    for i, shock in enumerate(shocks):
+        level = 50 + 0.93 * (level - 50) + shock
+        value[i] = level
+    value = np.clip(np.round(value), 5, 95).astype(int)
+    classification = np.array(SENTIMENT_ORDER)[np.searchsorted(INDEX_CUTS, value, side='right') - 1]
+    return pd.DataFrame({
+        # Readings are stamped 05:30 UTC, like the real file
+        'timestamp': (dates - pd.Timestamp("1970-01-01")) // pd.Timedelta('1s') + 19_800,
+        'value': value,
+        'classification': classification,
+        'date': dates.strftime('%Y-%m-%d'),
+    })
+
+
+class FillGenerator:
+    """Chunks of synthetic fills in time order."""
+
+    def __init__(self, n_rows, index, seed=42, start=START, end=END):
+        self.rng = np.random.default_rng(seed + 1)
+        self.n_rows = n_rows
+        self.t0 = pd.Timestamp(start).value // 1_000_000
+        self.t1 = pd.Timestamp(end).value // 1_000_000
+        rng = self.rng
+        self.accounts = np.array([f"0x{rng.integers(0, 2 ** 63):016x}{rng.integers(0, 2 ** 63):016x}"
+                                  f"{rng.integers(0, 2 ** 31):08x}" for _ in range(N_ACCOUNTS)])
+        self.account_p = self._zipf(N_ACCOUNTS, 0.8)
+        self.coins = np.array(MAJORS + [f"@{i}" for i in range(N_COINS - len(MAJORS))])
+        self.coin_p = self._zipf(N_COINS, 1.1)
+        self.is_spot = np.char.startswith(self.coins, '@')
+        self.price = rng.lognormal(2, 3, N_COINS)
+        self.position = np.zeros(N_ACCOUNTS * N_COINS)
+        self.next_order = 50_000_000_000
+        self.next_trade = 100_000_000_000_000
+        # Drift of the IST calendar day each fill falls on
+        days = pd.to_datetime(index['date'])
+        self.index_day0 = days.iloc[0]
+        drift = index['classification'].map(SENTIMENT_DRIFT).to_numpy()
+        self.day_drift = pd.Series(drift, index=(days - days.iloc[0]).dt.days).reindex(
+            range((days.iloc[-1] - days.iloc[0]).days + 1)).fillna(0).to_numpy()
+
+    @staticmethod
+    def _zipf(n, s):
+        p = 1.0 / np.arange(1, n + 1) ** s
+        return p / p.sum()
+
+    def chunks(self, chunk_rows=CHUNK_ROWS):
+        n_chunks = max(1, -(-self.n_rows // chunk_rows))
+        edges = np.linspace(self.t0, self.t1, n_chunks + 1).astype(np.int64)
+        for i in range(n_chunks):
+            n = min(chunk_rows, self.n_rows - i * chunk_rows)
+            yield self._chunk(n, edges[i], edges[i + 1])
+
+    def _chunk(self, n, t_start, t_stop):
+        rng = self.rng
+        timestamp = np.sort(rng.integers(t_start, t_stop, n))
+        account = rng.choice(N_ACCOUNTS, n, p=self.account_p)
+        coin = rng.choice(N_COINS, n, p=self.coin_p)
+        spot = self.is_spot[coin]
+        direction = np.where(spot, np.array(SPOT_DIRECTIONS)[rng.integers(0, 2, n)],
+                             np.array(PERP_DIRECTIONS)[rng.integers(0, 4, n)])
+        is_buy = np.isin(direction, BUY_DIRECTIONS)
+        size_usd = rng.lognormal(np.log(600), 2.1, n)
+        price = self.price[coin] * rng.lognormal(0, 0.05, n)
+        tokens = size_usd / price
+
+        # Running position per Account x Coin, carried across chunks
+        group = account * N_COINS + coin
+        delta = np.where(is_buy, tokens, -tokens)
+        before = pd.Series(delta).groupby(group).cumsum().to_numpy() - delta + self.position[group]
+        np.add.at(self.position, group, delta)
+
+        ist = pd.to_datetime(timestamp + IST_OFFSET_MS, unit='ms')
+        day = (ist.normalize() - self.index_day0).days
+        drift = self.day_drift[np.clip(day.to_numpy(), 0, len(self.day_drift) - 1)]
+        closing = np.isin(direction, CLOSING_DIRECTIONS)
+        pnl = np.where(closing, size_usd * (drift + 0.02 * rng.standard_t(3, n)), 0.0)
+        crossed = rng.random(n) < 0.6
+
+        new_order = np.r_[True, rng.random(n - 1) < 0.4]
+        order = self.next_order + np.cumsum(new_order) - 1
+        self.next_order = int(order[-1]) + 1
+        # 32 random bytes per order as 64 hex characters
+        n_orders = int(new_order.sum())
+        hashes = np.array(rng.bytes(32 * n_orders).hex()).reshape(1).view('U64')
+        tx_hash = np.char.add('0x', hashes)[np.cumsum(new_order) - 1]
+        trade = self.next_trade + np.arange(n) * 7 + rng.integers(0, 7, n)
+        self.next_trade = int(trade[-1]) + 7
+
+        return pd.DataFrame({
+            'Account': self.accounts[account],
+            'Coin': self.coins[coin],
+            'Execution Price': price,
+            'Size Tokens': tokens,
+            'Size USD': size_usd,
+            'Side': np.where(is_buy, 'BUY', 'SELL'),
+            'Timestamp IST': ist.strftime('%d-%m-%Y %H:%M'),
+            'Start Position': before,
+            'Direction': direction,
+            'Closed PnL': pnl,
+            'Transaction Hash': tx_hash,
+            'Order ID': order,
+            'Crossed': np.where(crossed, 'TRUE', 'FALSE'),
+            'Fee': size_usd * np.where(crossed, 0.00035, 0.0001),
+            'Trade ID': trade,
+            'Timestamp': timestamp,
+        })
+
+
+def generate(n_rows, out_dir=".", seed=42, chunk_rows=CHUNK_ROWS):
+    """Write historical_data.csv and fear_greed_index.csv into out_dir."""
+    os.makedirs(out_dir, exist_ok=True)
+    index = sentiment_index(seed)
+    index.to_csv(os.path.join(out_dir, "fear_greed_index.csv"), index=False)
+    path = os.path.join(out_dir, "historical_data.csv")
+    tmp = path + ".tmp"
+    writer = None
+    for chunk in FillGenerator(n_rows, index, seed).chunks(chunk_rows):
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if writer is None:
+            writer = pv.CSVWriter(tmp, table.schema, write_options=pv.WriteOptions(quoting_style='none'))
+        writer.write_table(table)
+    writer.close()
+    # Only a complete file is ever visible under the real name
+    os.replace(tmp, path)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('size', help="rows: 1m, 10m, 100m or a number")
+    parser.add_argument('--out', default=None, help="output directory (default: bench/<size>)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+
+    n_rows = parse_size(args.size)
+    path = generate(n_rows, args.out or os.path.join("bench", args.size), args.seed, args.chunk_rows)
+    print(f"✓ {n_rows:,} fills written to '{path}'")
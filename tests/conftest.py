@@ -0,0 +1,40 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+os.environ.setdefault("TRACE", "0")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from merged_store import SENTIMENT_ORDER  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def in_tmp_path(tmp_path, monkeypatch):
+    """Every test runs in its own directory, so results/ and caches stay there."""
+    monkeypatch.chdir(tmp_path)
+
+
+def make_fills(n, rng, pnl_values=None, size_values=None):
+    """Closed fills with the merged store's test columns; PnL and size are
+    drawn from the given values (many ties) or continuous distributions."""
+    if pnl_values is None:
+        pnl = rng.standard_t(3, n) * 50
+    else:
+        pnl = rng.choice(pnl_values, n)
+    size = rng.lognormal(6, 1.5, n) if size_values is None else rng.choice(size_values, n)
+    return pd.DataFrame({
+        'date': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 60, n), unit='D'),
+        'classification': rng.choice(SENTIMENT_ORDER, n),
+        'position_type': rng.choice(['Long', 'Short', 'Other'], n, p=[0.45, 0.45, 0.1]),
+        'is_win': pnl > 0,
+        'Size.USD': size,
+        'Closed.PnL': pnl,
+    })
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(7)
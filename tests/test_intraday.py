@@ -0,0 +1,19 @@
+import numpy as np
+import pytest
+
+from intraday import BAR_MS, bar_starts
+
+
+@pytest.mark.parametrize('bar', list(BAR_MS))
+def test_bar_starts(bar, rng):
+    ts = rng.integers(1_682_899_200_000, 1_746_057_600_000, 2_000)
+    ms = BAR_MS[bar]
+    starts = bar_starts(ts, bar)
+    assert starts.dtype == np.int64
+    assert ((starts <= ts) & (ts < starts + ms)).all()
+    assert (starts % ms == 0).all()
+    assert list(starts[:50]) == [t - t % ms for t in ts[:50].tolist()]
+
+
+def test_bar_starts_boundaries():
+    assert list(bar_starts([0, 299_999, 300_000, 300_001], '5m')) == [0, 0, 300_000, 300_000]
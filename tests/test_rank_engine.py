@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+from scipy import stats
+
+from rank_engine import RankEngine, chi2_contingency
+
+
+@pytest.fixture
+def tied(rng):
+    return rng.integers(0, 40, 3000).astype(float)
+
+
+def test_ranks_match_rankdata(tied, rng):
+    engine = RankEngine(tied)
+    ranks, tie_sum = engine.ranks()
+    np.testing.assert_allclose(ranks, stats.rankdata(tied))
+    _, counts = np.unique(tied, return_counts=True)
+    assert tie_sum == np.sum(counts.astype(float) ** 3 - counts)
+
+    mask = rng.random(len(tied)) < 0.3
+    ranks, _ = engine.ranks(mask)
+    np.testing.assert_allclose(ranks[mask], stats.rankdata(tied[mask]))
+    assert np.isnan(ranks[~mask]).all()
+
+
+def test_kruskal(tied, rng):
+    labels = rng.integers(-1, 4, len(tied))
+    h, p = RankEngine(tied).kruskal(labels)
+    expected = stats.kruskal(*[tied[labels == g] for g in range(4)])
+    assert h == pytest.approx(expected.statistic)
+    assert p == pytest.approx(expected.pvalue)
+
+
+@pytest.mark.parametrize('n1, n2', [(400, 300), (5, 7)])
+def test_mannwhitney(tied, rng, n1, n2):
+    picks = rng.permutation(len(tied))
+    mask_1 = np.zeros(len(tied), dtype=bool)
+    mask_2 = np.zeros(len(tied), dtype=bool)
+    mask_1[picks[:n1]] = True
+    mask_2[picks[n1:n1 + n2]] = True
+    u, p = RankEngine(tied).mannwhitney(mask_1, mask_2)
+    expected = stats.mannwhitneyu(tied[mask_1], tied[mask_2], alternative='two-sided')
+    assert u == pytest.approx(expected.statistic)
+    assert p == pytest.approx(expected.pvalue)
+
+
+def test_spearman_and_kendall(tied, rng):
+    other = tied + rng.integers(0, 20, len(tied))
+    mask = rng.random(len(tied)) < 0.5
+    x, y = RankEngine(tied), RankEngine(other)
+
+    rho, p = x.spearman(y, mask)
+    expected = stats.spearmanr(tied[mask], other[mask])
+    assert rho == pytest.approx(expected.statistic)
+    assert p == pytest.approx(expected.pvalue)
+
+    tau, p = x.kendall(y, mask)
+    expected = stats.kendalltau(tied[mask], other[mask])
+    assert tau == pytest.approx(expected.statistic)
+    assert p == pytest.approx(expected.pvalue)
+
+
+@pytest.mark.parametrize('n', [2, 3, 6])
+def test_kendall_small_samples(n, rng):
+    x, y = rng.permutation(n).astype(float), rng.permutation(n).astype(float)
+    tau, p = RankEngine(x).kendall(RankEngine(y))
+    expected = stats.kendalltau(x, y)
+    assert tau == pytest.approx(expected.statistic)
+    assert p == pytest.approx(expected.pvalue)
+
+
+@pytest.mark.parametrize('table', [[[12, 30], [25, 18]], [[40, 55], [31, 70], [9, 2], [60, 61], [33, 20]]])
+def test_chi2_contingency(table):
+    chi2, p, dof, expected = chi2_contingency(table)
+    reference = stats.chi2_contingency(table)
+    assert chi2 == pytest.approx(reference.statistic)
+    assert p == pytest.approx(reference.pvalue)
+    assert dof == reference.dof
+    np.testing.assert_allclose(expected, reference.expected_freq)
+
+
+def test_subset_cache_is_bounded(tied, rng):
+    engine = RankEngine(tied, cache_size=2)
+    masks = [rng.random(len(tied)) < 0.5 for _ in range(4)]
+    for mask in masks:
+        engine.ranks(mask)
+    assert len(engine._subsets) == 2
+    # The most recent mask is served from the cache
+    assert engine.ranks(masks[-1]) is engine.ranks(masks[-1].copy())
@@ -0,0 +1,71 @@
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from conftest import make_fills
+from merged_store import SENTIMENT_ORDER
+from resampling import (bootstrap_days, bootstrap_iid, long_short_permutation, permutation_gap,
+                        sentiment_bootstrap)
+
+
+def metrics(sample):
+    return [sample.mean(), (sample > 0).mean() * 100, sample.mean() / sample.std(ddof=1)]
+
+
+def test_bootstrap_iid_matches_brute_force(rng):
+    x = rng.standard_t(3, 300)
+    # A tiny memory budget forces many batches; the draws must not depend on it
+    reps = bootstrap_iid(x, 50, np.random.default_rng(1), memory_mb=0.02)
+    idx = np.random.default_rng(1).integers(0, len(x), size=(50, len(x)))
+    np.testing.assert_allclose(reps, [metrics(x[i]) for i in idx])
+
+
+def test_bootstrap_days_matches_brute_force(rng):
+    x = rng.standard_t(3, 400)
+    days = rng.integers(0, 30, len(x))
+    reps = bootstrap_days(x, days, 40, np.random.default_rng(2), memory_mb=0.01)
+    labels = np.unique(days)
+    idx = np.random.default_rng(2).integers(0, len(labels), size=(40, len(labels)))
+    expected = [metrics(np.concatenate([x[days == labels[d]] for d in row])) for row in idx]
+    np.testing.assert_allclose(reps, expected)
+
+
+def test_sentiment_bootstrap_estimates_and_intervals(rng):
+    fills = make_fills(3_000, rng)
+    cis = sentiment_bootstrap(fills, n_boot=500, seed=3).set_index(['classification', 'metric'])
+    for sentiment in SENTIMENT_ORDER:
+        x = fills.loc[fills['classification'] == sentiment, 'Closed.PnL'].to_numpy()
+        for metric, value in zip(['avg_pnl', 'win_rate', 'sharpe_like'], metrics(x)):
+            row = cis.loc[(sentiment, metric)]
+            assert row['estimate'] == pytest.approx(value)
+            assert row['ci_low'] <= row['estimate'] <= row['ci_high']
+
+
+def test_permutation_gap_matches_exact_enumeration(rng):
+    x = rng.normal(0, 1, 10)
+    is_short = np.zeros(10, dtype=bool)
+    is_short[:4] = True
+    observed = x[:4].mean() - x[4:].mean()
+    gaps = []
+    for picks in combinations(range(10), 4):
+        short = np.zeros(10, dtype=bool)
+        short[list(picks)] = True
+        gaps.append(x[short].mean() - x[~short].mean())
+    exact_p = np.mean(np.abs(gaps) >= abs(observed) - 1e-12)
+
+    gap, p = permutation_gap(x, is_short, 20_000, np.random.default_rng(4), memory_mb=0.05)
+    assert gap == pytest.approx(observed)
+    assert p == pytest.approx(exact_p, abs=0.015)
+
+
+def test_long_short_permutation_columns(rng):
+    fills = make_fills(2_000, rng)
+    perms = long_short_permutation(fills, n_perm=200, seed=5).set_index('classification')
+    for sentiment, row in perms.iterrows():
+        group = fills[fills['classification'] == sentiment]
+        long_avg = group.loc[group['position_type'] == 'Long', 'Closed.PnL'].mean()
+        short_avg = group.loc[group['position_type'] == 'Short', 'Closed.PnL'].mean()
+        assert (row['avg_pnl_Long'], row['avg_pnl_Short']) == pytest.approx((long_avg, short_avg))
+        assert row['short_advantage'] == pytest.approx(short_avg - long_avg)
+        assert 0 < row['p_value'] <= 1
@@ -0,0 +1,58 @@
+import os
+
+import numpy as np
+
+from results_cache import cached_results, fingerprint, local_imports
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(text)
+
+
+def test_fingerprint_follows_contents_and_params():
+    write("store/month=2024-01/part-0.parquet", "a")
+    key = fingerprint(["store"], {'q': [0.1, 0.9], 'n': 3})
+    assert fingerprint(["store"], {'n': 3, 'q': [0.1, 0.9]}) == key
+    assert fingerprint(["store"], {'n': 4, 'q': [0.1, 0.9]}) != key
+
+    # State directories and dot files are not inputs
+    write("store/_state/watermark.parquet", "x")
+    write("store/.lock", "x")
+    assert fingerprint(["store"], {'q': [0.1, 0.9], 'n': 3}) == key
+
+    write("store/month=2024-01/part-0.parquet", "b")
+    assert fingerprint(["store"], {'q': [0.1, 0.9], 'n': 3}) != key
+
+
+def test_fingerprint_follows_the_code():
+    write("input.csv", "1,2\n")
+    assert fingerprint(["input.csv"], code=['rank_engine.py']) != fingerprint(["input.csv"])
+    assert (fingerprint(["input.csv"], code=['rank_engine.py'])
+            == fingerprint(["input.csv"], code=['rank_engine.py']))
+
+
+def test_local_imports_closure():
+    write("a.py", "import os\nfrom b import f\n\ndef g():\n    import c\n")
+    write("b.py", "import numpy as np\nfrom . import nothing\n")
+    write("c.py", "from d.sub import x\n")
+    write("d.py", "")
+    write("unused.py", "")
+    write("stage.R", 'source("helpers.R")\nsource("missing.R")\n')
+    write("helpers.R", "")
+    assert local_imports("a.py") == ["a.py", "b.py", "c.py", "d.py"]
+    assert local_imports("stage.R") == ["helpers.R", "stage.R"]
+
+
+def test_cached_results_computes_once():
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {'rho': np.float64(0.25), 'rows': [np.int64(3)]}
+
+    first = cached_results('demo', 'f' * 64, compute)
+    second = cached_results('demo', 'f' * 64, compute)
+    assert first == second == {'rho': 0.25, 'rows': [3]}
+    assert len(calls) == 1
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sentiment_features import DAY_MS, attach_features, reading_starts
+
+DATES = pd.to_datetime(['2024-03-01', '2024-03-02', '2024-03-04', '2024-03-05', '2024-03-09'])
+EPOCH = pd.Timestamp(0)
+
+
+@pytest.fixture
+def features():
+    return pd.DataFrame({
+        'date': DATES,
+        'timestamp': (DATES + pd.Timedelta(hours=5, minutes=30) - EPOCH) // pd.Timedelta(seconds=1),
+        'value': [20, 30, 50, 70, 90],
+        'classification': ['Extreme Fear', 'Fear', 'Neutral', 'Greed', 'Extreme Greed'],
+    })
+
+
+def brute_force(ts, starts, tolerance_days):
+    """Index of the latest reading that started at or before ts, if it is
+    still within the tolerance."""
+    best = None
+    for i, start in enumerate(starts):
+        if start <= ts and (best is None or start >= starts[best]):
+            best = i
+    if best is None or ts - starts[best] >= tolerance_days * DAY_MS:
+        return None
+    return best
+
+
+@pytest.mark.parametrize('boundary, lag_days', [('IST', 0), ('UTC', 0), ('published', 0), ('IST', 2)])
+def test_as_of_join_matches_brute_force(features, rng, boundary, lag_days):
+    starts = reading_starts(features, boundary, lag_days)
+    lo, hi = starts.min() - DAY_MS, starts.max() + 2 * DAY_MS
+    ts = np.concatenate([rng.integers(lo, hi, 500), starts, starts - 1])
+    attached = attach_features(ts, features, boundary, lag_days)
+    for t, (_, row) in zip(ts, attached.iterrows()):
+        i = brute_force(t, starts, 1)
+        if i is None:
+            assert pd.isna(row['value'])
+        else:
+            assert row['value'] == features['value'][i]
+            assert row['reading_date'] == features['date'][i]
+
+
+def test_ist_readings_start_at_local_midnight(features):
+    starts = reading_starts(features, 'IST')
+    utc_midnight = (DATES - EPOCH) // pd.Timedelta(milliseconds=1)
+    np.testing.assert_array_equal(utc_midnight - starts, np.full(len(DATES), 19_800_000))
@@ -0,0 +1,20 @@
+import numpy as np
+
+from sentiment_sweep import benjamini_hochberg
+
+
+def brute_force_bh(p):
+    """q_i = min over j with p_j >= p_i of p_j * m / rank_j, capped at 1."""
+    m = len(p)
+    ranks = np.argsort(np.argsort(p, kind='stable'), kind='stable') + 1
+    return np.array([min(1.0, min(p[j] * m / ranks[j] for j in range(m) if p[j] >= p[i]))
+                     for i in range(m)])
+
+
+def test_benjamini_hochberg_matches_definition(rng):
+    p = np.concatenate([rng.uniform(0, 1, 60), rng.uniform(0, 1e-3, 15), [0.02, 0.02, 1.0]])
+    np.testing.assert_allclose(benjamini_hochberg(p), brute_force_bh(p))
+
+
+def test_benjamini_hochberg_empty():
+    assert len(benjamini_hochberg([])) == 0
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from scipy import stats
+
+from conftest import make_fills
+from hypothesis_tests import run_hypothesis_tests
+from streaming_stats import StreamingTests
+
+# Values far enough apart to land in distinct log bins, so binning is exact
+PNL_VALUES = [-900.0, -45.5, -3.0, -0.5, 2.0, 17.0, 250.0, 4000.0]
+SIZE_VALUES = [10.0, 120.0, 800.0, 2500.0, 9000.0, 60000.0]
+
+
+def stream(fills, chunk_rows, **kwargs):
+    state = StreamingTests(**kwargs)
+    for start in range(0, len(fills), chunk_rows):
+        state.update(fills.iloc[start:start + chunk_rows].reset_index(drop=True))
+    return state
+
+
+def test_matches_in_memory_tests_when_binning_is_exact(rng):
+    fills = make_fills(20_000, rng, PNL_VALUES, SIZE_VALUES)
+    exact = run_hypothesis_tests(fills, verbose=False)
+    state = stream(fills, 3_000)
+
+    h, p = state.h1()
+    assert h == pytest.approx(exact['h1']['h'])
+    assert p == pytest.approx(exact['h1']['p'])
+
+    _, chi2, p, dof = state.h2()
+    assert chi2 == pytest.approx(exact['h2']['chi2'])
+    assert p == pytest.approx(exact['h2']['p'])
+    assert dof == exact['h2']['dof']
+
+    for (sentiment, long_avg, short_avg, u, p), row in zip(state.h3(), exact['h3']):
+        assert sentiment == row['classification']
+        assert (long_avg, short_avg) == pytest.approx((row['long_avg'], row['short_avg']))
+        assert (u, p) == pytest.approx((row['u'], row['p']))
+
+    rho, p = state.h4()
+    assert rho == pytest.approx(exact['h4']['rho'])
+    assert p == pytest.approx(exact['h4']['p'])
+
+
+def test_chunking_does_not_change_the_state(rng):
+    fills = make_fills(10_000, rng)
+    one, many = stream(fills, len(fills)), stream(fills, 777)
+    np.testing.assert_array_equal(one.pnl_hist, many.pnl_hist)
+    np.testing.assert_array_equal(one.side_hist, many.side_hist)
+    np.testing.assert_allclose(one.pnl_moments.mean, many.pnl_moments.mean)
+    np.testing.assert_allclose(one.pnl_moments.std(), many.pnl_moments.std())
+    assert one.h4() == pytest.approx(many.h4())
+
+
+@pytest.mark.parametrize('joint_width', [1e-2, 1e-1, 0.5])
+def test_h4_error_bound_holds(rng, joint_width):
+    fills = make_fills(20_000, rng)
+    state = stream(fills, 5_000, joint_width=joint_width)
+    exact = stats.spearmanr(fills['Size.USD'], fills['Closed.PnL']).statistic
+    assert abs(state.h4()[0] - exact) <= state.h4_error_bound()
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import walk_forward
+from merged_store import SENTIMENT_ORDER, SIZE_LABELS
+from walk_forward import MEASURES, VIEWS, monthly_prefix_sums, windows
+
+
+@pytest.fixture
+def cube(rng):
+    n = 3_000
+    months = [f"2024-{m:02d}" for m in range(1, 10)]
+    return pd.DataFrame({
+        'month': rng.choice(months, n),
+        'Coin': pd.Categorical(rng.choice(['BTC', 'ETH', 'SOL', 'HYPE'], n)),
+        'classification': pd.Categorical(rng.choice(SENTIMENT_ORDER, n)),
+        'size_category': pd.Categorical(rng.choice(SIZE_LABELS, n)),
+        'n_closed': rng.integers(0, 5, n),
+        'pnl': rng.normal(0, 100, n),
+        'wins': rng.integers(0, 3, n),
+    })
+
+
+def test_windows():
+    assert windows(9, 6, 1, 1) == [(0, 6, 7), (1, 7, 8), (2, 8, 9)]
+    assert windows(9, 6, 2, 2) == [(0, 6, 8)]
+    assert windows(5, 6, 1, 1) == []
+
+
+@pytest.mark.parametrize('view', list(VIEWS))
+def test_window_sums_match_groupby(cube, view):
+    months, views = monthly_prefix_sums(cube)
+    walk_forward._init_worker(months, views, {})
+    keys = VIEWS[view]
+    closed = cube[cube['n_closed'] > 0].astype({k: object for k in keys})
+    for start, stop in [(0, len(months)), (2, 5), (4, 5), (3, 3)]:
+        sums = walk_forward._window_sums(view, start, stop).set_index(keys)
+        expected = (closed[closed['month'].isin(months[start:stop])].groupby(keys)[MEASURES].sum()
+                    .reindex(sums.index, fill_value=0))
+        np.testing.assert_allclose(sums[MEASURES].to_numpy(dtype=float), expected.to_numpy(dtype=float))
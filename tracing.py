@@ -0,0 +1,208 @@
+"""Structured trace spans for the pipeline stages, with an opt-in sampling profiler.
+
+    with span("h2_chi_square", rows_in=len(closed_trades)) as s:
+        ...
+        s.rows_out = len(contingency)
+
+    python tracing.py [--trace results/trace.jsonl] [--run ID | --all] [--top 20]
+
+Each span appends a JSON line (run, stage, span, parent, duration_s, rows,
+rss_mb, error) to results/trace.jsonl. TRACE=0 disables spans;
+TRACE_PROFILE=1 samples the stack every TRACE_INTERVAL seconds.
+"""
+import argparse
+import atexit
+import collections
+import json
+import os
+import resource
+import signal
+import sys
+import time
+
+import pandas as pd
+
+from results_cache import RESULTS_DIR
+
+TRACE_FILE = os.environ.get("TRACE_FILE", os.path.join(RESULTS_DIR, "trace.jsonl"))
+ENABLED = os.environ.get("TRACE", "1") != "0"
+PROFILE = ENABLED and os.environ.get("TRACE_PROFILE") == "1"
+INTERVAL = float(os.environ.get("TRACE_INTERVAL", "0.005"))
+MAX_DEPTH = 40
+RUN_ID = os.environ.get("TRACE_RUN") or f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+STAGE = os.environ.get("TRACE_STAGE") or os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0]
+
+_stack = []
+_samples = collections.Counter()
+_PAGE_MB = os.sysconf("SC_PAGE_SIZE") / 2 ** 20 if hasattr(os, "sysconf") else 0
+
+
+def rss_mb():
+    """Current resident set size in MB (peak RSS where /proc is missing)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_MB
+    except (OSError, IndexError, ValueError):
+        # ru_maxrss is in KB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def write_record(record, path=None):
+    """Append one JSON line. Each record is a single small write to a file
+    opened for appending, so concurrent stages do not interleave lines."""
+    path = path or TRACE_FILE
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a") as f:
+        f.write(json.dumps(record, default=str) + "\n")
+
+
+class span:
+    """Context manager timing one named step. start() / finish() bracket a
+    step that is not one block, such as a script's top-level code."""
+
+    def __init__(self, name, rows_in=None, **fields):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.fields = fields
+
+    def __enter__(self):
+        if not ENABLED:
+            return self
+        self.parent = _stack[-1].name if _stack else None
+        _stack.append(self)
+        self.started = time.time()
+        self.rss0 = rss_mb()
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not ENABLED:
+            return False
+        duration = time.perf_counter() - self.t0
+        _stack.pop()
+        rss = rss_mb()
+        record = {"type": "span", "run": RUN_ID, "stage": STAGE, "span": self.name, "parent": self.parent,
+                  "start": round(self.started, 3), "duration_s": round(duration, 6),
+                  "rows_in": _count(self.rows_in), "rows_out": _count(self.rows_out),
+                  "rss_mb": round(rss, 1), "rss_delta_mb": round(rss - self.rss0, 1), **self.fields}
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+        write_record(record)
+        return False
+
+    def start(self):
+        return self.__enter__()
+
+    def finish(self):
+        self.__exit__(None, None, None)
+
+
+def _count(rows):
+    """Row count of an int, a frame / array / list, or None."""
+    if rows is None or isinstance(rows, int):
+        return rows
+    try:
+        return len(rows)
+    except TypeError:
+        return int(rows)
+
+
+# ===== SAMPLING PROFILER =====
+
+def _sample(signum, frame):
+    stack = []
+    while frame is not None and len(stack) < MAX_DEPTH:
+        code = frame.f_code
+        stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    _samples[(_stack[-1].name if _stack else None, ";".join(reversed(stack)))] += 1
+
+
+def _write_profile():
+    signal.setitimer(signal.ITIMER_PROF, 0)
+    for (name, stack), count in _samples.most_common():
+        write_record({"type": "profile", "run": RUN_ID, "stage": STAGE, "span": name, "stack": stack,
+                      "samples": count, "interval_s": INTERVAL})
+
+
+def start_profiler(interval=INTERVAL):
+    """Sample the main thread's stack every `interval` seconds of CPU time
+    until exit. Started on import when TRACE_PROFILE=1."""
+    signal.signal(signal.SIGPROF, _sample)
+    signal.setitimer(signal.ITIMER_PROF, interval, interval)
+    atexit.register(_write_profile)
+
+
+if PROFILE:
+    start_profiler()
+
+
+# ===== SUMMARY =====
+
+def load_trace(path=TRACE_FILE, run=None):
+    """Records of one run (default: the latest), or of every run if run='all'."""
+    with open(path) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    trace = pd.DataFrame(records)
+    if trace.empty or run == "all":
+        return trace
+    return trace[trace["run"] == (run or trace["run"].iloc[-1])]
+
+
+def slowest_steps(trace, top=20):
+    """Spans by total wall time, with their share of the stage's time."""
+    spans = trace[trace["type"] == "span"]
+    table = (spans.groupby(["stage", "span"])
+             .agg(calls=("duration_s", "size"), total_s=("duration_s", "sum"), max_s=("duration_s", "max"),
+                  rows_in=("rows_in", "max"), rows_out=("rows_out", "max"),
+                  rss_delta_mb=("rss_delta_mb", "max"))
+             .sort_values("total_s", ascending=False))
+    # Top-level spans partition a stage's traced time
+    stage_s = spans[spans["parent"].isna()].groupby("stage")["duration_s"].sum()
+    table["stage_pct"] = (table["total_s"] / table.index.get_level_values("stage").map(stage_s).to_numpy()) * 100
+    return table.head(top)
+
+
+def hottest_functions(trace, top=20):
+    """Profile samples by innermost frame (self) and anywhere on the stack
+    (inclusive), in estimated CPU seconds."""
+    profile = trace[trace["type"] == "profile"]
+    if profile.empty:
+        return pd.DataFrame()
+    seconds = profile["samples"] * profile["interval_s"]
+    frames = profile["stack"].str.split(";")
+    self_s = seconds.groupby([profile["stage"], frames.str[-1]]).sum()
+    inclusive = pd.DataFrame({"stage": profile["stage"], "frame": frames.map(set), "s": seconds}).explode("frame")
+    inclusive_s = inclusive.groupby(["stage", "frame"])["s"].sum()
+    table = pd.DataFrame({"self_s": self_s, "inclusive_s": inclusive_s}).fillna(0)
+    table.index.names = ["stage", "function"]
+    return table.sort_values("self_s", ascending=False).head(top)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trace", default=TRACE_FILE)
+    parser.add_argument("--run", default=None, help="run id (default: the latest)")
+    parser.add_argument("--all", action="store_true", help="every run in the trace")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    trace = load_trace(args.trace, "all" if args.all else args.run)
+    if trace.empty:
+        sys.exit(f"no records in '{args.trace}'")
+    runs = trace["run"].unique()
+    print("=" * 70)
+    print(f"SLOWEST STEPS ({'all runs' if len(runs) > 1 else 'run ' + runs[0]})")
+    print("=" * 70)
+    print(slowest_steps(trace, args.top).to_string(float_format=lambda v: f"{v:,.3f}"))
+
+    stages = trace[trace["type"] == "stage"]
+    if not stages.empty:
+        print("\nStages (pipeline.py):")
+        print(stages.set_index("stage")[["duration_s", "peak_rss_mb"]].to_string())
+
+    hottest = hottest_functions(trace, args.top)
+    if not hottest.empty:
+        print("\nHottest functions (TRACE_PROFILE=1):")
+        print(hottest.to_string(float_format=lambda v: f"{v:,.3f}"))
@@ -0,0 +1,62 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# ===== SHARED TRADER DATA LOADER =====
+# Python side of trader_loader.R. ID columns are read as strings and interned
+# into int32 surrogate codes; id_lookup/<column>.parquet holds the append-only
+# code -> id mapping shared by both languages.
+
+ID_COLUMNS = ['Account', 'Transaction.Hash', 'Order.ID', 'Trade.ID']
+LOOKUP_DIR = "id_lookup"
+
+
+def read_trader_csv(path="historical_data.csv", **kwargs):
+    """read_csv with the raw column names mapped to the R (make.names) ones."""
+    data = pd.read_csv(path, dtype={c: str for c in ID_COLUMNS}, **kwargs)
+    data.columns = [c.replace(' ', '.') for c in data.columns]
+    return data
+
+
+def _lookup_path(column, lookup_dir):
+    return os.path.join(lookup_dir, f"{column}.parquet")
+
+
+def load_lookup(column, lookup_dir=LOOKUP_DIR):
+    """Index of ids for `column`; the position of an id is its code."""
+    path = _lookup_path(column, lookup_dir)
+    if not os.path.exists(path):
+        return pd.Index([], dtype=object)
+    lookup = pd.read_parquet(path).sort_values('code')
+    return pd.Index(lookup['id'].to_numpy(dtype=object))
+
+
+def intern_ids(df, columns=ID_COLUMNS, lookup_dir=LOOKUP_DIR):
+    """Replace ID strings with int32 codes, extending the lookup tables."""
+    os.makedirs(lookup_dir, exist_ok=True)
+    df = df.copy()
+    for col in [c for c in columns if c in df.columns]:
+        ids = load_lookup(col, lookup_dir)
+        values = df[col]
+        new_ids = pd.Index(values.dropna().unique()).difference(ids, sort=False)
+        if len(new_ids) > 0:
+            ids = ids.append(new_ids)
+            pd.DataFrame({
+                'code': np.arange(len(ids), dtype=np.int32),
+                'id': ids.to_numpy(dtype=object),
+            }).to_parquet(_lookup_path(col, lookup_dir), index=False)
+        codes = ids.get_indexer(values)
+        df[col] = pd.array(np.where(codes >= 0, codes, 0).astype(np.int32), dtype='Int32')
+        df.loc[values.isna(), col] = pd.NA
+    return df
+
+
+def decode_ids(df, columns=ID_COLUMNS, lookup_dir=LOOKUP_DIR):
+    """Map int32 codes back to the original ID strings (for display)."""
+    df = df.copy()
+    for col in [c for c in columns if c in df.columns]:
+        ids = load_lookup(col, lookup_dir).to_numpy(dtype=object)
+        codes = df[col]
+        df[col] = pd.Series(ids[codes.fillna(0).astype(np.int64)], index=df.index).where(codes.notna())
+    return df
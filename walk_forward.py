@@ -0,0 +1,189 @@
+"""Walk-forward (out-of-sample) validation of the INSIGHT 3 and 4 recommendations.
+
+    python walk_forward.py [--train-months 6] [--test-months 1] [--step 1]
+                           [--workers N]
+
+Re-derives the coin rules and size buckets on each rolling train window and
+scores them on the next test window (hit, lift), from monthly prefix sums.
+Writes walk_forward.csv and a per-recommendation stability table.
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from daily_cube import load_cube
+from merged_store import has_sentiment
+from report_results import REPORT_PARAMS
+
+TRAIN_MONTHS = 6
+TEST_MONTHS = 1
+STEP = 1
+OUTPUT_FILE = "walk_forward.csv"
+MEASURES = ['n_closed', 'pnl', 'wins']
+VIEWS = {
+    'coin_rule': ['Coin', 'classification'],
+    'size_bucket': ['classification', 'size_category'],
+}
+
+_prefix = {}
+
+
+# ===== MONTHLY PREFIX SUMS =====
+
+def monthly_prefix_sums(cube):
+    """For each view: the key frame and (keys x months + 1) prefix sums of
+    MEASURES over the months."""
+    closed = cube[cube['n_closed'] > 0].copy()
+    for col in ['classification', 'Coin', 'size_category']:
+        closed[col] = closed[col].astype(object)
+    months = sorted(closed['month'].unique())
+    views = {}
+    for view, keys in VIEWS.items():
+        monthly = (closed.groupby(keys + ['month'])[MEASURES].sum()
+                   .unstack('month', fill_value=0))
+        prefix = {m: np.concatenate([np.zeros((len(monthly), 1)),
+                                     np.cumsum(monthly[m].reindex(columns=months, fill_value=0).to_numpy(),
+                                               axis=1)], axis=1)
+                  for m in MEASURES}
+        views[view] = {'keys': monthly.index.to_frame(index=False), 'prefix': prefix}
+    return months, views
+
+
+def windows(n_months, train_months=TRAIN_MONTHS, test_months=TEST_MONTHS, step=STEP):
+    """(train_start, test_start, test_stop) month offsets."""
+    return [(start, start + train_months, start + train_months + test_months)
+            for start in range(0, n_months - train_months - test_months + 1, step)]
+
+
+def _window_sums(view, start, stop):
+    keys = _prefix['views'][view]['keys'].copy()
+    for m, prefix in _prefix['views'][view]['prefix'].items():
+        keys[m] = prefix[:, stop] - prefix[:, start]
+    return keys
+
+
+def _avg(sums):
+    return sums['pnl'] / sums['n_closed'].where(sums['n_closed'] > 0)
+
+
+# ===== ONE WINDOW =====
+
+def coin_rules(train, test, params):
+    train = train[train['n_closed'] >= params['coin_min_trades']].assign(avg_pnl=_avg)
+    test = test.assign(avg_pnl=_avg)
+    test_avg = test.set_index(['Coin', 'classification'])['avg_pnl']
+    coin_totals = test.groupby('Coin')[['pnl', 'n_closed']].sum()
+    coin_avg = _avg(coin_totals)
+    rows = []
+    for coin, group in train.groupby('Coin'):
+        best = group.loc[group['avg_pnl'].idxmax()]
+        worst = group.loc[group['avg_pnl'].idxmin()]
+        if best['avg_pnl'] - worst['avg_pnl'] <= params['coin_min_range']:
+            continue
+        test_best = test_avg.get((coin, best['classification']), np.nan)
+        test_worst = test_avg.get((coin, worst['classification']), np.nan)
+        rows.append({
+            'kind': 'coin_rule', 'subject': coin,
+            'recommendation': f"{best['classification']} (avoid {worst['classification']})",
+            'train_avg': best['avg_pnl'], 'test_avg': test_best,
+            'hit': test_best > test_worst if np.isfinite(test_best) and np.isfinite(test_worst) else np.nan,
+            'lift': test_best - coin_avg.get(coin, np.nan),
+        })
+    return rows
+
+
+def size_buckets(train, test):
+    train = train[train['n_closed'] > 0].assign(avg_pnl=_avg)
+    test = test[test['n_closed'] > 0].assign(avg_pnl=_avg)
+    sentiment_avg = _avg(test.groupby('classification')[['pnl', 'n_closed']].sum())
+    rows = []
+    for sentiment, group in train.groupby('classification'):
+        best = group.loc[group['avg_pnl'].idxmax()]
+        tested = test[test['classification'] == sentiment].set_index('size_category')['avg_pnl']
+        test_best = tested.get(best['size_category'], np.nan)
+        rows.append({
+            'kind': 'size_bucket', 'subject': sentiment, 'recommendation': best['size_category'],
+            'train_avg': best['avg_pnl'], 'test_avg': test_best,
+            'hit': tested.idxmax() == best['size_category'] if np.isfinite(test_best) else np.nan,
+            'lift': test_best - sentiment_avg.get(sentiment, np.nan),
+        })
+    return rows
+
+
+def _init_worker(months, views, params):
+    _prefix.update(months=months, views=views, params=params)
+
+
+def evaluate_window(window):
+    start, test_start, test_stop = window
+    months, params = _prefix['months'], _prefix['params']
+    rows = (coin_rules(_window_sums('coin_rule', start, test_start),
+                       _window_sums('coin_rule', test_start, test_stop), params)
+            + size_buckets(_window_sums('size_bucket', start, test_start),
+                           _window_sums('size_bucket', test_start, test_stop)))
+    for row in rows:
+        row.update(train_start=months[start], test_start=months[test_start], test_end=months[test_stop - 1])
+    return rows
+
+
+def walk_forward(cube, train_months=TRAIN_MONTHS, test_months=TEST_MONTHS, step=STEP,
+                 params=REPORT_PARAMS, workers=None):
+    """One row per window x recommendation."""
+    months, views = monthly_prefix_sums(cube)
+    tasks = windows(len(months), train_months, test_months, step)
+    if not tasks:
+        raise ValueError(f"{len(months)} months of data; need at least {train_months + test_months}")
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(months, views, params)) as pool:
+        rows = [row for window_rows in pool.map(evaluate_window, tasks) for row in window_rows]
+    columns = ['train_start', 'test_start', 'test_end', 'kind', 'subject', 'recommendation',
+               'train_avg', 'test_avg', 'hit', 'lift']
+    return pd.DataFrame(rows, columns=columns)
+
+
+def stability(results, n_windows):
+    """Per coin / sentiment: how often it was recommended, how consistently,
+    and how the recommendation did out of sample."""
+    def summarise(group):
+        counts = group['recommendation'].value_counts()
+        return pd.Series({
+            'windows': len(group),
+            'coverage_pct': len(group) / n_windows * 100,
+            'modal_recommendation': counts.index[0],
+            'agreement_pct': counts.iloc[0] / len(group) * 100,
+            'hit_rate_pct': group['hit'].astype(float).mean() * 100,
+            'mean_lift': group['lift'].mean(),
+        })
+    table = results.groupby(['kind', 'subject']).apply(summarise).reset_index()
+    table = table.sort_values(['kind', 'agreement_pct', 'windows'], ascending=[True, False, False])
+    return table.set_index(['kind', 'subject'])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--train-months', type=int, default=TRAIN_MONTHS)
+    parser.add_argument('--test-months', type=int, default=TEST_MONTHS)
+    parser.add_argument('--step', type=int, default=STEP)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    cube = load_cube(filter=has_sentiment())
+    results = walk_forward(cube, args.train_months, args.test_months, args.step, workers=args.workers)
+    results.to_csv(OUTPUT_FILE, index=False)
+    n_windows = results['test_start'].nunique()
+
+    print("="*70)
+    print(f"WALK-FORWARD VALIDATION ({n_windows} windows: {args.train_months}m train -> "
+          f"{args.test_months}m test, step {args.step}m)")
+    print("="*70)
+    summary = results.groupby('kind').agg(recommendations=('hit', 'size'),
+                                          hit_rate_pct=('hit', lambda h: h.astype(float).mean() * 100),
+                                          mean_lift=('lift', 'mean'))
+    print(summary.to_string(float_format=lambda v: f"{v:,.2f}"))
+
+    print("\nStability across windows:")
+    table = stability(results, n_windows)
+    print(table.to_string(float_format=lambda v: f"{v:,.2f}"))
+    print(f"\n✓ Per-window results saved to '{OUTPUT_FILE}'")